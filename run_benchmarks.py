@@ -0,0 +1,604 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner for Todo List Manager
+
+Generates synthetic task databases of increasing size, times the data layer against
+them and writes the results to JSON so runs from different commits can be compared.
+
+Usage:
+    python run_benchmarks.py run [--sizes 1000 10000 ...] [--output results.json]
+    python run_benchmarks.py stress [--writers 8 --readers 8 --duration 5]
+    python run_benchmarks.py async [--workers 4 --concurrency 32 --ops 400]
+    python run_benchmarks.py compare baseline.json candidate.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+import todo_core
+import todo_async
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DATA_DIR = Path(".bench_data")
+DATASET_VERSION = 2  # bump when the generator changes so cached datasets are rebuilt
+
+# Realistic-looking distributions for the synthetic tasks
+STATUS_WEIGHTS = {"Pending": 35, "In Progress": 15, "On Hold": 10, "Completed": 30, "Expired": 10}
+WORDS = (
+    "report review deploy migrate design draft update fix test plan budget meeting client "
+    "server database search index backlog roadmap quarterly release onboarding invoice "
+    "contract audit security training hiring feedback metrics dashboard api mobile website "
+    "customer vendor survey research prototype launch campaign newsletter support ticket"
+).split()
+
+def _rating(rng):
+    # Ratings cluster around the middle of the 1-10 scale
+    return min(10, max(1, round(rng.gauss(5.5, 2.2))))
+
+def _text(rng, min_words, median_words):
+    count = max(min_words, int(rng.lognormvariate(0, 0.8) * median_words))
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+def _synthetic_rows(n_tasks, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    statuses, weights = zip(*STATUS_WEIGHTS.items())
+    for _ in range(n_tasks):
+        created = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        updated = created + (now - created) * rng.random() ** 2
+        due = None if rng.random() < 0.3 else (created + timedelta(days=rng.randint(0, 120))).date().isoformat()
+        impact, tractability, uncertainty = _rating(rng), _rating(rng), _rating(rng)
+        status = rng.choices(statuses, weights)[0]
+        yield (
+            _text(rng, 2, 4).capitalize(),
+            _text(rng, 0, 15),
+            due,
+            status,
+            impact, tractability, uncertainty,
+            todo_core.calculate_score(impact, tractability, uncertainty),
+            created.strftime("%Y-%m-%d %H:%M:%S"),
+            updated.strftime("%Y-%m-%d %H:%M:%S"),
+            updated.strftime("%Y-%m-%d %H:%M:%S") if status == "Completed" else None,
+        )
+
+def generate_dataset(path, n_tasks, seed=42, chunk_size=50_000):
+    """Create a todo database at path holding n_tasks synthetic tasks."""
+    if os.path.exists(path):
+        os.unlink(path)
+    todo_core.configure_database(path)
+    todo_core.init_database()
+    rows = _synthetic_rows(n_tasks, seed)
+    with todo_core.transaction() as conn:
+        # Same fast path as import_tasks: pause the FTS trigger and index in bulk afterwards
+        conn.execute("INSERT INTO app_meta (key, value) VALUES ('fts_sync_paused', '1')")
+        while True:
+            chunk = [row for _, row in zip(range(chunk_size), rows)]
+            if not chunk:
+                break
+            conn.executemany('''
+                INSERT INTO tasks (topic, description, due, status, impact, tractability, uncertainty,
+                                   score, created_at, updated_at, completed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', chunk)
+        conn.execute("DELETE FROM app_meta WHERE key = 'fts_sync_paused'")
+        conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+    with todo_core.transaction() as conn:
+        conn.execute("ANALYZE")
+    todo_core.close_database()
+
+def dataset_path(n_tasks, data_dir=DATA_DIR):
+    """Return the cached dataset for n_tasks, generating it on first use."""
+    path = Path(data_dir) / f"tasks_{n_tasks}_v{DATASET_VERSION}.db"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"Generating {n_tasks:,} synthetic tasks -> {path}")
+        generate_dataset(str(path) + ".tmp", n_tasks)
+        os.replace(str(path) + ".tmp", path)
+    return path
+
+def _cold(func):
+    # Time the readers themselves, not the query cache in front of them
+    def call(*args, **kwargs):
+        todo_core.clear_query_cache()
+        return func(*args, **kwargs)
+    return call
+
+def time_call(func, repeat):
+    """Call func repeat times and return timing statistics in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "repeat": repeat,
+    }
+
+def time_throughput(operation, count):
+    """Run operation(i) for i in range(count) and return operations per second."""
+    start = time.perf_counter()
+    for i in range(count):
+        operation(i)
+    elapsed = time.perf_counter() - start
+    return {"ops": count, "seconds": round(elapsed, 4), "ops_per_sec": round(count / elapsed, 1)}
+
+def read_benchmarks(repeat):
+    """Time the read paths against the currently configured database."""
+    get_all_tasks = _cold(todo_core.get_all_tasks)
+    get_tasks_page = _cold(todo_core.get_tasks_page)
+    get_task_records = _cold(todo_core.get_task_records)
+    get_task_records_page = _cold(todo_core.get_task_records_page)
+    search_tasks = _cold(todo_core.search_tasks)
+    search_task_records = _cold(todo_core.search_task_records)
+    count_tasks = _cold(todo_core.count_tasks)
+    get_completed_tasks_in_range = _cold(todo_core.get_completed_tasks_in_range)
+    task_summary = _cold(todo_core.task_summary)
+    completion_summary = _cold(todo_core.completion_summary)
+    open_statuses = ["Pending", "In Progress", "On Hold"]
+
+    # Cursor of a page deep into the list, to show keyset pages cost the same everywhere
+    deep_key = None
+    with todo_core.read_transaction() as conn:
+        row = conn.execute(
+            "SELECT score, due, id FROM tasks ORDER BY score DESC, due ASC, id ASC LIMIT 1 OFFSET "
+            "(SELECT COUNT(*) * 9 / 10 FROM tasks)"
+        ).fetchone()
+        # Rating columns for the batch scoring benchmark
+        ratings = pd.read_sql_query("SELECT impact, tractability, uncertainty FROM tasks", conn)
+    if row is not None:
+        deep_key = (row[0], row[1], row[2])
+
+    return {
+        "get_all_tasks": time_call(lambda: get_all_tasks(), repeat),
+        "get_all_tasks_open_statuses": time_call(lambda: get_all_tasks(statuses=open_statuses), repeat),
+        "get_tasks_page_first": time_call(lambda: get_tasks_page(open_statuses, 25), repeat),
+        "get_tasks_page_deep": time_call(lambda: get_tasks_page(None, 25, after=deep_key), repeat),
+        "get_task_records": time_call(lambda: get_task_records(), repeat),
+        "get_task_records_page_first": time_call(lambda: get_task_records_page(open_statuses, 25), repeat),
+        "get_all_tasks_weighted_sum": time_call(lambda: get_all_tasks(strategy="weighted_sum"), repeat),
+        "get_tasks_page_due_urgency": time_call(lambda: get_tasks_page(open_statuses, 25, strategy="due_urgency"), repeat),
+        "count_tasks": time_call(lambda: count_tasks(statuses=open_statuses), repeat),
+        "search_tasks_all": time_call(lambda: search_tasks("report"), repeat),
+        "search_task_records_all": time_call(lambda: search_task_records("report"), repeat),
+        "search_tasks_prefix_topic": time_call(lambda: search_tasks("dep", "topic"), repeat),
+        "search_tasks_status": time_call(lambda: search_tasks("Hold", "status"), repeat),
+        "get_completed_tasks_in_range_7d": time_call(lambda: get_completed_tasks_in_range(7), repeat),
+        "task_summary_open_statuses": time_call(lambda: task_summary(statuses=open_statuses), repeat),
+        "completion_summary_31d": time_call(lambda: completion_summary(31), repeat),
+        "calculate_scores_all_rows": time_call(
+            lambda: todo_core.calculate_scores(ratings["impact"], ratings["tractability"], ratings["uncertainty"]),
+            repeat),
+        "get_all_tasks_cached": time_call(lambda: todo_core.get_all_tasks(statuses=open_statuses), repeat),
+    }
+
+def write_benchmarks(crud_ops):
+    """Time the expiry sweep and CRUD throughput; these modify the configured database."""
+    results = {}
+    start = time.perf_counter()
+    expired = todo_core.check_and_update_expired_tasks()
+    results["check_and_update_expired_tasks_first"] = {
+        "ms": round((time.perf_counter() - start) * 1000, 3), "expired": expired
+    }
+    start = time.perf_counter()
+    todo_core.check_and_update_expired_tasks()
+    results["check_and_update_expired_tasks_repeat"] = {"ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    # What a formula change costs: every row rewritten by one set-based UPDATE
+    start = time.perf_counter()
+    with todo_core.transaction() as conn:
+        rescored = conn.execute(f"UPDATE tasks SET score = {todo_core.SCORE_SQL}").rowcount
+    results["rescore_all_tasks"] = {"ms": round((time.perf_counter() - start) * 1000, 3), "rows": rescored}
+
+    with todo_core.read_transaction() as conn:
+        first_new_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+    results["add_task"] = time_throughput(
+        lambda i: todo_core.add_task(f"Bench task {i}", "benchmark", "2030-01-01", "Pending", 5, 5, 5), crud_ops)
+    results["get_task_by_id"] = time_throughput(lambda i: todo_core.get_task_by_id(first_new_id + i), crud_ops)
+    results["update_task"] = time_throughput(
+        lambda i: todo_core.update_task(first_new_id + i, f"Bench task {i}", "updated", "2030-01-02",
+                                       "In Progress", 6, 5, 4), crud_ops)
+    # A session editing through its task cache: one full load, then every edit patched in place
+    cache = todo_core.TaskCache()
+    start = time.perf_counter()
+    cache.count()
+    results["task_cache_load"] = {"ms": round((time.perf_counter() - start) * 1000, 3)}
+    results["task_cache_update_task"] = time_throughput(
+        lambda i: cache.update_task(first_new_id + i, f"Bench task {i}", "cached", "2030-01-03",
+                                    "Pending", 7, 5, 4), crud_ops)
+    results["task_cache_update_task"]["reloads"] = cache.stats["reloads"]
+    results["delete_task"] = time_throughput(lambda i: todo_core.delete_task(first_new_id + i), crud_ops)
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _environment(**settings):
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        **settings,
+    }
+
+def _load_into_memory(source):
+    """Point the shared connection at a new in-memory database holding a copy of source."""
+    todo_core.configure_database(":memory:")
+    # Opening the shared connection (here for its change token) creates the empty in-memory
+    # database. VACUUM INTO copies into it as a rollback-journal database; a page-by-page
+    # backup would carry over the WAL flag of the file, which the memdb VFS cannot open
+    todo_core.database_change_token()
+    disk = sqlite3.connect(f"{Path(source).resolve().as_uri()}?mode=ro", uri=True)
+    disk.execute("VACUUM INTO ?", (todo_core.database_config()["path"],))
+    disk.close()
+
+def run(sizes, output, repeat, crud_ops, data_dir, in_memory=False):
+    """Benchmark every dataset size and write the results to output."""
+    report = {"meta": _environment(repeat=repeat, crud_ops=crud_ops, in_memory=in_memory), "results": {}}
+    for n_tasks in sizes:
+        source = dataset_path(n_tasks, data_dir)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Work on a copy so the write benchmarks never change the cached dataset
+            if in_memory:
+                _load_into_memory(source)
+            else:
+                db_path = os.path.join(tmp, "todo.db")
+                shutil.copy2(source, db_path)
+                todo_core.configure_database(db_path)
+            todo_core.init_database()
+            print(f"Benchmarking {n_tasks:,} tasks" + (" in memory..." if in_memory else "..."))
+            results = read_benchmarks(repeat)
+            results.update(write_benchmarks(crud_ops))
+            # Also frees an in-memory copy
+            todo_core.configure_database(todo_core.DB_PATH)
+        report["results"][str(n_tasks)] = results
+        for name, stats in results.items():
+            value = stats.get("median_ms", stats.get("ms"))
+            print(f"  {name:40} " + (f"{value:10.2f} ms" if value is not None else f"{stats['ops_per_sec']:10.1f} ops/s"))
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return report
+
+def _latency_summary(samples, elapsed):
+    samples = sorted(samples)
+    if not samples:
+        return {"ops": 0}
+    def percentile(p):
+        return round(samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1000, 3)
+    return {
+        "ops": len(samples),
+        "ops_per_sec": round(len(samples) / elapsed, 1),
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+def stress(db_path, writers=8, readers=8, duration=5.0, external_writer=True, external_hold=0.01):
+    """Hammer db_path with concurrent writers and readers and report throughput and lock waits.
+    
+    Writer threads alternate add_task and update_task, reader threads call get_all_tasks,
+    all through the shared connection the app uses. With external_writer, one more thread
+    writes through its own sqlite3 connection, like a second server process would, so the
+    run also exercises SQLite-level locking, the busy timeout and the retry path. It holds
+    its write lock for external_hold seconds per write; reads started meanwhile, while the
+    in-process writers wait for that lock, are reported as get_all_tasks_during_lock_wait.
+    """
+    todo_core.configure_database(db_path)
+    todo_core.init_database()
+    stats_before = todo_core.database_stats()
+    latencies = {"add_task": [], "update_task": [], "get_all_tasks": [],
+                 "get_all_tasks_during_lock_wait": [], "external_write": []}
+    errors = []
+    external_lock_held = threading.Event()
+    deadline = time.perf_counter() + duration
+
+    def writer(number):
+        rng = random.Random(number)
+        added = []
+        i = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                if added and i % 2:
+                    todo_core.update_task(rng.choice(added), f"Stress {number}-{i}", "updated", None,
+                                         rng.choice(todo_core.TASK_STATUSES), 5, 5, 5)
+                    kind = "update_task"
+                else:
+                    added.append(todo_core.add_task(f"Stress {number}-{i}", "stress", None, "Pending", 5, 5, 5))
+                    kind = "add_task"
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+            i += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            during_wait = writers > 0 and external_lock_held.is_set()
+            start = time.perf_counter()
+            try:
+                todo_core.get_all_tasks(statuses=["Pending", "In Progress", "On Hold"])
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            kind = "get_all_tasks_during_lock_wait" if during_wait else "get_all_tasks"
+            latencies[kind].append(time.perf_counter() - start)
+
+    def other_process_writer():
+        conn = sqlite3.connect(db_path, timeout=5.0, isolation_level=None)
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    conn.execute("BEGIN IMMEDIATE")
+                    external_lock_held.set()
+                    conn.execute("INSERT INTO tasks (topic, status) VALUES ('External', 'Pending')")
+                    time.sleep(external_hold)
+                    external_lock_held.clear()
+                    conn.execute("COMMIT")
+                except sqlite3.Error as e:
+                    external_lock_held.clear()
+                    errors.append(repr(e))
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    continue
+                latencies["external_write"].append(time.perf_counter() - start)
+                time.sleep(0.02)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    if external_writer:
+        threads.append(threading.Thread(target=other_process_writer))
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats_after = todo_core.database_stats()
+    acquisitions = stats_after["lock_acquisitions"] - stats_before["lock_acquisitions"]
+    lock_wait = stats_after["lock_wait_seconds"] - stats_before["lock_wait_seconds"]
+    todo_core.close_database()
+    return {
+        "writers": writers,
+        "readers": readers,
+        "external_writer": external_writer,
+        "seconds": round(elapsed, 3),
+        "operations": {kind: _latency_summary(samples, elapsed) for kind, samples in latencies.items()},
+        "connection_lock": {
+            "acquisitions": acquisitions,
+            "total_wait_ms": round(lock_wait * 1000, 3),
+            "mean_wait_ms": round(lock_wait * 1000 / max(acquisitions, 1), 4),
+            "max_wait_ms": round(stats_after["max_lock_wait_seconds"] * 1000, 3),
+        },
+        "busy_wait_ms": round((stats_after["busy_wait_seconds"] - stats_before["busy_wait_seconds"]) * 1000, 3),
+        "write_retries": stats_after["write_retries"] - stats_before["write_retries"],
+        "errors": errors,
+    }
+
+def run_stress(size, output, writers, readers, duration, data_dir):
+    """Run the stress test on a scratch copy of the size-task dataset and write JSON."""
+    source = dataset_path(size, data_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "todo.db")
+        shutil.copy2(source, db_path)
+        print(f"Stress testing {writers} writers / {readers} readers on {size:,} tasks for {duration}s...")
+        result = stress(db_path, writers, readers, duration)
+    report = {"meta": _environment(size=size), "stress": result}
+    for kind, summary in result["operations"].items():
+        if summary["ops"]:
+            print(f"  {kind:30} {summary['ops_per_sec']:10.1f} ops/s   p50 {summary['p50_ms']:8.2f} ms"
+                  f"   p99 {summary['p99_ms']:8.2f} ms   max {summary['max_ms']:8.2f} ms")
+    lock = result["connection_lock"]
+    print(f"  lock waits: mean {lock['mean_wait_ms']:.3f} ms, max {lock['max_wait_ms']:.2f} ms; "
+          f"busy waits: {result['busy_wait_ms']:.1f} ms; write retries: {result['write_retries']}; "
+          f"errors: {len(result['errors'])}")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return report
+
+def _async_workloads(max_id, operations, seed=7):
+    """Return {name: [(function, args), ...]} with the same calls for every mode of async_benchmarks."""
+    rng = random.Random(seed)
+    open_statuses = ["Pending", "In Progress", "On Hold"]
+    return {
+        "get_task_by_id": [(todo_core.get_task_by_id, (rng.randint(1, max_id),)) for _ in range(operations)],
+        "get_tasks_page": [(todo_core.get_tasks_page, (open_statuses, 25)) for _ in range(operations)],
+        "search_tasks": [(todo_core.search_tasks, (rng.choice(WORDS),)) for _ in range(operations)],
+        "get_completed_tasks_in_range_7d": [(todo_core.get_completed_tasks_in_range, (7,)) for _ in range(operations)],
+        "add_task": [(todo_core.add_task, (f"Async bench {i}", "benchmark", None, "Pending", 5, 5, 5))
+                     for i in range(operations)],
+    }
+
+async def _run_bounded(calls, run_call, concurrency):
+    """Await run_call(func, args) for every call, at most concurrency at a time.
+    
+    Returns (seconds, max_stall_seconds), the second being the longest the event loop
+    was kept from resuming a 1 ms sleeper meanwhile.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    done = asyncio.Event()
+
+    async def bounded(func, args):
+        async with semaphore:
+            await run_call(func, args)
+
+    async def heartbeat():
+        worst = 0.0
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            worst = max(worst, time.perf_counter() - start - 0.001)
+        return worst
+
+    monitor = asyncio.create_task(heartbeat())
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(func, args) for func, args in calls))
+    elapsed = time.perf_counter() - start
+    done.set()
+    return elapsed, await monitor
+
+def async_benchmarks(db_path, workers=4, concurrency=32, operations=400):
+    """Compare the throughput of AsyncTaskStore with the synchronous data functions.
+    
+    Every workload makes the same calls three ways: one after another on the shared
+    connection ("sync"), through asyncio.to_thread on the shared connection
+    ("to_thread"), and through an AsyncTaskStore with one connection per worker
+    ("async_store"). concurrency bounds the calls in flight. max_stall_ms is how long
+    an event loop stalls: for sync, the slowest call made directly on the loop. The
+    synchronous readers run cold, since the store's workers bypass the query cache.
+    """
+    todo_core.configure_database(db_path)
+    todo_core.init_database()
+    with todo_core.read_transaction() as conn:
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 1) FROM tasks").fetchone()[0]
+    workloads = _async_workloads(max_id, operations)
+
+    async def through_threads(calls):
+        return await _run_bounded(calls, lambda func, args: asyncio.to_thread(_cold(func), *args), concurrency)
+
+    async def through_store(calls):
+        async with todo_async.AsyncTaskStore(workers=workers, path=db_path) as store:
+            return await _run_bounded(calls, lambda func, args: store.call(func, *args), concurrency)
+
+    def summary(calls, seconds, stall):
+        return {"ops": len(calls), "seconds": round(seconds, 4), "ops_per_sec": round(len(calls) / seconds, 1),
+                "max_stall_ms": round(stall * 1000, 3)}
+
+    results = {}
+    for name, calls in workloads.items():
+        slowest = 0.0
+        start = time.perf_counter()
+        for func, args in calls:
+            call_start = time.perf_counter()
+            _cold(func)(*args)
+            slowest = max(slowest, time.perf_counter() - call_start)
+        sync_seconds = time.perf_counter() - start
+
+        store_seconds, store_stall = asyncio.run(through_store(calls))
+        results[name] = {
+            "sync": summary(calls, sync_seconds, slowest),
+            "to_thread": summary(calls, *asyncio.run(through_threads(calls))),
+            "async_store": summary(calls, store_seconds, store_stall),
+            "speedup": round(sync_seconds / store_seconds, 2),
+        }
+    todo_core.close_database()
+    return results
+
+def run_async(size, output, workers, concurrency, operations, data_dir):
+    """Run the async benchmarks on a scratch copy of the size-task dataset and write JSON."""
+    source = dataset_path(size, data_dir)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "todo.db")
+        shutil.copy2(source, db_path)
+        print(f"Async benchmarks: {workers} workers, {concurrency} calls in flight, {size:,} tasks...")
+        results = async_benchmarks(db_path, workers, concurrency, operations)
+    report = {"meta": _environment(size=size, workers=workers, concurrency=concurrency, operations=operations),
+              "async": results}
+    print(f"  {'':32} {'sync':>24} {'to_thread':>24} {'async_store':>24}   (ops/s, max loop stall)")
+    for name, modes in results.items():
+        print(f"  {name:32} " + " ".join(f"{modes[mode]['ops_per_sec']:10.1f} /{modes[mode]['max_stall_ms']:9.2f} ms"
+                                         for mode in ("sync", "to_thread", "async_store"))
+              + f"   x{modes['speedup']:.2f}")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return report
+
+def compare(baseline_file, candidate_file):
+    """Print candidate/baseline ratios for every benchmark the two reports share."""
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+    with open(candidate_file) as f:
+        candidate = json.load(f)
+    print(f"baseline {baseline['meta'].get('commit')}  vs  candidate {candidate['meta'].get('commit')}")
+    print("(time ratio > 1 is slower, throughput ratio < 1 is slower)")
+    for size, results in candidate["results"].items():
+        if size not in baseline["results"]:
+            continue
+        print(f"\n{int(size):,} tasks")
+        for name, stats in results.items():
+            old = baseline["results"][size].get(name)
+            if old is None:
+                continue
+            for field in ("median_ms", "ms", "ops_per_sec"):
+                if field in stats and field in old and old[field]:
+                    print(f"  {name:40} {old[field]:12.2f} -> {stats[field]:12.2f} {field:12} x{stats[field] / old[field]:.2f}")
+                    break
+
+def main():
+    """Main benchmark runner function"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="generate datasets and run the benchmarks")
+    run_parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per read benchmark")
+    run_parser.add_argument("--crud-ops", type=int, default=200, help="operations per CRUD throughput benchmark")
+    run_parser.add_argument("--data-dir", default=DATA_DIR, help="where generated datasets are cached")
+    run_parser.add_argument("--in-memory", action="store_true",
+                            help="benchmark an in-memory copy of each dataset instead of a file")
+
+    stress_parser = commands.add_parser("stress", help="concurrent writers and readers on one database")
+    stress_parser.add_argument("--size", type=int, default=10_000, help="tasks in the starting dataset")
+    stress_parser.add_argument("--writers", type=int, default=8)
+    stress_parser.add_argument("--readers", type=int, default=8)
+    stress_parser.add_argument("--duration", type=float, default=5.0, help="seconds")
+    stress_parser.add_argument("--output", default="bench_results_stress.json")
+    stress_parser.add_argument("--data-dir", default=DATA_DIR, help="where generated datasets are cached")
+
+    async_parser = commands.add_parser("async", help="async facade throughput vs the synchronous functions")
+    async_parser.add_argument("--size", type=int, default=10_000, help="tasks in the starting dataset")
+    async_parser.add_argument("--workers", type=int, default=todo_async.DEFAULT_WORKERS)
+    async_parser.add_argument("--concurrency", type=int, default=32, help="calls in flight at once")
+    async_parser.add_argument("--ops", type=int, default=400, help="calls per workload")
+    async_parser.add_argument("--output", default="bench_results_async.json")
+    async_parser.add_argument("--data-dir", default=DATA_DIR, help="where generated datasets are cached")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args.sizes, args.output, args.repeat, args.crud_ops, args.data_dir, args.in_memory)
+    elif args.command == "stress":
+        run_stress(args.size, args.output, args.writers, args.readers, args.duration, args.data_dir)
+    elif args.command == "async":
+        run_async(args.size, args.output, args.workers, args.concurrency, args.ops, args.data_dir)
+    else:
+        compare(args.baseline, args.candidate)
+
+if __name__ == "__main__":
+    main()
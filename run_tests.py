@@ -84,7 +84,7 @@ def main():
             
     elif command == "coverage":
         print("Running tests with coverage...")
-        success = run_command("pytest tests/ --cov=todo_app --cov-report=html --cov-report=term", "Tests with coverage")
+        success = run_command("pytest tests/ --cov=todo_app --cov=todo_core --cov-report=html --cov-report=term", "Tests with coverage")
         if success:
             print("\n✅ All tests passed with coverage!")
             print("📊 Coverage report generated in htmlcov/")
@@ -1,46 +1,29 @@
 import pytest
 import sqlite3
-import tempfile
 import os
 import sys
 from pathlib import Path
 
-# Add the parent directory to the path so we can import todo_app
+# Add the parent directory to the path so we can import todo_core
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+# Never touch the real todo.db: code not pointed at a test database gets an in-memory one
+os.environ["TODO_DB_PATH"] = ":memory:"
+
 @pytest.fixture
-def temp_db():
-    """Create a temporary database for testing"""
-    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
-        db_path = f.name
-    
-    # Store original database path
-    original_db = 'todo.db'
-    original_db_exists = os.path.exists(original_db)
-    
-    if original_db_exists:
-        # Backup original database
-        backup_path = original_db + '.backup'
-        os.rename(original_db, backup_path)
-    
-    # Create a temporary database file
-    with open(db_path, 'w') as f:
-        pass
-    
-    yield db_path
-    
-    # Cleanup
-    try:
-        os.unlink(db_path)
-    except FileNotFoundError:
-        pass
+def temp_db(tmp_path):
+    """Path of a temporary database file for testing (the real todo.db is never touched)"""
+    return str(tmp_path / "test.db")
+
+@pytest.fixture
+def file_db(temp_db):
+    """Point the app at the temporary database file"""
+    import todo_core
     
-    if original_db_exists:
-        # Restore original database
-        try:
-            os.rename(backup_path, original_db)
-        except FileNotFoundError:
-            pass
+    todo_core.configure_database(temp_db)
+    yield temp_db
+    # Point the app back at its default database and pragmas
+    todo_core.configure_database(todo_core.DB_PATH, todo_core.DEFAULT_PRAGMAS)
 
 @pytest.fixture
 def sample_task_data():
@@ -86,4 +69,22 @@ def sample_tasks():
             'tractability': 7,
             'uncertainty': 3
         }
-    ] 
\ No newline at end of file
+    ] 
+
+@pytest.fixture
+def app_db():
+    """Point the app at a fresh in-memory database and initialize it; yields its URI
+    
+    Other connections can open the same database with sqlite3.connect(app_db, uri=True).
+    """
+    import uuid
+    import todo_core
+    
+    uri = f"file:/test-{uuid.uuid4().hex}?vfs=memdb"
+    todo_core.configure_database(uri)
+    todo_core.init_database()
+    
+    yield uri
+    
+    # Discards the in-memory database
+    todo_core.configure_database(todo_core.DB_PATH, todo_core.DEFAULT_PRAGMAS)
@@ -0,0 +1,169 @@
+import pytest
+import http.client
+import json
+import threading
+
+import todo_core
+import todo_api
+
+class TestTaskAPI:
+    """Tests for the HTTP/JSON API, over a real server on a free port"""
+
+    @pytest.fixture
+    def client(self, file_db):
+        server = todo_api.make_server(port=0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        # One keep-alive connection for every request of a test
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        yield conn
+        conn.close()
+        server.shutdown()
+        server.server_close()
+
+    def _request(self, conn, method, path, body=None, headers=None):
+        data = None if body is None else json.dumps(body)
+        conn.request(method, path, body=data, headers=headers or {})
+        response = conn.getresponse()
+        raw = response.read()
+        return response, (json.loads(raw) if raw else None)
+
+    def _task(self, **fields):
+        return {"topic": "API task", "description": "", "due": None, "status": "Pending",
+                "impact": 5, "tractability": 5, "uncertainty": 5, **fields}
+
+    def test_crud_round_trip(self, client):
+        """Test creating, reading, partially updating and deleting a task"""
+        response, body = self._request(client, "POST", "/tasks", self._task(impact=9, tractability=8, uncertainty=2))
+        assert response.status == 201
+        task_id = body["id"]
+
+        response, task = self._request(client, "GET", f"/tasks/{task_id}")
+        assert response.status == 200
+        assert task["topic"] == "API task" and task["score"] == 36.0
+
+        response, task = self._request(client, "PUT", f"/tasks/{task_id}", {"status": "Completed"})
+        assert response.status == 200
+        assert task["status"] == "Completed" and task["impact"] == 9 and task["completed_at"] is not None
+
+        response, _ = self._request(client, "DELETE", f"/tasks/{task_id}")
+        assert response.status == 204
+        response, body = self._request(client, "GET", f"/tasks/{task_id}")
+        assert response.status == 404 and "not found" in body["error"]
+
+    def test_invalid_requests(self, client):
+        """Test that bad input is rejected with a JSON error"""
+        response, body = self._request(client, "POST", "/tasks", self._task(impact=11))
+        assert response.status == 422 and "impact" in body["error"]
+        response, _ = self._request(client, "GET", "/tasks?status=Done")
+        assert response.status == 400
+        response, _ = self._request(client, "GET", "/nowhere")
+        assert response.status == 404
+        response, _ = self._request(client, "DELETE", "/tasks")
+        assert response.status == 405
+
+    def test_list_is_streamed_in_order(self, client):
+        """Test that the full list is streamed in chunks and matches get_all_tasks"""
+        todo_core.import_tasks(
+            [f'{{"topic": "Task {i}", "impact": {i % 10 + 1}}}\n' for i in range(2500)], "jsonl"
+        )
+
+        client.request("GET", "/tasks?status=Pending")
+        response = client.getresponse()
+        assert response.getheader("Transfer-Encoding") == "chunked"
+        tasks = json.loads(response.read())
+
+        assert [t["id"] for t in tasks] == todo_core.get_all_tasks(statuses=["Pending"])["id"].tolist()
+
+    def test_pages_with_cursor(self, client):
+        """Test that limit/after pages cover the list once"""
+        for i in range(7):
+            self._request(client, "POST", "/tasks", self._task(topic=f"Task {i}", impact=i + 1))
+
+        seen, path = [], "/tasks?limit=3"
+        while path:
+            _, body = self._request(client, "GET", path)
+            seen += [t["topic"] for t in body["tasks"]]
+            path = body["next"] and "/tasks?limit=3&after=" + json.dumps(body["next"]).replace(" ", "")
+        assert seen == [f"Task {i}" for i in range(6, -1, -1)]
+
+    def test_etag_not_modified_until_write(self, client):
+        """Test that If-None-Match returns 304 until the data changes"""
+        self._request(client, "POST", "/tasks", self._task())
+        response, _ = self._request(client, "GET", "/tasks")
+        etag = response.getheader("ETag")
+        assert etag
+
+        response, body = self._request(client, "GET", "/tasks", headers={"If-None-Match": etag})
+        assert response.status == 304 and body is None
+
+        self._request(client, "POST", "/tasks", self._task(topic="Another"))
+        response, body = self._request(client, "GET", "/tasks", headers={"If-None-Match": etag})
+        assert response.status == 200 and len(body) == 2
+
+    def test_etag_never_hides_not_found(self, client):
+        """Test that a matching If-None-Match still gets 404 for a missing task or path"""
+        _, task = self._request(client, "POST", "/tasks", self._task())
+        self._request(client, "DELETE", f"/tasks/{task['id']}")
+        response, _ = self._request(client, "GET", "/tasks")
+        etag = response.getheader("ETag")
+
+        for path in (f"/tasks/{task['id']}", "/nowhere"):
+            response, body = self._request(client, "GET", path, headers={"If-None-Match": etag})
+            assert response.status == 404 and "error" in body
+
+    def test_search_completed_and_summary(self, client):
+        """Test the read-only endpoints"""
+        self._request(client, "POST", "/tasks", self._task(topic="Write report", status="Completed"))
+        self._request(client, "POST", "/tasks", self._task(topic="Plan offsite"))
+
+        _, results = self._request(client, "GET", "/search?q=rep&by=topic")
+        assert [t["topic"] for t in results] == ["Write report"]
+        _, completed = self._request(client, "GET", "/completed?days=7")
+        assert [t["topic"] for t in completed] == ["Write report"]
+        _, summary = self._request(client, "GET", "/summary?status=Pending,Completed")
+        assert summary["total"] == 2 and summary["completed"] == 1
+
+    def test_atomic_batch(self, client):
+        """Test that a batch runs in one transaction and rolls back entirely on failure"""
+        operations = [{"method": "POST", "path": "/tasks", "body": self._task(topic=f"Batch {i}")} for i in range(50)]
+        response, body = self._request(client, "POST", "/batch", {"operations": operations + [
+            {"method": "GET", "path": "/summary"},
+        ]})
+        assert response.status == 200
+        assert [r["status"] for r in body["results"]] == [201] * 50 + [200]
+        assert body["results"][-1]["body"]["total"] == 50
+
+        response, body = self._request(client, "POST", "/batch", {"operations": [
+            {"method": "POST", "path": "/tasks", "body": self._task(topic="Rolled back")},
+            {"method": "DELETE", "path": "/tasks/99999"},
+        ]})
+        assert response.status == 409 and body["failed_operation"] == 1
+        assert todo_core.count_tasks() == 50
+
+    def test_non_atomic_batch_reports_each_result(self, client):
+        """Test that without atomic each operation succeeds or fails on its own"""
+        response, body = self._request(client, "POST", "/batch", {"atomic": False, "operations": [
+            {"method": "POST", "path": "/tasks", "body": self._task()},
+            {"method": "POST", "path": "/tasks", "body": {"topic": ""}},
+            {"method": "GET", "path": "/tasks?limit=5"},
+        ]})
+        assert response.status == 200
+        assert [r["status"] for r in body["results"]] == [201, 422, 200]
+        assert len(body["results"][2]["body"]["tasks"]) == 1
+
+    def test_non_atomic_batch_reports_unexpected_errors(self, client, monkeypatch):
+        """Test that an unexpected error fails only its own operation of a non-atomic batch"""
+        def broken_delete(task_id):
+            raise RuntimeError("disk on fire")
+        monkeypatch.setattr(todo_core, "delete_task", broken_delete)
+
+        response, body = self._request(client, "POST", "/batch", {"atomic": False, "operations": [
+            {"method": "POST", "path": "/tasks", "body": self._task(topic="First")},
+            {"method": "DELETE", "path": "/tasks/1"},
+            {"method": "POST", "path": "/tasks", "body": self._task(topic="Third")},
+        ]})
+        assert response.status == 200
+        assert [r["status"] for r in body["results"]] == [201, 500, 201]
+        assert body["results"][1]["body"] == {"error": "internal error"}
+        assert todo_core.count_tasks() == 2
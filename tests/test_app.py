@@ -0,0 +1,46 @@
+import pytest
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+from todo_core import add_task, get_task_by_id
+
+APP_FILE = str(Path(__file__).resolve().parent.parent / "todo_app.py")
+
+class TestLazyEditForms:
+    """Tests for building the View Tasks edit forms only when a task is opened for editing"""
+
+    @pytest.fixture
+    def app(self, app_db):
+        ids = [add_task(f"Task {i}", "", None, "Pending", i + 1, 5, 5) for i in range(3)]
+        at = AppTest.from_file(APP_FILE, default_timeout=30)
+        at.run()
+        assert not at.exception
+        return at, ids
+
+    def _edit_topics(self, at):
+        return sorted(widget.key for widget in at.text_input if widget.key.startswith("edit_topic_"))
+
+    def test_collapsed_tasks_build_no_edit_widgets(self, app):
+        """Test that by default each task gets an Edit toggle and no form widgets"""
+        at, ids = app
+        assert self._edit_topics(at) == []
+        assert sorted(toggle.key for toggle in at.toggle) == sorted(f"edit_open_{task_id}" for task_id in ids)
+
+    def test_edit_toggle_builds_one_form(self, app):
+        """Test that switching a task's toggle on builds its form only, and the form saves"""
+        at, ids = app
+        at.toggle(key=f"edit_open_{ids[0]}").set_value(True).run()
+        assert self._edit_topics(at) == [f"edit_topic_{ids[0]}"]
+
+        at.text_input(key=f"edit_topic_{ids[0]}").input("Renamed")
+        next(button for button in at.button if button.label == "Update Task").click().run()
+        assert not at.exception
+        assert get_task_by_id(ids[0]).topic == "Renamed"
+
+    def test_eager_mode_builds_every_form(self, app):
+        """Test that turning the sidebar option off builds every task's form without toggles"""
+        at, ids = app
+        at.checkbox(key="lazy_edit_forms").uncheck().run()
+        assert self._edit_topics(at) == sorted(f"edit_topic_{task_id}" for task_id in ids)
+        assert len(at.toggle) == 0
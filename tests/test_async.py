@@ -0,0 +1,142 @@
+import pytest
+import asyncio
+import sqlite3
+import threading
+import time
+
+import todo_core
+import todo_async
+
+# Never finishes on its own; only interrupting the connection stops it
+ENDLESS_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT COUNT(*) FROM c"
+
+def _endless_query():
+    with todo_core._current_db().connection() as conn:
+        return conn.execute(ENDLESS_QUERY).fetchone()
+
+class TestAsyncTaskStore:
+    """Tests for the asyncio facade and its worker connections"""
+
+    def _run(self, file_db, scenario, workers=2):
+        async def main():
+            async with todo_async.AsyncTaskStore(workers=workers, path=file_db) as store:
+                return await scenario(store)
+        return asyncio.run(main())
+
+    def test_crud_and_readers(self, file_db):
+        """Test the single operations against the synchronous functions' results"""
+        async def scenario(store):
+            task_id = await store.add_task("Write report", "quarterly", None, "Pending", 9, 8, 2)
+            await store.add_task("Plan offsite", "", None, "Completed", 5, 5, 5)
+            assert await store.update_task(task_id, "Write report", "annual", None, "In Progress", 9, 8, 2)
+            task = await store.get_task(task_id)
+            assert task[2] == "annual" and task[8] == 36.0
+
+            tasks = await store.get_all_tasks(statuses=["In Progress", "Completed"])
+            assert tasks["topic"].tolist() == ["Write report", "Plan offsite"]
+            assert (await store.search_tasks("rep"))["id"].tolist() == [task_id]
+            assert len(await store.get_completed_tasks_in_range(1)) == 1
+            assert (await store.task_summary())["total"] == 2
+
+            assert await store.delete_task(task_id)
+            assert await store.get_task(task_id) is None
+        self._run(file_db, scenario)
+
+    def test_each_worker_has_its_own_connection(self, file_db):
+        """Test that calls run on pool threads, off the shared connection"""
+        async def scenario(store):
+            async def worker_connection():
+                await asyncio.sleep(0)
+                return await store.call(lambda: (threading.get_ident(), id(todo_core._current_db())))
+            return await asyncio.gather(*(worker_connection() for _ in range(20)))
+        seen = self._run(file_db, scenario, workers=3)
+
+        assert all(thread != threading.get_ident() for thread, _ in seen)
+        assert all(manager != id(todo_core._db) for _, manager in seen)
+        assert len({manager for _, manager in seen}) <= 3
+
+    def test_batches(self, file_db):
+        """Test the batch methods with mapping and positional arguments"""
+        async def scenario(store):
+            ids = await store.add_tasks(
+                [{"topic": f"Task {i}", "description": "", "due": None, "status": "Pending",
+                  "impact": 5, "tractability": 5, "uncertainty": 5} for i in range(3)]
+                + [("Positional", "", None, "Pending", 1, 1, 1)]
+            )
+            assert len(ids) == 4
+            assert await store.update_tasks([(ids[0], "Renamed", "", None, "Pending", 5, 5, 5),
+                                             (99999, "Missing", "", None, "Pending", 5, 5, 5)]) == [True, False]
+            rows = await store.get_tasks([ids[0], 99999, ids[3]])
+            assert rows[0][1] == "Renamed" and rows[1] is None and rows[2][1] == "Positional"
+            assert await store.delete_tasks(ids[:2] + [99999]) == 2
+        self._run(file_db, scenario)
+        assert todo_core.count_tasks() == 2
+
+    def test_failed_batch_rolls_back(self, file_db):
+        """Test that a batch write commits all of its items or none"""
+        async def scenario(store):
+            with pytest.raises(sqlite3.IntegrityError):
+                await store.add_tasks([("Kept?", "", None, "Pending", 5, 5, 5), (None, "", None, "Pending", 5, 5, 5)])
+        self._run(file_db, scenario)
+        assert todo_core.count_tasks() == 0
+
+    def test_cancel_interrupts_running_query(self, file_db):
+        """Test that cancelling a running call aborts its statement and frees the worker"""
+        async def scenario(store):
+            endless = asyncio.create_task(store.call(_endless_query))
+            await asyncio.sleep(0.2)
+            endless.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await endless
+            start = time.perf_counter()
+            await asyncio.wait_for(store.add_task("After", "", None, "Pending", 5, 5, 5), timeout=5)
+            return time.perf_counter() - start
+        assert self._run(file_db, scenario, workers=1) < 5
+        assert todo_core.count_tasks() == 1
+
+    def test_cancel_drops_queued_call(self, file_db):
+        """Test that a call cancelled while queued never runs"""
+        async def scenario(store):
+            endless = asyncio.create_task(store.call(_endless_query))
+            queued = asyncio.create_task(store.add_task("Never", "", None, "Pending", 5, 5, 5))
+            await asyncio.sleep(0.2)
+            queued.cancel()
+            endless.cancel()
+            await asyncio.gather(endless, queued, return_exceptions=True)
+            return await store.call(todo_core.count_tasks)
+        assert self._run(file_db, scenario, workers=1) == 0
+
+    def test_memory_database_shared_with_workers(self, app_db):
+        """Test that workers and the shared connection wait for each other on an in-memory database"""
+        errors = []
+        stop = threading.Event()
+
+        def read_and_write():
+            while not stop.is_set():
+                try:
+                    todo_core.clear_query_cache()
+                    todo_core.get_task_records()
+                    todo_core.add_task("Shared", "", None, "Pending", 5, 5, 5)
+                except sqlite3.Error as e:
+                    errors.append(e)
+
+        async def scenario(store):
+            batch = [("Worker", "", None, "Pending", 5, 5, 5)] * 10
+            return await asyncio.gather(*(store.add_tasks(batch) for _ in range(20)), return_exceptions=True)
+
+        thread = threading.Thread(target=read_and_write)
+        thread.start()
+        try:
+            results = self._run(app_db, scenario, workers=4)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert errors == []
+        assert [r for r in results if isinstance(r, Exception)] == []
+        assert todo_core.task_summary()["total"] == todo_core.count_tasks() >= 200
+
+    def test_shared_cache_database_is_refused(self):
+        """Test that a shared-cache URI, whose connections fail instead of waiting, is rejected"""
+        with pytest.raises(ValueError):
+            todo_async.AsyncTaskStore(path="file:scratch?mode=memory&cache=shared")
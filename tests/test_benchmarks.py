@@ -0,0 +1,64 @@
+import pytest
+import json
+import os
+import sqlite3
+
+import todo_core
+import run_benchmarks
+
+# The runner points the app at its own databases; file_db points it back afterwards
+@pytest.mark.usefixtures("file_db")
+class TestBenchmarkHarness:
+    """Smoke tests for the benchmark runner on a tiny dataset"""
+    
+    def test_generated_dataset_is_realistic(self, tmp_path):
+        """Test that the generator fills every status and keeps the search index in sync"""
+        path = str(tmp_path / "tasks.db")
+        run_benchmarks.generate_dataset(path, 500)
+        
+        conn = sqlite3.connect(path)
+        statuses = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        indexed = conn.execute("SELECT COUNT(*) FROM tasks_fts WHERE tasks_fts MATCH 'report'").fetchone()[0]
+        with_word = conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE ' ' || lower(topic || ' ' || description) || ' ' LIKE '% report %'"
+        ).fetchone()[0]
+        conn.close()
+        
+        assert sum(statuses.values()) == 500
+        assert set(statuses) == set(todo_core.TASK_STATUSES)
+        assert indexed == with_word > 0
+    
+    def test_run_writes_comparable_json(self, tmp_path, capsys):
+        """Test that a run writes results per size and that two runs can be compared"""
+        output = str(tmp_path / "results.json")
+        report = run_benchmarks.run([300], output, repeat=1, crud_ops=5, data_dir=tmp_path)
+        
+        with open(output) as f:
+            saved = json.load(f)
+        assert saved == report
+        results = saved["results"]["300"]
+        assert results["get_all_tasks"]["median_ms"] >= 0
+        assert results["add_task"]["ops"] == 5
+        
+        run_benchmarks.compare(output, output)
+        assert "x1.00" in capsys.readouterr().out
+
+    def test_in_memory_run_leaves_dataset_untouched(self, tmp_path):
+        """Test that an in-memory run benchmarks a copy and writes nothing back"""
+        source = run_benchmarks.dataset_path(300, tmp_path)
+        before = source.stat().st_mtime_ns
+        report = run_benchmarks.run([300], str(tmp_path / "memory.json"), repeat=1, crud_ops=5,
+                                    data_dir=tmp_path, in_memory=True)
+
+        assert report["meta"]["in_memory"] is True
+        assert report["results"]["300"]["get_all_tasks"]["median_ms"] >= 0
+        assert source.stat().st_mtime_ns == before
+
+    def test_async_benchmarks_cover_every_mode(self, tmp_path):
+        """Test that the async comparison runs every workload in every mode"""
+        output = str(tmp_path / "async.json")
+        report = run_benchmarks.run_async(300, output, workers=2, concurrency=4, operations=5, data_dir=tmp_path)
+
+        for modes in report["async"].values():
+            assert {modes[mode]["ops"] for mode in ("sync", "to_thread", "async_store")} == {5}
+            assert modes["speedup"] > 0
@@ -1,10 +1,7 @@
-import pytest
 import math
-import sys
-from pathlib import Path
 
-# Import the calculation function from todo_app
-from todo_app import calculate_score
+# Import the calculation function from todo_core
+from todo_core import calculate_score
 
 class TestScoreCalculations:
     """Tests for the priority scoring system"""
@@ -141,4 +138,109 @@ class TestScoreCalculations:
         expected = (impact * tractability) / uncertainty
         actual = calculate_score(impact, tractability, uncertainty)
         assert actual == expected
-        assert actual == 28.0 
\ No newline at end of file
+        assert actual == 28.0
+
+
+class TestBatchScoring:
+    """Tests for the vectorized calculate_scores"""
+    
+    def test_matches_scalar_for_all_ratings(self):
+        """Test every rating combination from 0 to 10, zeros included, against calculate_score"""
+        import numpy as np
+        from todo_core import calculate_scores
+        
+        impact, tractability, uncertainty = np.meshgrid(*[np.arange(11)] * 3, indexing='ij')
+        scores = calculate_scores(impact.ravel(), tractability.ravel(), uncertainty.ravel())
+        expected = [calculate_score(i, t, u) for i, t, u in zip(impact.ravel(), tractability.ravel(), uncertainty.ravel())]
+        assert scores.dtype == np.float64
+        assert scores.tolist() == expected
+    
+    def test_series_keep_their_index(self):
+        """Test that pandas input returns a Series aligned with the DataFrame"""
+        import pandas as pd
+        from todo_core import calculate_scores
+        
+        df = pd.DataFrame({'impact': [9, 5, 2], 'tractability': [8, 0, 3], 'uncertainty': [2, 5, 8]},
+                          index=[10, 20, 30])
+        scores = calculate_scores(df['impact'], df['tractability'], df['uncertainty'])
+        assert isinstance(scores, pd.Series)
+        assert scores.index.tolist() == [10, 20, 30]
+        assert scores.tolist() == [36.0, 0.0, 0.75]
+    
+    def test_scalars_broadcast_and_missing_values(self):
+        """Test what-if style calls with a fixed rating, and NaN for missing ratings"""
+        import pandas as pd
+        from todo_core import calculate_scores
+        
+        scores = calculate_scores([1, 2, 3], 6, 3)
+        assert scores.tolist() == [2.0, 4.0, 6.0]
+        
+        scores = calculate_scores(pd.Series([4, None], dtype="Int8"), 5, 2)
+        assert scores[0] == 10.0 and math.isnan(scores[1])
+    
+    def test_empty_input(self):
+        """Test that empty arrays give an empty result"""
+        from todo_core import calculate_scores
+        assert len(calculate_scores([], [], [])) == 0
+
+
+class TestScoreInSQL:
+    """Tests that the score stored by SQLite agrees with calculate_score"""
+    
+    def _scores(self):
+        import todo_core
+        with todo_core._db.connection() as conn:
+            return conn.execute("SELECT impact, tractability, uncertainty, score FROM tasks").fetchall()
+    
+    def test_sql_formula_matches_python_for_all_ratings(self, app_db):
+        """Test every rating combination, including zeros, inserted without a score"""
+        import todo_core
+        
+        ratings = [(i, t, u) for i in range(0, 11) for t in range(0, 11) for u in range(0, 11)]
+        with todo_core.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO tasks (topic, impact, tractability, uncertainty) VALUES ('t', ?, ?, ?)", ratings
+            )
+        
+        rows = self._scores()
+        assert len(rows) == len(ratings)
+        for impact, tractability, uncertainty, score in rows:
+            assert score == calculate_score(impact, tractability, uncertainty)
+    
+    def test_writes_store_calculated_score(self, app_db):
+        """Test that add_task and update_task store the calculated score"""
+        from todo_core import add_task, update_task, get_task_by_id
+        
+        task_id = add_task("Scored", "", None, "Pending", 7, 3, 4)
+        assert get_task_by_id(task_id)[8] == calculate_score(7, 3, 4)
+        
+        update_task(task_id, "Scored", "", None, "Pending", 8, 6, 7)
+        assert get_task_by_id(task_id)[8] == calculate_score(8, 6, 7)
+    
+    def test_wrong_score_is_corrected(self, app_db):
+        """Test that a score written directly is replaced by the derived one"""
+        import todo_core
+        from todo_core import add_task, get_task_by_id
+        
+        task_id = add_task("Scored", "", None, "Pending", 9, 8, 2)
+        with todo_core.transaction() as conn:
+            conn.execute("UPDATE tasks SET score = 0 WHERE id = ?", (task_id,))
+        assert get_task_by_id(task_id)[8] == 36.0
+    
+    def test_formula_change_rescores_table(self, app_db):
+        """Test that a changed formula rescores every row with one statement on the next open"""
+        import todo_core
+        from todo_core import add_task, init_database, rescore_tasks
+        
+        for impact in range(1, 11):
+            add_task(f"Task {impact}", "", None, "Pending", impact, 5, 3)
+        # Simulate rows scored by an older formula
+        with todo_core.transaction() as conn:
+            conn.execute("DROP TRIGGER tasks_score_au")
+            conn.execute("UPDATE tasks SET score = impact")
+            conn.execute("UPDATE app_meta SET value = 'impact' WHERE key = 'score_formula'")
+        
+        init_database()
+        
+        assert all(score == calculate_score(i, t, u) for i, t, u, score in self._scores())
+        assert rescore_tasks() == 0
@@ -0,0 +1,125 @@
+import pytest
+import sqlite3
+
+import todo_core
+import todo_cli
+
+class TestFilterParsing:
+    """Tests for compiling filter expressions to SQL"""
+
+    def test_clauses_are_joined_with_and(self):
+        """Test a compound expression with quoted values and a relative date"""
+        where, params = todo_cli.parse_filter("status='On Hold' and impact >= 7 and created before 90d")
+        assert where == "(status = ?) AND (impact >= ?) AND (created_at < ?)"
+        assert params[:2] == ["On Hold", 7]
+        assert len(params[2]) == 19
+
+    def test_matches_escapes_wildcards(self):
+        """Test that matches is a substring LIKE with % and _ escaped"""
+        where, params = todo_cli.parse_filter("topic matches 100%_done")
+        assert where == "(topic LIKE ? ESCAPE '\\')"
+        assert params == ["%100\\%\\_done%"]
+
+    def test_quoted_value_may_contain_and(self):
+        """Test that 'and' inside quotes does not split the expression"""
+        _, params = todo_cli.parse_filter("topic matches 'research and development'")
+        assert params == ["%research and development%"]
+
+    def test_status_is_case_insensitive(self):
+        """Test that statuses are normalized to their stored spelling"""
+        assert todo_cli.parse_filter("status=on hold") == ("(status = ?)", ["On Hold"])
+
+    def test_all_selects_everything(self):
+        """Test the special expression all"""
+        assert todo_cli.parse_filter("all") == ("1", [])
+
+    @pytest.mark.parametrize("expression", [
+        "",
+        "colour=red",
+        "status=Done",
+        "impact > high",
+        "impact before 2024-01-01",
+        "due matches 2024",
+        "created after yesterday",
+        "topic",
+        "topic =",
+    ])
+    def test_invalid_expressions(self, expression):
+        """Test that bad expressions raise FilterError"""
+        with pytest.raises(todo_cli.FilterError):
+            todo_cli.parse_filter(expression)
+
+class TestBatchCommands:
+    """Tests for the batch commands against a temporary database"""
+
+    @pytest.fixture(autouse=True)
+    def db_path(self, file_db):
+        todo_core.init_database()
+        for i in range(6):
+            todo_core.add_task(f"Report {i}", "", None, "On Hold" if i % 2 else "Pending", i + 1, 5, 5)
+        return file_db
+
+    def test_dry_run_changes_nothing(self):
+        """Test that a dry run reports the counts but leaves the rows alone"""
+        result = todo_cli.run_command("set-status", "status='On Hold'", "Completed", dry_run=True)
+        assert result["matched"] == 3 and result["changed"] == 3
+        assert len(result["sample"]) == 3
+        assert todo_core.task_summary(statuses=["On Hold"])["total"] == 3
+
+    def test_set_status(self):
+        """Test that set-status changes only rows not already in the status"""
+        result = todo_cli.run_command("set-status", "impact >= 4", "On Hold")
+        assert result["matched"] == 3 and result["changed"] == 1
+        assert todo_core.task_summary(statuses=["On Hold"])["total"] == 4
+
+    def test_set_status_completed_sets_completed_at(self):
+        """Test that completing through the CLI fires the completed_at trigger"""
+        todo_cli.run_command("set-status", "topic matches 'Report 0'", "Completed")
+        assert len(todo_core.get_completed_tasks_in_range(1)) == 1
+
+    def test_delete(self):
+        """Test deleting matching rows"""
+        result = todo_cli.run_command("delete", "status=Pending")
+        assert result["changed"] == 3
+        assert todo_core.count_tasks() == 3
+
+    def test_rescore_only_touches_stale_scores(self):
+        """Test that rescore rewrites scores that drifted from the formula"""
+        # The score triggers keep scores current, so simulate a writer without them
+        with todo_core.transaction() as conn:
+            conn.execute("DROP TRIGGER tasks_score_au")
+            conn.execute("UPDATE tasks SET score = 0 WHERE topic = 'Report 5'")
+        dry = todo_cli.run_command("rescore", "all", dry_run=True)
+        assert dry["matched"] == 6 and dry["changed"] == 1
+
+        assert todo_cli.run_command("rescore", "all")["changed"] == 1
+        assert todo_cli.run_command("rescore", "all")["changed"] == 0
+
+    def test_main_prints_summary(self, db_path, capsys):
+        """Test the command-line entry point"""
+        assert todo_cli.main(["--db", db_path, "delete", "impact <= 2", "--dry-run"]) == 0
+        output = capsys.readouterr().out
+        assert "2 matching tasks" in output
+        assert "Dry run: 2 tasks would be deleted" in output
+
+        assert todo_cli.main(["--db", db_path, "list", "impact > 5"]) == 0
+        assert "1 matching task\n" in capsys.readouterr().out
+
+    def test_main_rejects_bad_filter(self, db_path, capsys):
+        """Test that an invalid filter exits with status 2"""
+        assert todo_cli.main(["--db", db_path, "delete", "colour=red"]) == 2
+        assert "Invalid filter" in capsys.readouterr().err
+
+    def test_list_does_not_wait_for_the_write_lock(self, db_path):
+        """Test that listing reads while another connection holds the write lock"""
+        todo_core.configure_database(db_path, {**todo_core.DEFAULT_PRAGMAS, 'busy_timeout': 20})
+        holder = sqlite3.connect(db_path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            count, rows = todo_cli.list_tasks("status='Pending'")
+        finally:
+            holder.execute("COMMIT")
+            holder.close()
+        assert count == 3
+        assert [row[2] for row in rows] == ["Pending"] * 3
+        assert not todo_core._current_db().in_transaction()
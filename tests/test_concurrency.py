@@ -0,0 +1,165 @@
+import pytest
+import sqlite3
+import threading
+import time
+
+import todo_core
+import run_benchmarks
+
+class TestConcurrentWrites:
+    """Test that many sessions can write to the same database at once"""
+
+    @pytest.fixture
+    def db_path(self, file_db):
+        todo_core.init_database()
+        return file_db
+
+    def test_database_uses_wal(self, db_path):
+        """Test that the database is switched to write-ahead logging"""
+        with todo_core._db.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+    def test_add_task_returns_id(self, db_path):
+        """Test that add_task returns the id of the new row"""
+        task_id = todo_core.add_task("Returned", "", None, "Pending", 5, 5, 5)
+        assert todo_core.get_task_by_id(task_id)[1] == "Returned"
+
+    def test_concurrent_sessions_lose_no_writes(self, db_path):
+        """Test that concurrent writers, readers and another connection all succeed"""
+        result = run_benchmarks.stress(db_path, writers=4, readers=2, duration=0.5)
+
+        assert result["errors"] == []
+        assert result["operations"]["add_task"]["ops"] > 0
+        assert result["operations"]["external_write"]["ops"] > 0
+        assert "get_all_tasks_during_lock_wait" in result["operations"]
+
+        conn = sqlite3.connect(db_path)
+        stress_rows = conn.execute("SELECT COUNT(*) FROM tasks WHERE description IN ('stress', 'updated')").fetchone()[0]
+        external_rows = conn.execute("SELECT COUNT(*) FROM tasks WHERE topic = 'External'").fetchone()[0]
+        conn.close()
+        assert stress_rows == result["operations"]["add_task"]["ops"]
+        assert external_rows == result["operations"]["external_write"]["ops"]
+
+    def test_write_retries_while_another_connection_holds_the_lock(self, db_path):
+        """Test that a write blocked past the busy timeout is retried instead of failing"""
+        todo_core.configure_database(db_path, {**todo_core.DEFAULT_PRAGMAS, 'busy_timeout': 20})
+        retries_before = todo_core.database_stats()["write_retries"]
+        locked = threading.Event()
+
+        def hold_write_lock():
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            conn.execute("BEGIN IMMEDIATE")
+            locked.set()
+            time.sleep(0.2)
+            conn.execute("COMMIT")
+            conn.close()
+
+        holder = threading.Thread(target=hold_write_lock)
+        holder.start()
+        locked.wait()
+        task_id = todo_core.add_task("Blocked", "", None, "Pending", 5, 5, 5)
+        holder.join()
+
+        assert todo_core.get_task_by_id(task_id) is not None
+        assert todo_core.database_stats()["write_retries"] > retries_before
+
+    def test_locked_writes_inside_transaction_are_not_retried(self, db_path):
+        """Test that only the outermost call retries, so a transaction is never half replayed"""
+        todo_core.configure_database(db_path, {**todo_core.DEFAULT_PRAGMAS, 'busy_timeout': 20})
+        holder = sqlite3.connect(db_path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(sqlite3.OperationalError):
+                with todo_core.transaction():
+                    todo_core.add_task("Never", "", None, "Pending", 5, 5, 5)
+        finally:
+            holder.execute("COMMIT")
+            holder.close()
+        assert todo_core.count_tasks() == 0
+
+    def test_read_transaction_reads_one_snapshot(self, db_path):
+        """Test that read_transaction neither takes the write lock nor sees commits made during it"""
+        todo_core.add_task("Before", "", None, "Pending", 5, 5, 5)
+        other = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            with todo_core.read_transaction() as conn:
+                first = conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+                other.execute("BEGIN IMMEDIATE")
+                other.execute("INSERT INTO tasks (topic, status) VALUES ('During', 'Pending')")
+                other.execute("COMMIT")
+                assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == first == 1
+        finally:
+            other.close()
+        assert not todo_core._db.in_transaction()
+        assert todo_core.count_tasks() == 2
+
+    def test_reads_proceed_while_a_write_waits_for_the_lock(self, db_path):
+        """Test that a write waiting out another connection's lock does not hold up in-process readers"""
+        todo_core.add_task("Existing", "", None, "Pending", 5, 5, 5)
+        busy_before = todo_core.database_stats()["busy_wait_seconds"]
+
+        holder = sqlite3.connect(db_path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        writer = threading.Thread(target=todo_core.add_task, args=("Waiting", "", None, "Pending", 5, 5, 5))
+        writer.start()
+        try:
+            deadline = time.perf_counter() + 2
+            while todo_core.database_stats()["busy_wait_seconds"] == busy_before and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            slowest = 0.0
+            for _ in range(10):
+                todo_core.clear_query_cache()
+                start = time.perf_counter()
+                todo_core.get_task_records()
+                slowest = max(slowest, time.perf_counter() - start)
+                time.sleep(0.01)
+            # The reads are done while the write is still waiting for the lock held here
+            writer_waiting = writer.is_alive()
+        finally:
+            holder.execute("COMMIT")
+            holder.close()
+        writer.join()
+
+        assert todo_core.database_stats()["busy_wait_seconds"] > busy_before
+        assert writer_waiting
+        # Behind a writer holding the connection lock, a read would wait out its whole busy timeout
+        busy_timeout = todo_core.database_config()["pragmas"]["busy_timeout"] / 1000
+        assert slowest < busy_timeout / 2
+        assert todo_core.count_tasks() == 2
+
+    def test_reads_proceed_while_a_cache_write_is_retried(self, db_path, monkeypatch):
+        """Test that a session cache write waiting out another connection's lock does not block readers"""
+        todo_core.configure_database(db_path, {**todo_core.DEFAULT_PRAGMAS, 'busy_timeout': 20})
+        # Long backoffs, so the writer is still retrying for seconds after its first attempt
+        monkeypatch.setattr(todo_core, "WRITE_RETRY_BASE_DELAY", 1.0)
+        task_id = todo_core.add_task("Contended", "", None, "Pending", 5, 5, 5)
+        cache = todo_core.TaskCache()
+        cache.count()
+        retries_before = todo_core.database_stats()["write_retries"]
+
+        holder = sqlite3.connect(db_path, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        writer = threading.Thread(target=cache.update_task,
+                                  args=(task_id, "Written", "", None, "Pending", 6, 5, 5))
+        writer.start()
+        try:
+            # Let the writer fail its first attempt and start backing off
+            deadline = time.perf_counter() + 2
+            while todo_core.database_stats()["write_retries"] == retries_before and time.perf_counter() < deadline:
+                time.sleep(0.005)
+            assert todo_core.database_stats()["write_retries"] > retries_before
+            for _ in range(10):
+                todo_core.clear_query_cache()
+                todo_core.get_task_records()
+            # Had the writer kept the connection lock through its backoff, these reads
+            # would only have run once it had given up
+            writer_retrying = writer.is_alive()
+        finally:
+            holder.execute("COMMIT")
+            holder.close()
+        writer.join()
+
+        assert writer_retrying
+        assert cache.get(task_id).topic == "Written"
+        assert cache.stats == {'reloads': 1, 'patches': 1}
@@ -5,8 +5,8 @@ import os
 import sys
 from pathlib import Path
 
-# Import the functions from todo_app
-from todo_app import (
+# Import the functions from todo_core
+from todo_core import (
     init_database, add_task, get_all_tasks, update_task, 
     delete_task, get_task_by_id
 )
@@ -14,124 +14,67 @@ from todo_app import (
 class TestDatabaseOperations:
     """Database-specific integration tests"""
     
-    def test_database_table_structure(self, temp_db):
+    def test_database_table_structure(self, file_db):
         """Test that the database table has the correct structure"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
+        # Initialize database
+        init_database()
         
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Check table structure
-            conn = sqlite3.connect(original_db)
-            cursor = conn.cursor()
-            
-            # Get table info
-            cursor.execute("PRAGMA table_info(tasks)")
-            columns = cursor.fetchall()
-            
-            # Expected columns: id, topic, description, due, status, impact, tractability, uncertainty, score, created_at, updated_at
-            expected_columns = [
-                'id', 'topic', 'description', 'due', 'status', 
-                'impact', 'tractability', 'uncertainty', 'score', 
-                'created_at', 'updated_at'
-            ]
-            
-            actual_columns = [col[1] for col in columns]
-            assert actual_columns == expected_columns
-            
-            # Check that id is primary key
-            id_column = [col for col in columns if col[1] == 'id'][0]
-            assert id_column[5] == 1  # Primary key flag
-            
-            # Check that topic is NOT NULL
-            topic_column = [col for col in columns if col[1] == 'topic'][0]
-            assert topic_column[3] == 1  # NOT NULL flag
-            
-            conn.close()
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+        # Check table structure
+        conn = sqlite3.connect(file_db)
+        cursor = conn.cursor()
+        
+        # Get table info
+        cursor.execute("PRAGMA table_info(tasks)")
+        columns = cursor.fetchall()
+        
+        # Expected columns: id, topic, description, due, status, impact, tractability, uncertainty, score, created_at, updated_at, completed_at
+        expected_columns = [
+            'id', 'topic', 'description', 'due', 'status', 
+            'impact', 'tractability', 'uncertainty', 'score', 
+            'created_at', 'updated_at', 'completed_at'
+        ]
+        
+        actual_columns = [col[1] for col in columns]
+        assert actual_columns == expected_columns
+        
+        # Check that id is primary key
+        id_column = [col for col in columns if col[1] == 'id'][0]
+        assert id_column[5] == 1  # Primary key flag
+        
+        # Check that topic is NOT NULL
+        topic_column = [col for col in columns if col[1] == 'topic'][0]
+        assert topic_column[3] == 1  # NOT NULL flag
+        
+        conn.close()
     
-    def test_database_constraints(self, temp_db):
+    def test_database_constraints(self, file_db):
         """Test database constraints and data validation"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
+        # Initialize database
+        init_database()
         
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Test that we can't insert a task without topic (should fail)
-            conn = sqlite3.connect(original_db)
-            cursor = conn.cursor()
-            
-            # This should raise an exception because topic is NOT NULL
-            with pytest.raises(sqlite3.IntegrityError):
-                cursor.execute('''
-                    INSERT INTO tasks (description, due, status, impact, tractability, uncertainty, score)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', ('Test description', '2024-12-31', 'Pending', 5, 5, 5, 25.0))
-            
-            conn.close()
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+        # Test that we can't insert a task without topic (should fail)
+        conn = sqlite3.connect(file_db)
+        cursor = conn.cursor()
+        
+        # This should raise an exception because topic is NOT NULL
+        with pytest.raises(sqlite3.IntegrityError):
+            cursor.execute('''
+                INSERT INTO tasks (description, due, status, impact, tractability, uncertainty, score)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', ('Test description', '2024-12-31', 'Pending', 5, 5, 5, 25.0))
+        
+        conn.close()
     
-    def test_auto_increment_id(self, temp_db, sample_task_data):
+    def test_auto_increment_id(self, file_db, sample_task_data):
         """Test that IDs auto-increment properly"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
+        # Initialize database
+        init_database()
         
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Add multiple tasks
-            task_ids = []
-            for i in range(3):
-                add_task(
-                    f"{sample_task_data['topic']} {i+1}",
-                    sample_task_data['description'],
-                    sample_task_data['due'],
-                    sample_task_data['status'],
-                    sample_task_data['impact'],
-                    sample_task_data['tractability'],
-                    sample_task_data['uncertainty']
-                )
-                
-                # Get the last inserted task
-                tasks = get_all_tasks()
-                task_ids.append(tasks.iloc[-1]['id'])
-            
-            # Verify IDs are sequential
-            assert task_ids == [1, 2, 3]
-            
-            # Delete middle task and add new one
-            delete_task(2)
+        # Add multiple tasks
+        task_ids = []
+        for i in range(3):
             add_task(
-                "New Task",
+                f"{sample_task_data['topic']} {i+1}",
                 sample_task_data['description'],
                 sample_task_data['due'],
                 sample_task_data['status'],
@@ -140,119 +83,1172 @@ class TestDatabaseOperations:
                 sample_task_data['uncertainty']
             )
             
-            # Verify new task gets next available ID
+            # Get the last inserted task
             tasks = get_all_tasks()
-            new_task_id = tasks.iloc[-1]['id']
-            assert new_task_id == 4  # Should be 4, not 2
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+            task_ids.append(tasks.iloc[-1]['id'])
+        
+        # Verify IDs are sequential
+        assert task_ids == [1, 2, 3]
+        
+        # Delete middle task and add new one
+        delete_task(2)
+        add_task(
+            "New Task",
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # Verify new task gets next available ID
+        tasks = get_all_tasks()
+        new_task_id = tasks.iloc[-1]['id']
+        assert new_task_id == 4  # Should be 4, not 2
     
-    def test_timestamp_handling(self, temp_db, sample_task_data):
+    def test_timestamp_handling(self, file_db, sample_task_data):
         """Test that created_at and updated_at timestamps work correctly"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
+        # Initialize database
+        init_database()
         
+        # Add a task
+        add_task(
+            sample_task_data['topic'],
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # Get the task
+        tasks = get_all_tasks()
+        task = tasks.iloc[0]
+        
+        # Verify timestamps exist and are the same initially
+        assert task['created_at'] is not None
+        assert task['updated_at'] is not None
+        assert task['created_at'] == task['updated_at']
+        
+        # Update the task
+        task_id = task['id']
+        update_task(
+            task_id,
+            "Updated Topic",
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # Get updated task
+        updated_tasks = get_all_tasks()
+        updated_task = updated_tasks.iloc[0]
+        
+        # Verify created_at didn't change but updated_at did
+        assert updated_task['created_at'] == task['created_at']
+        assert updated_task['updated_at'] != task['updated_at']
+    
+    def test_database_connection_handling(self, file_db, sample_task_data):
+        """Test that database connections are properly managed"""
+        # Initialize database
+        init_database()
+        
+        # Add a task
+        add_task(
+            sample_task_data['topic'],
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # Verify we can still connect and read
+        tasks = get_all_tasks()
+        assert len(tasks) == 1
+        
+        # Force garbage collection to close any lingering connections
+        import gc
+        gc.collect()
+        
+        # Verify we can still read after GC
+        tasks_after_gc = get_all_tasks()
+        assert len(tasks_after_gc) == 1
+        assert tasks_after_gc.iloc[0]['topic'] == sample_task_data['topic']
+
+class TestConnectionManager:
+    """Tests for the shared SQLite connection layer"""
+    
+    def test_connection_reused_across_calls(self, app_db, sample_task_data):
+        """Test that data functions share one warm connection instead of reconnecting"""
+        import todo_core
+        
+        with todo_core._db.connection() as conn:
+            first = conn
+        
+        add_task(*sample_task_data.values())
+        tasks = get_all_tasks()
+        get_task_by_id(tasks.iloc[0]['id'])
+        
+        with todo_core._db.connection() as conn:
+            assert conn is first
+    
+    def test_pragmas_applied(self, app_db):
+        """Test that configured pragmas are applied to the shared connection"""
+        import todo_core
+        
+        with todo_core._db.connection() as conn:
+            assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+    
+    def test_transaction_commits_all_or_nothing(self, app_db, sample_task_data):
+        """Test that the transaction context manager rolls back every statement on error"""
+        from todo_core import transaction
+        
+        with pytest.raises(RuntimeError):
+            with transaction():
+                add_task(*sample_task_data.values())
+                add_task(*sample_task_data.values())
+                raise RuntimeError("abort")
+        assert len(get_all_tasks()) == 0
+        
+        with transaction():
+            add_task(*sample_task_data.values())
+            add_task(*sample_task_data.values())
+        assert len(get_all_tasks()) == 2
+    
+    def test_close_database_reopens_on_next_use(self, app_db, sample_task_data):
+        """Test that closing the shared connection is clean and the next call reconnects"""
+        import todo_core
+        from todo_core import close_database
+        
+        add_task(*sample_task_data.values())
+        close_database()
+        assert todo_core._db._conn is None
+        
+        tasks = get_all_tasks()
+        assert len(tasks) == 1
+        assert todo_core._db._conn is not None
+
+class TestDatabaseLocation:
+    """Tests for TODO_DB_PATH and in-memory databases"""
+
+    def test_path_read_from_environment(self, tmp_path):
+        """Test that TODO_DB_PATH sets the default database of a new process"""
+        import subprocess
+
+        path = tmp_path / "elsewhere.db"
+        code = "import todo_core; todo_core.init_database(); print(todo_core._db.path)"
+        env = {**os.environ, "TODO_DB_PATH": str(path), "PYTHONPATH": str(Path(__file__).parent.parent)}
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == str(path)
+        assert sorted(p.name for p in tmp_path.iterdir() if p.suffix == '.db') == ["elsewhere.db"]
+
+    def test_config_reports_configured_path_and_pragmas(self, file_db):
+        """Test that database_config returns what configure_database set, as a copy"""
+        import todo_core
+
+        pragmas = {**todo_core.DEFAULT_PRAGMAS, 'busy_timeout': 100}
+        todo_core.configure_database(file_db, pragmas)
+        config = todo_core.database_config()
+        assert config == {'path': file_db, 'pragmas': pragmas}
+        config['pragmas']['busy_timeout'] = 1
+        assert todo_core.database_config()['pragmas']['busy_timeout'] == 100
+
+    def test_memory_path_resolves_to_distinct_shared_databases(self):
+        """Test that each ':memory:' names a new database every connection can share"""
+        from todo_core import is_memory_database, resolve_database_path
+
+        first, second = resolve_database_path(':memory:'), resolve_database_path(':memory:')
+        assert first != second
+        assert first.startswith('file:/') and first.endswith('?vfs=memdb')
+        assert is_memory_database(first) and is_memory_database(':memory:')
+        assert is_memory_database('file:scratch?mode=memory&cache=shared')
+        assert not is_memory_database('todo.db')
+        assert resolve_database_path('todo.db') == 'todo.db'
+
+    def test_memory_database_survives_reopen(self, app_db, sample_task_data):
+        """Test that closing and re-initializing keeps the in-memory tasks"""
+        from todo_core import close_database
+
+        add_task(*sample_task_data.values())
+        close_database()
+        init_database()
+        assert len(get_all_tasks()) == 1
+
+        other = sqlite3.connect(app_db, uri=True)
+        assert other.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 1
+        other.close()
+
+    def test_moving_away_discards_memory_database(self, app_db, sample_task_data):
+        """Test that configure_database frees the in-memory database it leaves"""
+        import todo_core
+
+        add_task(*sample_task_data.values())
+        todo_core.configure_database(':memory:')
+        init_database()
+        assert len(get_all_tasks()) == 0
+
+        # Nothing holds the old database open any more, so this opens an empty one
+        other = sqlite3.connect(app_db, uri=True)
+        assert other.execute("SELECT name FROM sqlite_master WHERE name = 'tasks'").fetchone() is None
+        other.close()
+
+class TestFullTextSearch:
+    """Tests for the FTS5 index behind search_tasks"""
+    
+    def _add(self, topic, description, status='Pending'):
+        add_task(topic, description, '2024-12-31', status, 5, 5, 5)
+    
+    def test_prefix_matching(self, app_db):
+        """Test that every search word matches as a word prefix"""
+        from todo_core import search_tasks
+        
+        self._add('Write quarterly report', 'Finance numbers')
+        self._add('Plan offsite', 'Book venue for the team')
+        
+        assert search_tasks('quart')['topic'].tolist() == ['Write quarterly report']
+        assert search_tasks('rep writ')['topic'].tolist() == ['Write quarterly report']
+        assert len(search_tasks('quarterly venue')) == 0
+    
+    def test_search_by_column(self, app_db):
+        """Test that topic and description searches only look at their own column"""
+        from todo_core import search_tasks
+        
+        self._add('Budget review', 'Check the venue costs')
+        self._add('Venue booking', 'Call the hotel')
+        
+        assert search_tasks('venue', 'topic')['topic'].tolist() == ['Venue booking']
+        assert search_tasks('venue', 'description')['topic'].tolist() == ['Budget review']
+        assert len(search_tasks('venue', 'all')) == 2
+    
+    def test_results_ranked_by_relevance(self, app_db):
+        """Test that a topic hit outranks a description hit"""
+        from todo_core import search_tasks
+        
+        self._add('Unrelated', 'mentions migration once')
+        self._add('Database migration', 'Move to the new server')
+        
+        assert search_tasks('migration')['topic'].tolist() == ['Database migration', 'Unrelated']
+    
+    def test_index_follows_updates_and_deletes(self, app_db):
+        """Test that the triggers keep the index in sync with the tasks table"""
+        from todo_core import search_tasks
+        
+        self._add('Old name', 'Some text')
+        task_id = get_all_tasks().iloc[0]['id']
+        
+        update_task(task_id, 'Renamed task', 'Some text', '2024-12-31', 'Pending', 5, 5, 5)
+        assert len(search_tasks('old')) == 0
+        assert len(search_tasks('renamed')) == 1
+        
+        delete_task(task_id)
+        assert len(search_tasks('renamed')) == 0
+    
+    def test_punctuation_only_search(self, app_db):
+        """Test that search terms without words return no rows instead of failing"""
+        from todo_core import search_tasks
+        
+        self._add('Task', 'Text')
+        assert len(search_tasks('"*()')) == 0
+    
+    def test_existing_database_is_backfilled(self, app_db):
+        """Test that a database created before the index existed is indexed on open"""
+        from todo_core import close_database, search_tasks
+        
+        close_database()
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.executescript("""
+            DROP TABLE tasks_fts;
+            DROP TRIGGER IF EXISTS tasks_fts_ai;
+            DROP TRIGGER IF EXISTS tasks_fts_ad;
+            DROP TRIGGER IF EXISTS tasks_fts_au;
+            INSERT INTO tasks (topic, description, status) VALUES ('Legacy task', 'From before FTS', 'Pending');
+        """)
+        conn.close()
+        
+        init_database()
+        assert search_tasks('legacy')['topic'].tolist() == ['Legacy task']
+
+class TestIndexes:
+    """Tests that the hot queries are served by the secondary indexes"""
+    
+    def _plan(self, query, params=()):
+        import todo_core
+        with todo_core._db.connection() as conn:
+            rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+        return " | ".join(row[3] for row in rows)
+    
+    def test_indexes_created_idempotently(self, app_db):
+        """Test that init_database can run repeatedly and leaves every index in place"""
+        init_database()
+        init_database()
+        
+        conn = sqlite3.connect(app_db, uri=True)
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        conn.close()
+        assert {'idx_tasks_score_due', 'idx_tasks_status_score_due', 'idx_tasks_completed_at',
+                'idx_tasks_expirable_created'} <= names
+
+    def test_reopen_leaves_schema_unchanged(self, app_db):
+        """Test that opening an up-to-date database does not rewrite its schema under other connections"""
+        init_database()
+        other = sqlite3.connect(app_db, uri=True)
+        version = other.execute("PRAGMA schema_version").fetchone()[0]
+        init_database()
+        assert other.execute("PRAGMA schema_version").fetchone()[0] == version
+        other.close()
+
+    def test_task_list_needs_no_sort(self, app_db):
+        """Test that the task list ordering is read straight from the score index"""
+        plan = self._plan("SELECT * FROM tasks ORDER BY score DESC, due ASC")
+        assert 'idx_tasks_score_due' in plan
+        assert 'TEMP B-TREE' not in plan
+    
+    def test_status_filters_search_status_index(self, app_db):
+        """Test that status-filtered lists and counts read only the rows of those statuses"""
+        statuses = ('Pending', 'In Progress', 'On Hold')
+        plan = self._plan("SELECT * FROM tasks WHERE status IN (?, ?, ?) ORDER BY score DESC, due ASC, id ASC LIMIT 50",
+                          statuses)
+        assert 'SEARCH tasks USING INDEX idx_tasks_status_score_due (status=?)' in plan
+        plan = self._plan("SELECT COUNT(*) FROM tasks WHERE status IN (?, ?, ?)", statuses)
+        assert 'SEARCH tasks USING COVERING INDEX idx_tasks_status_score_due (status=?)' in plan
+        plan = self._plan("SELECT * FROM tasks WHERE status = ? ORDER BY score DESC, due ASC, id ASC", ('Pending',))
+        assert 'SEARCH tasks USING INDEX idx_tasks_status_score_due (status=?)' in plan
+        assert 'TEMP B-TREE' not in plan
+    
+    def test_completed_range_uses_index(self, app_db):
+        """Test that the completed-range query searches the partial index"""
+        plan = self._plan("""
+            SELECT * FROM tasks WHERE completed_at >= ?
+            ORDER BY completed_at DESC, score DESC
+        """, ('2024-01-01',))
+        assert 'SEARCH tasks USING INDEX idx_tasks_completed_at' in plan
+        assert 'TEMP B-TREE' not in plan
+    
+    def test_expiry_sweep_uses_index(self, app_db):
+        """Test that the expiry sweep searches the expirable-rows index"""
+        plan = self._plan("""
+            UPDATE tasks SET status = 'Expired'
+            WHERE created_at < ? AND created_at >= ? AND status NOT IN ('Expired', 'Completed')
+        """, ('2024-01-01', '2023-12-01'))
+        assert 'SEARCH tasks USING INDEX idx_tasks_expirable_created' in plan
+
+class TestStatusFiltering:
+    """Tests for status filters applied in SQL"""
+    
+    def _add_sample_tasks(self, sample_tasks):
+        for task_data in sample_tasks:
+            add_task(*task_data.values())
+        add_task('Old expired task', 'Past its date', None, 'Expired', 2, 2, 2)
+    
+    def test_get_all_tasks_filters_by_status(self, app_db, sample_tasks):
+        """Test that only rows with the requested statuses are returned"""
+        self._add_sample_tasks(sample_tasks)
+        
+        pending = get_all_tasks(statuses=['Pending'])
+        assert set(pending['status']) == {'Pending'}
+        assert len(pending) == 2
+        
+        history = get_all_tasks(statuses={'Completed', 'Expired'})
+        assert sorted(history['topic']) == ['Completed Task', 'Old expired task']
+        
+        assert len(get_all_tasks()) == 4
+        assert len(get_all_tasks(statuses=[])) == 0
+    
+    def test_filtered_rows_keep_ordering(self, app_db, sample_tasks):
+        """Test that filtered results are still ordered by score"""
+        self._add_sample_tasks(sample_tasks)
+        
+        scores = get_all_tasks(statuses=['Pending', 'Completed'])['score'].tolist()
+        assert scores == sorted(scores, reverse=True)
+    
+    def test_search_tasks_filters_by_status(self, app_db, sample_tasks):
+        """Test that search results can be restricted to statuses"""
+        from todo_core import search_tasks
+        
+        self._add_sample_tasks(sample_tasks)
+        
+        assert len(search_tasks('task')) == 4
+        results = search_tasks('task', statuses=['Completed'])
+        assert results['topic'].tolist() == ['Completed Task']
+        results = search_tasks('pend', 'status', statuses=['Pending', 'Expired'])
+        assert len(results) == 2
+    
+    def test_count_tasks(self, app_db, sample_tasks):
+        """Test counting with status filters and search terms"""
+        from todo_core import count_tasks
+        
+        self._add_sample_tasks(sample_tasks)
+        
+        assert count_tasks() == 4
+        assert count_tasks(statuses=['Pending']) == 2
+        assert count_tasks(search_term='priority') == 2
+        assert count_tasks(statuses=['Pending'], search_term='easy', search_by='description') == 1
+        assert count_tasks(search_term='x', search_by='unknown') == 0
+
+class TestTaskSummary:
+    """Tests for the SQL-side footer metrics"""
+    
+    def test_summary_matches_dataframe_metrics(self, app_db, sample_tasks):
+        """Test that every aggregate agrees with the same metric computed from the rows"""
+        from todo_core import task_summary
+        
+        for task_data in sample_tasks:
+            add_task(*task_data.values())
+        add_task('Old expired task', 'Past its date', None, 'Expired', 8, 2, 2)
+        
+        for statuses in (None, ['Pending'], ['Completed', 'Expired']):
+            df = get_all_tasks(statuses=statuses)
+            summary = task_summary(statuses=statuses)
+            assert summary['total'] == len(df)
+            assert summary['pending'] == (df['status'] == 'Pending').sum()
+            assert summary['completed'] == (df['status'] == 'Completed').sum()
+            assert summary['avg_score'] == pytest.approx(df['score'].mean())
+            assert summary['total_impact'] == df['impact'].sum()
+            assert summary['high_impact'] == (df['impact'] >= 7).sum()
+            assert summary['high_score'] == (df['score'] >= 5.0).sum()
+    
+    def test_summary_of_search_and_completed_range(self, app_db, sample_tasks):
+        """Test that search and completed-range summaries use the listing's filters"""
+        from todo_core import task_summary, search_tasks, completed_range_start, get_completed_tasks_in_range
+        
+        for task_data in sample_tasks:
+            add_task(*task_data.values())
+        
+        summary = task_summary(statuses=['Pending'], search_term='priority')
+        results = search_tasks('priority', statuses=['Pending'])
+        assert summary['total'] == len(results) == 2
+        assert summary['avg_score'] == pytest.approx(results['score'].mean())
+        
+        summary = task_summary(completed_since=completed_range_start(1))
+        completed = get_completed_tasks_in_range(1)
+        assert summary['total'] == summary['completed'] == len(completed) == 1
+        assert summary['total_impact'] == completed['impact'].sum()
+    
+    def test_summary_without_matches(self, app_db):
+        """Test that an empty selection sums to zero and has no average"""
+        from todo_core import task_summary
+        
+        assert task_summary() == {
+            'total': 0, 'pending': 0, 'completed': 0, 'avg_score': None,
+            'total_impact': 0, 'high_impact': 0, 'high_score': 0,
+        }
+        assert task_summary(search_term='x', search_by='unknown')['total'] == 0
+
+class TestKeysetPagination:
+    """Tests for get_tasks_page"""
+    
+    def _add_tasks(self):
+        # Duplicate scores and NULL due dates exercise every tie-break in the page key
+        for i in range(23):
+            due = None if i % 4 == 0 else f"2024-12-{(i % 3) + 10}"
+            add_task(f"Task {i}", "", due, 'Pending' if i % 5 else 'On Hold', (i % 3) + 1, 2, 2)
+    
+    def _expected_ids(self, statuses=None):
+        tasks = get_all_tasks(statuses=statuses).to_dict('records')
+        # NULL due dates (NaT) sort first, as in SQLite
+        tasks.sort(key=lambda t: (-t['score'], pd.notna(t['due']), t['due'] if pd.notna(t['due']) else pd.Timestamp.min, t['id']))
+        return [t['id'] for t in tasks]
+    
+    def test_forward_pages_cover_list_in_order(self, app_db):
+        """Test that following next-page cursors visits every task once, in list order"""
+        from todo_core import get_tasks_page, task_page_key
+        
+        self._add_tasks()
+        seen, after = [], None
+        while True:
+            page, has_more = get_tasks_page(page_size=5, after=after)
+            assert len(page) <= 5
+            seen += page['id'].tolist()
+            if not has_more:
+                break
+            after = task_page_key(page.iloc[-1])
+        
+        assert seen == self._expected_ids()
+    
+    def test_backward_pages_mirror_forward_pages(self, app_db):
+        """Test that previous-page cursors return the same pages in reverse"""
+        from todo_core import get_tasks_page, task_page_key
+        
+        self._add_tasks()
+        forward, after = [], None
+        while True:
+            page, has_more = get_tasks_page(statuses=['Pending'], page_size=4, after=after)
+            forward.append(page['id'].tolist())
+            if not has_more:
+                break
+            after = task_page_key(page.iloc[-1])
+        
+        backward, before = [forward[-1]], None
+        page, _ = get_tasks_page(statuses=['Pending'], page_size=4, after=after)
+        before = task_page_key(page.iloc[0])
+        while True:
+            page, has_more = get_tasks_page(statuses=['Pending'], page_size=4, before=before)
+            backward.insert(0, page['id'].tolist())
+            if not has_more:
+                break
+            before = task_page_key(page.iloc[0])
+        
+        assert backward == forward
+        assert sum(forward, []) == self._expected_ids(['Pending'])
+    
+    def test_first_page_flags(self, app_db):
+        """Test the has_more flag on short and exact-size lists"""
+        from todo_core import get_tasks_page
+        
+        add_task("Only task", "", None, 'Pending', 1, 1, 1)
+        page, has_more = get_tasks_page(page_size=1)
+        assert len(page) == 1 and not has_more
+        
+        add_task("Second task", "", None, 'Pending', 1, 1, 1)
+        page, has_more = get_tasks_page(page_size=1)
+        assert page['topic'].tolist() == ["Only task"] and has_more
+
+    def test_record_pages_match_frame_pages(self, app_db):
+        """Test that get_task_records_page walks the list like get_tasks_page, both ways"""
+        from todo_core import get_task_records_page, task_page_key
+
+        self._add_tasks()
+        pages, after = [], None
+        while True:
+            page, has_more = get_task_records_page(page_size=6, after=after)
+            pages.append([task.id for task in page])
+            if not has_more:
+                break
+            after = task_page_key(page[-1])
+        assert sum(pages, []) == self._expected_ids()
+
+        page, has_more = get_task_records_page(page_size=6, before=task_page_key(page[0]))
+        assert [task.id for task in page] == pages[-2] and has_more
+
+class TestTaskRecords:
+    """Tests for the Task record and the pandas-free *_records readers"""
+
+    def test_record_fields(self, app_db):
+        """Test attribute, key and positional access to a Task"""
+        from todo_core import Task, TASK_COLUMNS
+
+        task_id = add_task("Write report", "Quarterly", "2024-12-31", 'Pending', 9, 8, 2)
+        task = get_task_by_id(task_id)
+        assert isinstance(task, Task)
+        assert task.topic == task['topic'] == task[1] == "Write report"
+        assert task.score == task[8] == 36.0
+        assert task.priority is None and task.get('priority', 1.0) == 1.0
+        assert len(task) == len(TASK_COLUMNS) and list(task)[:2] == [task_id, "Write report"]
+        assert task.as_dict()['due'] == "2024-12-31" and 'priority' not in task.as_dict()
+        with pytest.raises(KeyError):
+            task['colour']
+        with pytest.raises(AttributeError):
+            task.colour = 'red'
+
+    def test_record_readers_match_frame_readers(self, app_db, sample_tasks):
+        """Test that every record reader returns the rows and order of its DataFrame counterpart"""
+        from todo_core import (get_task_records, search_tasks, search_task_records, completed_range_start,
+                               get_completed_tasks_since, get_completed_task_records_since)
+
+        for task_data in sample_tasks:
+            add_task(*task_data.values())
+        add_task('Priority backlog', 'Later', None, 'On Hold', 2, 2, 2)
+
+        def ids(tasks):
+            return [task.id for task in tasks]
+
+        for statuses in (None, ['Pending', 'On Hold']):
+            records = get_task_records(statuses=statuses, strategy='due_urgency')
+            df = get_all_tasks(statuses=statuses, strategy='due_urgency')
+            assert ids(records) == df['id'].tolist()
+            assert [task.priority for task in records] == pytest.approx(df['priority'].tolist())
+        assert ids(search_task_records('priority')) == search_tasks('priority')['id'].tolist()
+        assert search_task_records('x', search_by='unknown') == []
+        cutoff = completed_range_start(1)
+        assert ids(get_completed_task_records_since(cutoff)) == get_completed_tasks_since(cutoff)['id'].tolist()
+
+    def test_frames_are_typed(self, app_db, sample_tasks):
+        """Test that task frames come back with categorical, Int8 and datetime64 columns"""
+        from todo_core import TASK_STATUSES, search_tasks, get_completed_tasks_in_range
+
+        for task_data in sample_tasks:
+            add_task(*task_data.values())
+        add_task('Undated', '', None, 'On Hold', 2, 2, 2)
+
+        for df in (get_all_tasks(), search_tasks('task'), get_completed_tasks_in_range(1)):
+            assert list(df['status'].cat.categories) == TASK_STATUSES
+            assert {str(df[column].dtype) for column in ('impact', 'tractability', 'uncertainty')} == {'Int8'}
+            for column in ('due', 'created_at', 'updated_at', 'completed_at'):
+                assert pd.api.types.is_datetime64_dtype(df[column])
+
+        df = get_all_tasks().set_index('topic')
+        assert df.loc['High Priority Task', 'due'] == pd.Timestamp('2024-12-25')
+        assert pd.isna(df.loc['Undated', 'due']) and pd.isna(df.loc['Undated', 'completed_at'])
+
+    def test_out_of_range_ratings_widen_the_column(self, app_db, sample_task_data):
+        """Test that ratings stored by other tools outside Int8 range or as text do not break a read"""
+        add_task(*sample_task_data.values())
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.execute("INSERT INTO tasks (topic, status, impact, tractability, uncertainty) "
+                     "VALUES ('Imported', 'Pending', 200, 'high', 2)")
+        conn.commit()
+        conn.close()
+
+        df = get_all_tasks().set_index('topic')
+        assert str(df['impact'].dtype) == 'Int64'
+        assert df.loc['Imported', 'impact'] == 200
+        assert str(df['tractability'].dtype) == 'Int8'
+        assert pd.isna(df.loc['Imported', 'tractability'])
+        assert df.loc[sample_task_data['topic'], 'tractability'] == sample_task_data['tractability']
+
+    def test_frame_rows_can_be_written_back(self, app_db, sample_tasks):
+        """Test that update_task stores Timestamp and NaT due dates from a typed frame as text and NULL"""
+        add_task(*sample_tasks[0].values())
+        add_task('Undated', '', None, 'On Hold', 2, 2, 2)
+
+        for _, task in get_all_tasks().iterrows():
+            update_task(task['id'], task['topic'], 'edited', task['due'], task['status'],
+                        int(task['impact']), int(task['tractability']), int(task['uncertainty']))
+        assert sorted(task.due or '' for task in map(get_task_by_id, (1, 2))) == ['', '2024-12-25']
+
+    def test_cached_record_lists_are_copied(self, app_db, sample_task_data):
+        """Test that callers cannot change a cached record list"""
+        from todo_core import get_task_records
+
+        add_task(*sample_task_data.values())
+        get_task_records().clear()
+        assert len(get_task_records()) == 1
+
+class TestTaskCache:
+    """Tests for the per-session TaskCache"""
+
+    def _add_tasks(self):
+        # Duplicate scores and missing due dates exercise every tie-break of the list order
+        for i in range(30):
+            due = None if i % 4 == 0 else f"2024-12-{(i % 3) + 10}"
+            add_task(f"Task {i}", "", due, ('Pending', 'On Hold', 'Completed')[i % 3], (i % 5) + 1, 2, 2)
+
+    def _assert_matches_database(self, cache):
+        from todo_core import get_task_records_page, task_summary
+
+        for statuses in (None, ['Pending'], ['On Hold', 'Completed'], []):
+            expected, _ = get_task_records_page(statuses, page_size=1000, strategy='impact_tractability')
+            assert [task.id for task in cache.tasks(statuses)] == [task.id for task in expected]
+            assert cache.count(statuses) == len(expected)
+            summary, expected_summary = cache.summary(statuses), task_summary(statuses=statuses)
+            assert summary['avg_score'] == pytest.approx(expected_summary['avg_score'])
+            assert {k: v for k, v in summary.items() if k != 'avg_score'} == \
+                {k: v for k, v in expected_summary.items() if k != 'avg_score'}
+
+    def test_pages_match_keyset_pages(self, app_db):
+        """Test that cached pages walk the list like get_task_records_page, both ways"""
+        from todo_core import TaskCache, get_task_records_page, task_page_key
+
+        self._add_tasks()
+        cache = TaskCache()
+        statuses = ['Pending', 'Completed']
+        after = None
+        while True:
+            page, has_more = cache.page(statuses, page_size=7, after=after)
+            expected = get_task_records_page(statuses, page_size=7, after=after)
+            assert ([task.id for task in page], has_more) == ([task.id for task in expected[0]], expected[1])
+            if not has_more:
+                break
+            after = task_page_key(page[-1])
+        before = task_page_key(page[0])
+        page, has_more = cache.page(statuses, page_size=7, before=before)
+        expected = get_task_records_page(statuses, page_size=7, before=before)
+        assert ([task.id for task in page], has_more) == ([task.id for task in expected[0]], expected[1])
+
+    def test_own_writes_patch_without_reloading(self, app_db):
+        """Test that writes through the cache keep it in list order without a reload"""
+        from todo_core import TaskCache
+
+        self._add_tasks()
+        cache = TaskCache()
+        self._assert_matches_database(cache)
+
+        new_id = cache.add_task("Fresh", "", "2024-12-11", 'Pending', 4, 2, 2)
+        assert cache.update_task(3, "Moved", "", None, 'Completed', 5, 2, 2)
+        assert cache.update_task(new_id, "Fresh", "", "2024-12-10", 'On Hold', 1, 9, 9)
+        assert cache.delete_task(7)
+        assert not cache.delete_task(7)
+        assert cache.get(3).topic == "Moved" and cache.get(7) is None
+
+        assert cache.stats == {'reloads': 1, 'patches': 5}
+        self._assert_matches_database(cache)
+        assert cache.stats['reloads'] == 1
+
+    def test_other_writers_trigger_reload(self, app_db):
+        """Test that writes the cache did not make are picked up by reloading"""
+        from todo_core import TaskCache
+
+        self._add_tasks()
+        cache = TaskCache()
+        other_session = TaskCache()
+        cache.count()
+
+        # Another session on the shared connection, then another connection
+        other_session.add_task("Elsewhere", "", None, 'Pending', 9, 9, 1)
+        assert cache.get(31).topic == "Elsewhere"
+        assert cache.count() == 31
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.execute("DELETE FROM tasks WHERE id = 31")
+        conn.commit()
+        conn.close()
+        assert cache.get(31) is None
+        assert cache.count() == 30
+        assert cache.stats['reloads'] == 3
+
+        # A write made while the cache was stale reloads rather than patching a stale list
+        add_task("Unseen", "", None, 'Pending', 1, 1, 1)
+        cache.update_task(1, "Renamed", "", None, 'Pending', 1, 2, 2)
+        self._assert_matches_database(cache)
+        assert cache.stats['reloads'] == 4
+
+    def test_statuses_load_when_first_read(self, app_db):
+        """Test that statuses no read has asked for are neither read nor held"""
+        import todo_core
+        from todo_core import TaskCache
+
+        self._add_tasks()
+        cache = TaskCache()
+        statements = []
+        with todo_core._db.connection() as conn:
+            conn.set_trace_callback(statements.append)
         try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Add a task
-            add_task(
-                sample_task_data['topic'],
-                sample_task_data['description'],
-                sample_task_data['due'],
-                sample_task_data['status'],
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
-            )
-            
-            # Get the task
-            tasks = get_all_tasks()
-            task = tasks.iloc[0]
-            
-            # Verify timestamps exist and are the same initially
-            assert task['created_at'] is not None
-            assert task['updated_at'] is not None
-            assert task['created_at'] == task['updated_at']
-            
-            # Update the task
-            task_id = task['id']
-            update_task(
-                task_id,
-                "Updated Topic",
-                sample_task_data['description'],
-                sample_task_data['due'],
-                sample_task_data['status'],
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
-            )
-            
-            # Get updated task
-            updated_tasks = get_all_tasks()
-            updated_task = updated_tasks.iloc[0]
-            
-            # Verify created_at didn't change but updated_at did
-            assert updated_task['created_at'] == task['created_at']
-            assert updated_task['updated_at'] != task['updated_at']
-            
+            page, _ = cache.page(['Pending', 'On Hold'], page_size=5)
+            assert cache.count(['Pending']) == 10
+            assert cache.get(3).status == 'Completed'
+            cache.update_task(3, "Still done", "", None, 'Completed', 5, 2, 2)
         finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+            with todo_core._db.connection() as conn:
+                conn.set_trace_callback(None)
+
+        lists = [sql for sql in statements if 'ORDER BY score DESC' in sql]
+        assert len(lists) == 1 and "WHERE status IN ('Pending', 'On Hold')" in lists[0]
+        assert {task.status for task in cache._by_id.values()} == {'Pending', 'On Hold'}
+        assert cache.stats == {'reloads': 1, 'patches': 1}
+        assert cache.tasks(['Completed'])[0].topic == "Still done"
+        self._assert_matches_database(cache)
+
+class TestScoringStrategies:
+    """Tests for the pluggable priority models"""
     
-    def test_database_connection_handling(self, temp_db, sample_task_data):
-        """Test that database connections are properly managed"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
+    def _add_tasks(self):
+        from datetime import datetime, timedelta, timezone
+        today = datetime.now(timezone.utc).date()  # urgency is measured against SQLite's UTC date
+        add_task("High score", "", None, 'Pending', 9, 8, 2)                          # score 36
+        add_task("Due today", "", today.isoformat(), 'Pending', 6, 5, 1)             # score 30
+        add_task("Due later", "", (today + timedelta(days=60)).isoformat(), 'Pending', 8, 4, 1)  # score 32
+        add_task("Heavy ratings", "", None, 'Pending', 10, 10, 10)                    # score 10
+    
+    def test_default_strategy_orders_by_stored_score(self, app_db):
+        """Test that the default priority is the stored score"""
+        self._add_tasks()
+        tasks = get_all_tasks()
+        assert tasks['priority'].tolist() == tasks['score'].tolist()
+        assert tasks['topic'].tolist() == ["High score", "Due later", "Due today", "Heavy ratings"]
+    
+    def test_weighted_sum_computed_in_sql(self, app_db):
+        """Test that the weighted sum orders tasks without changing stored scores"""
+        self._add_tasks()
+        stored = get_all_tasks().set_index('id')['score']
+        
+        tasks = get_all_tasks(strategy='weighted_sum')
+        expected = 0.5 * tasks['impact'] + 0.3 * tasks['tractability'] - 0.2 * tasks['uncertainty']
+        assert tasks['priority'].tolist() == pytest.approx(expected.tolist())
+        assert tasks['priority'].is_monotonic_decreasing
+        assert tasks['topic'].tolist() == ["High score", "Heavy ratings", "Due later", "Due today"]
+        pd.testing.assert_series_equal(get_all_tasks().set_index('id')['score'], stored)
+    
+    def test_due_urgency_boosts_tasks_due_soon(self, app_db):
+        """Test that a task due today is boosted to twice its score and a distant one is not"""
+        self._add_tasks()
+        tasks = get_all_tasks(strategy='due_urgency').set_index('topic')
+        assert tasks.loc["Due today", 'priority'] == 60.0
+        assert tasks.loc["Due later", 'priority'] == 32.0
+        assert tasks.loc["High score", 'priority'] == 36.0
+        assert tasks.index[0] == "Due today"
+    
+    def test_pages_follow_strategy_order(self, app_db):
+        """Test that keyset pages walk the list in the strategy's order"""
+        from todo_core import get_tasks_page, task_page_key
+        
+        for i in range(12):
+            add_task(f"Task {i}", "", None, 'Pending', (i % 4) + 1, (i % 3) + 1, 2)
+        expected = get_all_tasks(strategy='weighted_sum')['id'].tolist()
+        
+        seen, after, has_more = [], None, True
+        while has_more:
+            page, has_more = get_tasks_page(page_size=5, after=after, strategy='weighted_sum')
+            seen += page['id'].tolist()
+            after = task_page_key(page.iloc[-1])
+        assert seen == expected
+        
+        previous, _ = get_tasks_page(page_size=5, before=task_page_key(page.iloc[0]), strategy='weighted_sum')
+        assert previous['id'].tolist() == expected[5:10]
+    
+    def test_custom_strategy_and_search(self, app_db):
+        """Test registering a strategy and using it to order search results"""
+        import todo_core
+        from todo_core import register_scoring_strategy, search_tasks
         
+        self._add_tasks()
+        register_scoring_strategy("impact_only", "Impact", "impact")
         try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Add a task
-            add_task(
-                sample_task_data['topic'],
-                sample_task_data['description'],
-                sample_task_data['due'],
-                sample_task_data['status'],
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
+            results = search_tasks("due", "topic", strategy="impact_only")
+            assert results['topic'].tolist() == ["Due later", "Due today"]
+            assert results['priority'].tolist() == [8, 6]
+        finally:
+            del todo_core.SCORING_STRATEGIES["impact_only"]
+    
+    def test_unknown_strategy_rejected(self, app_db):
+        """Test that an unknown strategy name raises ValueError"""
+        with pytest.raises(ValueError):
+            get_all_tasks(strategy='nonexistent')
+
+class TestExpirySweep:
+    """Tests for the watermarked, rate-limited expiry sweep"""
+    
+    def _add_task_created_days_ago(self, topic, days, status='Pending'):
+        import todo_core
+        from datetime import datetime, timedelta, timezone
+        created = datetime.now(timezone.utc) - timedelta(days=days)
+        with todo_core.transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (topic, status, created_at) VALUES (?, ?, ?)",
+                (topic, status, created.strftime('%Y-%m-%d %H:%M:%S'))
             )
+    
+    def _status_of(self, topic):
+        tasks = get_all_tasks()
+        return tasks[tasks['topic'] == topic].iloc[0]['status']
+    
+    def test_old_tasks_expire(self, app_db):
+        """Test that open tasks older than 90 days expire and others are left alone"""
+        from todo_core import check_and_update_expired_tasks
+        
+        self._add_task_created_days_ago('Stale', 120)
+        self._add_task_created_days_ago('Stale but done', 120, 'Completed')
+        self._add_task_created_days_ago('Fresh', 10)
+        
+        assert check_and_update_expired_tasks() == 1
+        assert self._status_of('Stale') == 'Expired'
+        assert self._status_of('Stale but done') == 'Completed'
+        assert self._status_of('Fresh') == 'Pending'
+    
+    def test_sweep_skipped_within_interval(self, app_db):
+        """Test that a rate-limited sweep does nothing until the interval has passed"""
+        from datetime import timedelta
+        from todo_core import check_and_update_expired_tasks
+        
+        assert check_and_update_expired_tasks(min_interval=timedelta(minutes=15)) == 0
+        self._add_task_created_days_ago('Stale', 120)
+        
+        assert check_and_update_expired_tasks(min_interval=timedelta(minutes=15)) == 0
+        assert self._status_of('Stale') == 'Pending'
+    
+    def test_watermark_limits_sweep_to_newly_crossed_rows(self, app_db):
+        """Test that a task moved back out of Expired is not re-expired by later sweeps"""
+        from todo_core import check_and_update_expired_tasks
+        
+        self._add_task_created_days_ago('Stale', 120)
+        assert check_and_update_expired_tasks() == 1
+        
+        task = get_all_tasks().iloc[0]
+        update_task(task['id'], task['topic'], task['description'], task['due'], 'Pending', 1, 1, 1)
+        
+        assert check_and_update_expired_tasks() == 0
+        assert self._status_of('Stale') == 'Pending'
+    
+    def test_watermark_persists_across_connections(self, app_db):
+        """Test that the watermark is stored in the database, not in memory"""
+        from todo_core import check_and_update_expired_tasks, close_database
+        
+        check_and_update_expired_tasks()
+        close_database()
+        
+        conn = sqlite3.connect(app_db, uri=True)
+        watermark = conn.execute("SELECT value FROM app_meta WHERE key = 'expiry_watermark'").fetchone()
+        conn.close()
+        assert watermark is not None
+
+class TestCompletedAt:
+    """Tests for the completed_at column"""
+    
+    def _completed_at(self, task_id):
+        import todo_core
+        with todo_core._db.connection() as conn:
+            return conn.execute("SELECT completed_at FROM tasks WHERE id = ?", (task_id,)).fetchone()[0]
+    
+    def test_completed_at_follows_status(self, app_db):
+        """Test that completed_at is stamped on completion and cleared when reopened"""
+        done = add_task("Done", "", None, 'Completed', 5, 5, 5)
+        open_task = add_task("Open", "", None, 'Pending', 5, 5, 5)
+        assert self._completed_at(done) is not None
+        assert self._completed_at(open_task) is None
+        
+        update_task(open_task, "Open", "", None, 'Completed', 5, 5, 5)
+        assert self._completed_at(open_task) is not None
+        
+        update_task(done, "Done", "", None, 'In Progress', 5, 5, 5)
+        assert self._completed_at(done) is None
+    
+    def test_completing_task_without_status_stamps_it(self, app_db):
+        """Test that a task whose status is NULL gets completed_at when it is completed"""
+        import todo_core
+        
+        task_id = add_task("No status", "", None, 'Pending', 5, 5, 5)
+        with todo_core.transaction() as conn:
+            conn.execute("UPDATE tasks SET status = NULL WHERE id = ?", (task_id,))
+        assert self._completed_at(task_id) is None
+        
+        update_task(task_id, "No status", "", None, 'Completed', 5, 5, 5)
+        assert self._completed_at(task_id) is not None
+    
+    def test_outdated_completion_trigger_is_replaced(self, app_db):
+        """Test that opening a database with the NULL-unsafe trigger condition fixes it"""
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.executescript("""
+            DROP TRIGGER tasks_completed_at_au;
+            CREATE TRIGGER tasks_completed_at_au AFTER UPDATE OF status ON tasks
+            WHEN (new.status = 'Completed') != (old.status = 'Completed') BEGIN
+                UPDATE tasks SET completed_at = NULL WHERE id = new.id;
+            END;
+        """)
+        conn.close()
+        init_database()
+        
+        task_id = add_task("Reopened", "", None, 'Pending', 5, 5, 5)
+        update_task(task_id, "Reopened", "", None, 'Completed', 5, 5, 5)
+        assert self._completed_at(task_id) is not None
+    
+    def test_editing_old_completed_task_keeps_completion_time(self, app_db):
+        """Test that editing a task completed long ago does not bring it back into Done Today"""
+        import todo_core
+        from todo_core import get_completed_tasks_in_range, completion_summary
+        
+        task_id = add_task("Done long ago", "", None, 'Completed', 5, 5, 5)
+        with todo_core.transaction() as conn:
+            conn.execute("UPDATE tasks SET completed_at = datetime('now', '-60 days') WHERE id = ?", (task_id,))
+        completed_at = self._completed_at(task_id)
+        
+        update_task(task_id, "Done long ago", "New description", None, 'Completed', 7, 5, 5)
+        
+        assert self._completed_at(task_id) == completed_at
+        assert len(get_completed_tasks_in_range(31)) == 0
+        assert completion_summary(31)['completed'] == 0
+    
+    def test_existing_database_is_migrated(self, app_db):
+        """Test that a database without completed_at is backfilled from updated_at"""
+        import todo_core
+        
+        todo_core.close_database()
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.executescript("""
+            DROP TABLE tasks_fts;
+            DROP TABLE daily_completions;
+            DROP TABLE tasks;
+            CREATE TABLE tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, description TEXT,
+                due DATE, status TEXT DEFAULT 'Pending', impact INTEGER DEFAULT 1,
+                tractability INTEGER DEFAULT 1, uncertainty INTEGER DEFAULT 1, score REAL DEFAULT 0.0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO tasks (topic, status, impact, score, updated_at) VALUES
+                ('Legacy done', 'Completed', 8, 4.0, '2024-05-01 10:00:00'),
+                ('Legacy open', 'Pending', 3, 1.0, '2024-05-02 10:00:00');
+        """)
+        conn.close()
+        
+        init_database()
+        
+        tasks = get_all_tasks().set_index('topic')
+        assert tasks.loc['Legacy done', 'completed_at'] == pd.Timestamp('2024-05-01 10:00:00')
+        assert pd.isna(tasks.loc['Legacy open', 'completed_at'])
+        with todo_core._db.connection() as conn:
+            rollup = conn.execute("SELECT day, completed, total_impact FROM daily_completions").fetchall()
+        assert rollup == [('2024-05-01', 1, 8)]
+
+class TestCompletionRollup:
+    """Tests for the trigger-maintained daily completion rollup"""
+    
+    def _recomputed(self, conn):
+        return conn.execute('''
+            SELECT date(completed_at), COUNT(*), SUM(impact), ROUND(SUM(score), 6), SUM(impact >= 7), SUM(score >= 5.0)
+            FROM tasks WHERE status = 'Completed' GROUP BY date(completed_at) ORDER BY 1
+        ''').fetchall()
+    
+    def _rollup(self, conn):
+        return conn.execute('''
+            SELECT day, completed, total_impact, ROUND(total_score, 6), high_impact, high_score
+            FROM daily_completions WHERE completed != 0 ORDER BY day
+        ''').fetchall()
+    
+    def test_rollup_follows_inserts_updates_and_deletes(self, app_db):
+        """Test that the rollup always equals an aggregate over the raw rows"""
+        import todo_core
+        
+        ids = [add_task(f"Task {i}", "", None, 'Completed' if i % 2 else 'Pending', i + 1, 5, 2) for i in range(8)]
+        with todo_core.transaction() as conn:
+            # Spread completions over several days
+            conn.execute("UPDATE tasks SET completed_at = datetime('now', '-' || (id % 3) || ' days') WHERE completed_at IS NOT NULL")
+        update_task(ids[0], "Task 0", "", None, 'Completed', 9, 9, 1)
+        update_task(ids[1], "Task 1", "", None, 'Pending', 2, 5, 2)
+        update_task(ids[3], "Task 3", "", None, 'Completed', 8, 8, 8)
+        delete_task(ids[5])
+        
+        with todo_core._db.connection() as conn:
+            assert self._rollup(conn) == self._recomputed(conn)
+            assert self._rollup(conn)
+    
+    def test_rollup_is_backfilled_for_existing_databases(self, app_db):
+        """Test that a database created before the rollup gets it filled on first open"""
+        import todo_core
+        
+        add_task("Done", "", None, 'Completed', 8, 5, 2)
+        add_task("Also done", "", None, 'Completed', 3, 5, 2)
+        with todo_core.transaction() as conn:
+            conn.execute("DROP TABLE daily_completions")
+        init_database()
+        
+        with todo_core._db.connection() as conn:
+            assert self._rollup(conn) == self._recomputed(conn)
+            assert self._rollup(conn)[0][1] == 2
+    
+    def test_completion_summary_and_daily_series(self, app_db):
+        """Test the Done Today readers against the listing of the same window"""
+        import todo_core
+        from todo_core import completion_summary, get_daily_completions, get_completed_tasks_in_range
+        
+        for i in range(6):
+            add_task(f"Task {i}", "", None, 'Completed', i + 3, 5, 2)
+        add_task("Open", "", None, 'Pending', 9, 9, 1)
+        with todo_core.transaction() as conn:
+            conn.execute("UPDATE tasks SET completed_at = datetime('now', '-' || (id % 4) || ' days') WHERE completed_at IS NOT NULL")
+        
+        for days_back in (1, 3, 31):
+            completed = get_completed_tasks_in_range(days_back)
+            summary = completion_summary(days_back)
+            assert summary['completed'] == len(completed)
+            assert summary['total_impact'] == completed['impact'].sum()
+            assert summary['high_impact'] == (completed['impact'] >= 7).sum()
+            assert summary['avg_score'] == pytest.approx(completed['score'].mean())
             
-            # Verify we can still connect and read
-            tasks = get_all_tasks()
-            assert len(tasks) == 1
-            
-            # Force garbage collection to close any lingering connections
-            import gc
-            gc.collect()
-            
-            # Verify we can still read after GC
-            tasks_after_gc = get_all_tasks()
-            assert len(tasks_after_gc) == 1
-            assert tasks_after_gc.iloc[0]['topic'] == sample_task_data['topic']
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db) 
\ No newline at end of file
+            daily = get_daily_completions(days_back)
+            assert len(daily) == days_back
+            assert daily['completed'].sum() == len(completed)
+        
+        assert completion_summary(1)['avg_score'] is not None
+        assert get_daily_completions(3)['day'].is_monotonic_increasing
+
+class TestQueryCache:
+    """Tests for the change-token invalidated reader cache"""
+    
+    def _count_selects(self):
+        import todo_core
+        statements = []
+        with todo_core._db.connection() as conn:
+            conn.set_trace_callback(statements.append)
+        return statements
+    
+    def _selects(self, statements):
+        return [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    
+    def test_repeat_reads_served_from_cache(self, app_db, sample_task_data):
+        """Test that an unchanged database is not queried again for the same read"""
+        add_task(*sample_task_data.values())
+        first = get_all_tasks(statuses=['Pending'])
+        
+        statements = self._count_selects()
+        second = get_all_tasks(statuses=['Pending'])
+        
+        assert self._selects(statements) == []
+        pd.testing.assert_frame_equal(first, second)
+    
+    def test_app_reruns_share_cache_entries(self, app_db, sample_task_data):
+        """Test that the start of every app rerun leaves the change token and cached reads alone"""
+        from todo_core import EXPIRY_SWEEP_INTERVAL, check_and_update_expired_tasks, database_change_token
+
+        def rerun():
+            init_database()
+            check_and_update_expired_tasks(min_interval=EXPIRY_SWEEP_INTERVAL)
+            return get_all_tasks(statuses=['Pending'])
+
+        add_task(*sample_task_data.values())
+        first = rerun()
+        token = database_change_token()
+
+        statements = self._count_selects()
+        second = rerun()
+
+        assert database_change_token() == token
+        assert [sql for sql in self._selects(statements) if 'FROM tasks' in sql] == []
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_cached_frames_are_copies(self, app_db, sample_task_data):
+        """Test that mutating a returned frame does not affect later reads"""
+        add_task(*sample_task_data.values())
+        tasks = get_all_tasks()
+        tasks.loc[0, 'topic'] = 'Mutated'
+        
+        assert get_all_tasks().iloc[0]['topic'] == sample_task_data['topic']
+    
+    def test_cached_summaries_are_copies(self, app_db, sample_task_data):
+        """Test that mutating a returned summary dict does not affect later reads"""
+        from todo_core import task_summary
+        add_task(*sample_task_data.values())
+        summary = task_summary()
+        summary['total'] = 99
+        
+        assert task_summary()['total'] == 1
+    
+    def test_cached_reads_ignore_half_imported_pandas(self, app_db, sample_task_data, monkeypatch):
+        """Test that a pandas import still running on another thread does not break cached reads"""
+        import types
+        from todo_core import get_task_records
+        add_task(*sample_task_data.values())
+        get_task_records()
+        
+        monkeypatch.setitem(sys.modules, 'pandas', types.ModuleType('pandas'))
+        assert [task.topic for task in get_task_records()] == [sample_task_data['topic']]
+    
+    def test_writes_invalidate_cache(self, app_db, sample_task_data):
+        """Test that add, update, delete and the expiry sweep all invalidate cached reads"""
+        from todo_core import check_and_update_expired_tasks, search_tasks
+        
+        add_task(*sample_task_data.values())
+        assert len(get_all_tasks()) == 1
+        assert len(search_tasks('test')) == 1
+        
+        task_id = get_all_tasks().iloc[0]['id']
+        update_task(task_id, 'Renamed', '', None, 'Completed', 1, 1, 1)
+        assert get_all_tasks().iloc[0]['topic'] == 'Renamed'
+        assert len(search_tasks('test')) == 0
+        
+        import todo_core
+        with todo_core.transaction() as conn:
+            conn.execute("INSERT INTO tasks (topic, created_at) VALUES ('Ancient', '2000-01-01 00:00:00')")
+        assert len(get_all_tasks(statuses=['Expired'])) == 0
+        assert check_and_update_expired_tasks() == 1
+        assert len(get_all_tasks(statuses=['Expired'])) == 1
+        
+        delete_task(task_id)
+        assert len(get_all_tasks()) == 1
+    
+    def test_other_connection_writes_invalidate_cache(self, app_db, sample_task_data):
+        """Test that a commit from another connection (e.g. another process) is seen"""
+        add_task(*sample_task_data.values())
+        assert len(get_all_tasks()) == 1
+        
+        conn = sqlite3.connect(app_db, uri=True)
+        conn.execute("INSERT INTO tasks (topic) VALUES ('From elsewhere')")
+        conn.commit()
+        conn.close()
+        
+        assert len(get_all_tasks()) == 2
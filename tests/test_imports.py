@@ -0,0 +1,77 @@
+import pytest
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+# Generous for slow CI machines; importing todo_core takes a few tens of milliseconds
+IMPORT_BUDGET_SECONDS = 0.5
+
+def _import_in_fresh_interpreter(module, cwd):
+    """Import module in a new interpreter run in cwd; returns (seconds, loaded module names)."""
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        "print(' '.join(sys.modules))\n"
+    )
+    env = {**os.environ, "PYTHONPATH": str(PACKAGE_DIR)}
+    result = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    seconds, modules = result.stdout.splitlines()[-2:]
+    return float(seconds), set(modules.split())
+
+class TestImportCost:
+    """Test that the data layer can be imported without the UI stack or side effects"""
+
+    @pytest.mark.parametrize("module", ["todo_core", "todo_api", "todo_cli", "todo_async"])
+    def test_no_ui_or_dataframe_imports(self, module, tmp_path):
+        """Test that importing the core and its clients loads neither Streamlit nor pandas"""
+        _, modules = _import_in_fresh_interpreter(module, tmp_path)
+        assert not {"streamlit", "pandas", "numpy"} & modules
+
+    def test_import_is_fast_and_touches_no_files(self, tmp_path):
+        """Test that importing todo_core stays within budget and creates no database"""
+        seconds, _ = _import_in_fresh_interpreter("todo_core", tmp_path)
+        assert seconds < IMPORT_BUDGET_SECONDS
+        assert list(tmp_path.iterdir()) == []
+
+    def test_record_readers_and_api_lists_need_no_pandas(self, tmp_path):
+        """Test that Task record reads and the API's list endpoints never load pandas"""
+        code = (
+            "import sys, todo_core, todo_api\n"
+            "todo_core.init_database()\n"
+            "task_id = todo_core.add_task('Write report', '', None, 'Pending', 5, 5, 5)\n"
+            "todo_core.get_task_by_id(task_id)\n"
+            "todo_core.get_task_records()\n"
+            "todo_core.get_task_records_page(page_size=10)\n"
+            "todo_core.search_task_records('report')\n"
+            "for path in ('/tasks', '/tasks?limit=5', '/search?q=report', '/completed'):\n"
+            "    status, payload = todo_api.handle('GET', path.split('?')[0],\n"
+            "                                      todo_api.parse_qs(path.partition('?')[2]))\n"
+            "    assert status == 200\n"
+            "    ''.join(payload)  # drain streamed lists\n"
+            "print('pandas' in sys.modules)\n"
+        )
+        env = {**os.environ, "PYTHONPATH": str(PACKAGE_DIR), "TODO_DB_PATH": ":memory:"}
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.split() == ["False"]
+
+    def test_ui_module_reexports_core(self):
+        """Test that todo_app still exposes the data functions for existing callers"""
+        import todo_app
+        import todo_core
+        assert todo_app.add_task is todo_core.add_task
+        assert todo_app.calculate_score is todo_core.calculate_score
+
+    def test_star_import_brings_only_the_public_api(self):
+        """Test that todo_app's star import re-exports todo_core's API and none of its imports"""
+        import todo_app
+        import todo_core
+        assert all(hasattr(todo_core, name) for name in todo_core.__all__)
+        assert not any(name.startswith('_') for name in todo_core.__all__)
+        assert not {'os', 're', 'json', 'random', 'sys', 'time', 'sqlite3'} & set(vars(todo_app))
+        assert todo_app.TaskCache is todo_core.TaskCache
@@ -5,8 +5,8 @@ import os
 import sys
 from pathlib import Path
 
-# Import the functions from todo_app
-from todo_app import (
+# Import the functions from todo_core
+from todo_core import (
     init_database, add_task, get_all_tasks, update_task, 
     delete_task, get_task_by_id, calculate_score
 )
@@ -14,218 +14,256 @@ from todo_app import (
 class TestTodoIntegration:
     """Integration tests for the complete todo application workflow"""
     
-    def test_database_initialization(self, temp_db):
+    def test_database_initialization(self, file_db):
         """Test that the database can be initialized properly"""
-        # Temporarily set the database path
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
-        
-        try:
-            # Create a symbolic link or copy to the temp database
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize the database
-            init_database()
-            
-            # Verify the table was created
-            conn = sqlite3.connect(original_db)
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'")
-            result = cursor.fetchone()
-            conn.close()
-            
-            assert result is not None
-            assert result[0] == 'tasks'
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+        # Initialize the database
+        init_database()
+        
+        # Verify the table was created
+        conn = sqlite3.connect(file_db)
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='tasks'")
+        result = cursor.fetchone()
+        conn.close()
+        
+        assert result is not None
+        assert result[0] == 'tasks'
     
-    def test_complete_task_workflow(self, temp_db, sample_task_data):
+    def test_complete_task_workflow(self, file_db, sample_task_data):
         """Test the complete workflow: add, read, update, delete"""
-        # Set up temporary database
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
-        
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # 1. Add task
-            add_task(
-                sample_task_data['topic'],
-                sample_task_data['description'],
-                sample_task_data['due'],
-                sample_task_data['status'],
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
-            )
-            
-            # 2. Read tasks and verify
-            tasks = get_all_tasks()
-            assert len(tasks) == 1
-            assert tasks.iloc[0]['topic'] == sample_task_data['topic']
-            assert tasks.iloc[0]['description'] == sample_task_data['description']
-            assert tasks.iloc[0]['status'] == sample_task_data['status']
-            
-            # Verify score calculation
-            expected_score = calculate_score(
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
-            )
-            assert abs(tasks.iloc[0]['score'] - expected_score) < 0.01
-            
-            # 3. Update task
-            task_id = tasks.iloc[0]['id']
-            updated_data = {
-                'topic': 'Updated Task',
-                'description': 'Updated Description',
-                'due': '2024-01-02',
-                'status': 'In Progress',
-                'impact': 7,
-                'tractability': 6,
-                'uncertainty': 4
-            }
-            
-            update_task(
-                task_id,
-                updated_data['topic'],
-                updated_data['description'],
-                updated_data['due'],
-                updated_data['status'],
-                updated_data['impact'],
-                updated_data['tractability'],
-                updated_data['uncertainty']
-            )
-            
-            # 4. Verify update
-            updated_tasks = get_all_tasks()
-            assert len(updated_tasks) == 1
-            assert updated_tasks.iloc[0]['topic'] == updated_data['topic']
-            assert updated_tasks.iloc[0]['status'] == updated_data['status']
-            assert updated_tasks.iloc[0]['description'] == updated_data['description']
-            
-            # Verify updated score
-            expected_updated_score = calculate_score(
-                updated_data['impact'],
-                updated_data['tractability'],
-                updated_data['uncertainty']
-            )
-            assert abs(updated_tasks.iloc[0]['score'] - expected_updated_score) < 0.01
-            
-            # 5. Test get_task_by_id
-            retrieved_task = get_task_by_id(task_id)
-            assert retrieved_task is not None
-            assert retrieved_task[1] == updated_data['topic']  # topic is at index 1
-            
-            # 6. Delete task
-            delete_task(task_id)
-            
-            # 7. Verify deletion
-            final_tasks = get_all_tasks()
-            assert len(final_tasks) == 0
-            
-            # Verify task is really gone
-            deleted_task = get_task_by_id(task_id)
-            assert deleted_task is None
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
+        # Initialize database
+        init_database()
+        
+        # 1. Add task
+        add_task(
+            sample_task_data['topic'],
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # 2. Read tasks and verify
+        tasks = get_all_tasks()
+        assert len(tasks) == 1
+        assert tasks.iloc[0]['topic'] == sample_task_data['topic']
+        assert tasks.iloc[0]['description'] == sample_task_data['description']
+        assert tasks.iloc[0]['status'] == sample_task_data['status']
+        
+        # Verify score calculation
+        expected_score = calculate_score(
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        assert abs(tasks.iloc[0]['score'] - expected_score) < 0.01
+        
+        # 3. Update task
+        task_id = tasks.iloc[0]['id']
+        updated_data = {
+            'topic': 'Updated Task',
+            'description': 'Updated Description',
+            'due': '2024-01-02',
+            'status': 'In Progress',
+            'impact': 7,
+            'tractability': 6,
+            'uncertainty': 4
+        }
+        
+        update_task(
+            task_id,
+            updated_data['topic'],
+            updated_data['description'],
+            updated_data['due'],
+            updated_data['status'],
+            updated_data['impact'],
+            updated_data['tractability'],
+            updated_data['uncertainty']
+        )
+        
+        # 4. Verify update
+        updated_tasks = get_all_tasks()
+        assert len(updated_tasks) == 1
+        assert updated_tasks.iloc[0]['topic'] == updated_data['topic']
+        assert updated_tasks.iloc[0]['status'] == updated_data['status']
+        assert updated_tasks.iloc[0]['description'] == updated_data['description']
+        
+        # Verify updated score
+        expected_updated_score = calculate_score(
+            updated_data['impact'],
+            updated_data['tractability'],
+            updated_data['uncertainty']
+        )
+        assert abs(updated_tasks.iloc[0]['score'] - expected_updated_score) < 0.01
+        
+        # 5. Test get_task_by_id
+        retrieved_task = get_task_by_id(task_id)
+        assert retrieved_task is not None
+        assert retrieved_task[1] == updated_data['topic']  # topic is at index 1
+        
+        # 6. Delete task
+        delete_task(task_id)
+        
+        # 7. Verify deletion
+        final_tasks = get_all_tasks()
+        assert len(final_tasks) == 0
+        
+        # Verify task is really gone
+        deleted_task = get_task_by_id(task_id)
+        assert deleted_task is None
     
-    def test_multiple_tasks_ordering(self, temp_db, sample_tasks):
+    def test_multiple_tasks_ordering(self, file_db, sample_tasks):
         """Test that multiple tasks are properly ordered by score and due date"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
-        
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Add multiple tasks
-            for task_data in sample_tasks:
-                add_task(
-                    task_data['topic'],
-                    task_data['description'],
-                    task_data['due'],
-                    task_data['status'],
-                    task_data['impact'],
-                    task_data['tractability'],
-                    task_data['uncertainty']
-                )
-            
-            # Get all tasks
-            tasks = get_all_tasks()
-            assert len(tasks) == 3
-            
-            # Verify ordering by score (descending) and due date (ascending)
-            scores = tasks['score'].tolist()
-            assert scores == sorted(scores, reverse=True)
-            
-            # Verify that tasks with same score are ordered by due date
-            # (This would require more complex logic in a real scenario)
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db)
-    
-    def test_task_persistence(self, temp_db, sample_task_data):
-        """Test that tasks persist across database connections"""
-        original_db = 'todo.db'
-        if os.path.exists(original_db):
-            os.rename(original_db, original_db + '.backup')
-        
-        try:
-            import shutil
-            shutil.copy2(temp_db, original_db)
-            
-            # Initialize database
-            init_database()
-            
-            # Add a task
+        # Initialize database
+        init_database()
+        
+        # Add multiple tasks
+        for task_data in sample_tasks:
             add_task(
-                sample_task_data['topic'],
-                sample_task_data['description'],
-                sample_task_data['due'],
-                sample_task_data['status'],
-                sample_task_data['impact'],
-                sample_task_data['tractability'],
-                sample_task_data['uncertainty']
+                task_data['topic'],
+                task_data['description'],
+                task_data['due'],
+                task_data['status'],
+                task_data['impact'],
+                task_data['tractability'],
+                task_data['uncertainty']
             )
-            
-            # Close any existing connections
-            import gc
-            gc.collect()
-            
-            # Verify task still exists
-            tasks = get_all_tasks()
-            assert len(tasks) == 1
-            assert tasks.iloc[0]['topic'] == sample_task_data['topic']
-            
-        finally:
-            # Cleanup
-            if os.path.exists(original_db):
-                os.unlink(original_db)
-            if os.path.exists(original_db + '.backup'):
-                os.rename(original_db + '.backup', original_db) 
\ No newline at end of file
+        
+        # Get all tasks
+        tasks = get_all_tasks()
+        assert len(tasks) == 3
+        
+        # Verify ordering by score (descending) and due date (ascending)
+        scores = tasks['score'].tolist()
+        assert scores == sorted(scores, reverse=True)
+        
+        # Verify that tasks with same score are ordered by due date
+        # (This would require more complex logic in a real scenario)
+    
+    def test_task_persistence(self, file_db, sample_task_data):
+        """Test that tasks persist across database connections"""
+        # Initialize database
+        init_database()
+        
+        # Add a task
+        add_task(
+            sample_task_data['topic'],
+            sample_task_data['description'],
+            sample_task_data['due'],
+            sample_task_data['status'],
+            sample_task_data['impact'],
+            sample_task_data['tractability'],
+            sample_task_data['uncertainty']
+        )
+        
+        # Close any existing connections
+        import gc
+        gc.collect()
+        
+        # Verify task still exists
+        tasks = get_all_tasks()
+        assert len(tasks) == 1
+        assert tasks.iloc[0]['topic'] == sample_task_data['topic']
+
+class TestBulkImport:
+    """Tests for streaming CSV/JSONL import"""
+    
+    CSV_DATA = (
+        "topic,description,due,status,impact,tractability,uncertainty\n"
+        "Write report,Quarterly numbers,2024-12-31,Pending,9,8,2\n"
+        "No description,,2024-12-31,Pending,5,5,5\n"
+        ",No topic here,,Pending,5,5,5\n"
+        "Bad status,,,Someday,5,5,5\n"
+        "Bad rating,,,Pending,11,5,5\n"
+        "Bad date,,31/12/2024,Pending,5,5,5\n"
+        "Defaults only,,,,,,\n"
+    )
+    
+    def test_csv_import_validates_rows(self, app_db):
+        """Test that valid CSV rows are imported and invalid ones reported by line"""
+        from todo_core import import_tasks
+        import io
+        
+        result = import_tasks(io.StringIO(self.CSV_DATA), "csv")
+        
+        assert result["imported"] == 3
+        assert result["rejected"] == 4
+        assert [line for line, _ in result["errors"]] == [4, 5, 6, 7]
+        assert "topic" in result["errors"][0][1]
+        assert "status" in result["errors"][1][1]
+        assert "impact" in result["errors"][2][1]
+        assert "due" in result["errors"][3][1]
+        
+        tasks = get_all_tasks()
+        report = tasks[tasks['topic'] == 'Write report'].iloc[0]
+        assert report['score'] == calculate_score(9, 8, 2)
+        assert report['due'] == pd.Timestamp('2024-12-31')
+        from todo_core import search_tasks
+        assert search_tasks('quarterly')['topic'].tolist() == ['Write report']
+        
+        defaults = tasks[tasks['topic'] == 'Defaults only'].iloc[0]
+        assert defaults['status'] == 'Pending'
+        assert (defaults['impact'], defaults['tractability'], defaults['uncertainty']) == (5, 5, 5)
+    
+    def test_jsonl_import(self, app_db):
+        """Test JSONL import, including malformed lines"""
+        from todo_core import import_tasks
+        import io
+        
+        data = (
+            '{"topic": "From JSON", "impact": 7, "tractability": "3", "uncertainty": 2, "status": "In Progress"}\n'
+            '\n'
+            '{"topic": "Broken"\n'
+            '["not", "an", "object"]\n'
+            '{"topic": "Fractional", "impact": 2.5}\n'
+        )
+        result = import_tasks(io.StringIO(data), "jsonl")
+        
+        assert result["imported"] == 1
+        assert [line for line, _ in result["errors"]] == [3, 4, 5]
+        task = get_all_tasks().iloc[0]
+        assert task['topic'] == 'From JSON'
+        assert task['score'] == calculate_score(7, 3, 2)
+    
+    def test_chunked_import_reports_progress(self, app_db):
+        """Test that large imports are inserted chunk by chunk with progress callbacks"""
+        from todo_core import import_tasks
+        import io
+        
+        lines = ["topic,impact,tractability,uncertainty"]
+        lines += [f"Task {i},{i % 10 + 1},5,5" for i in range(2500)]
+        calls = []
+        result = import_tasks(io.StringIO("\n".join(lines)), "csv", chunk_size=1000,
+                              progress=lambda *counts: calls.append(counts))
+        
+        assert result["imported"] == 2500
+        assert calls == [(1000, 1000, 0), (2000, 2000, 0), (2500, 2500, 0)]
+        assert len(get_all_tasks()) == 2500
+    
+    def test_atomic_import_rolls_back_on_failure(self, app_db):
+        """Test that an atomic import leaves no rows behind when it fails part-way"""
+        from todo_core import import_tasks
+        import io
+        
+        def fail_after_first_chunk(rows_read, imported, rejected):
+            raise RuntimeError("upload cancelled")
+        
+        data = "topic\n" + "\n".join(f"Task {i}" for i in range(20))
+        with pytest.raises(RuntimeError):
+            import_tasks(io.StringIO(data), "csv", chunk_size=10, progress=fail_after_first_chunk)
+        assert len(get_all_tasks()) == 0
+        
+        with pytest.raises(RuntimeError):
+            import_tasks(io.StringIO(data), "csv", chunk_size=10, atomic=False,
+                         progress=fail_after_first_chunk)
+        assert len(get_all_tasks()) == 10
+    
+    def test_unknown_format_rejected(self, app_db):
+        """Test that unsupported formats raise a clear error"""
+        from todo_core import import_tasks
+        import io
+        
+        with pytest.raises(ValueError):
+            import_tasks(io.StringIO("topic\nTask"), "xml")
@@ -0,0 +1,386 @@
+"""HTTP/JSON API over the task store, for scripts and automation.
+
+Runs on the standard library's threading HTTP server with HTTP/1.1 keep-alive, and
+every request shares todo_core's single SQLite connection. Usage:
+
+    python todo_api.py [--host 127.0.0.1] [--port 8502] [--db todo.db]
+
+Endpoints:
+
+    GET    /tasks?status=...&strategy=...    every task, streamed as a JSON array
+    GET    /tasks?limit=N[&after=CURSOR]     one page: {"tasks": [...], "next": CURSOR or null}
+    POST   /tasks                            create a task from a JSON object; returns {"id": ...}
+    GET    /tasks/ID                         one task
+    PUT    /tasks/ID                         update the given fields of a task
+    DELETE /tasks/ID                         delete a task
+    GET    /search?q=...&by=...&status=...   search results, as returned by search_tasks
+    GET    /completed?days=N                 tasks completed in the last N days
+    GET    /summary?status=...&q=...&by=...  footer metrics, as returned by task_summary
+    POST   /batch                            {"operations": [{"method", "path", "body"}, ...],
+                                              "atomic": true}; runs every operation in one request
+
+GET responses carry an ETag derived from the database change token; send it back as
+If-None-Match to get 304 Not Modified while nothing has changed.
+"""
+
+import argparse
+import json
+import re
+import secrets
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import todo_core
+
+DEFAULT_PORT = 8502
+STREAM_PAGE_SIZE = 1000  # rows read per keyset page while streaming a task list
+MAX_PAGE_SIZE = 10_000
+MAX_BATCH_OPERATIONS = 10_000
+
+# Distinguishes ETags of this server process from those of earlier runs, whose
+# change tokens started from the same numbers
+_BOOT_ID = secrets.token_hex(4)
+
+class ApiError(Exception):
+    """An error reported to the client as {"error": message} with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+class _Rollback(Exception):
+    """Raised to undo an atomic batch after one of its operations failed."""
+
+def _task_dict(task):
+    return task.as_dict()
+
+def _records_json(tasks):
+    # Task records hold plain SQLite values, so the json module serializes them directly
+    return json.dumps([task.as_dict() for task in tasks])
+
+def _statuses(query):
+    statuses = query.get("status")
+    if statuses is None:
+        return None
+    # ?status=Pending&status=Completed and ?status=Pending,Completed both work
+    statuses = [s for value in statuses for s in value.split(",") if s]
+    unknown = set(statuses) - set(todo_core.TASK_STATUSES)
+    if unknown:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown status {sorted(unknown)[0]!r}")
+    return statuses
+
+def _single(query, name, default=None):
+    values = query.get(name)
+    return values[-1] if values else default
+
+def _int_param(query, name, default, minimum, maximum):
+    value = _single(query, name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if not minimum <= value <= maximum:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be between {minimum} and {maximum}")
+    return value
+
+def _strategy(query):
+    strategy = _single(query, "strategy")
+    if strategy is not None and strategy not in todo_core.SCORING_STRATEGIES:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown strategy {strategy!r}")
+    return strategy
+
+def _cursor(query):
+    value = _single(query, "after")
+    if value is None:
+        return None
+    try:
+        priority, due, task_id = json.loads(value)
+        return float(priority), due, int(task_id)
+    except (ValueError, TypeError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "after must be a cursor returned as next")
+
+def _get_task(task_id):
+    row = todo_core.get_task_by_id(task_id)
+    if row is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"task {task_id} not found")
+    return row
+
+def _validated(record):
+    if not isinstance(record, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "request body must be a JSON object")
+    try:
+        return todo_core.validate_task_record(record)
+    except ValueError as e:
+        raise ApiError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+
+def stream_tasks(statuses=None, strategy=None, page_size=STREAM_PAGE_SIZE):
+    """Yield the JSON array of every matching task in chunks, one keyset page at a time.
+
+    Memory stays bounded by page_size however many tasks there are. Each page is read
+    consistently; writes made while the list streams may or may not be included.
+    """
+    yield "["
+    after, first = None, True
+    while True:
+        page, has_more = todo_core.get_task_records_page(statuses, page_size, after=after, strategy=strategy)
+        if page:
+            yield ("" if first else ",") + _records_json(page)[1:-1]
+            first = False
+        if not has_more:
+            break
+        after = todo_core.task_page_key(page[-1])
+    yield "]"
+
+def handle(method, path, query=None, body=None):
+    """Run one API operation and return (status, payload).
+
+    payload is a JSON-serializable value, a str of ready-made JSON, an iterator of JSON
+    text chunks (for streamed lists), or None for an empty response. Raises ApiError for
+    client errors. The HTTP handler and /batch both go through here.
+    """
+    query = query or {}
+    segments = [segment for segment in path.split("/") if segment]
+
+    if segments == ["tasks"]:
+        if method == "GET":
+            statuses, strategy = _statuses(query), _strategy(query)
+            if "limit" not in query:
+                return HTTPStatus.OK, stream_tasks(statuses, strategy)
+            limit = _int_param(query, "limit", None, 1, MAX_PAGE_SIZE)
+            page, has_more = todo_core.get_task_records_page(statuses, limit, after=_cursor(query), strategy=strategy)
+            next_cursor = json.dumps(todo_core.task_page_key(page[-1])) if has_more else "null"
+            return HTTPStatus.OK, f'{{"tasks": {_records_json(page)}, "next": {next_cursor}}}'
+        if method == "POST":
+            task_id = todo_core.add_task(*_validated(body))
+            return HTTPStatus.CREATED, {"id": task_id}
+
+    elif len(segments) == 2 and segments[0] == "tasks" and re.fullmatch(r"\d+", segments[1]):
+        task_id = int(segments[1])
+        if method == "GET":
+            return HTTPStatus.OK, _task_dict(_get_task(task_id))
+        if method == "PUT":
+            if not isinstance(body, dict):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "request body must be a JSON object")
+            with todo_core.transaction():
+                # Fields left out of the body keep their current values
+                current = _task_dict(_get_task(task_id))
+                fields = _validated({**current, **body})
+                todo_core.update_task(task_id, *fields)
+            return HTTPStatus.OK, _task_dict(_get_task(task_id))
+        if method == "DELETE":
+            if not todo_core.delete_task(task_id):
+                raise ApiError(HTTPStatus.NOT_FOUND, f"task {task_id} not found")
+            return HTTPStatus.NO_CONTENT, None
+
+    elif segments == ["search"] and method == "GET":
+        term = _single(query, "q")
+        if not term:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "q is required")
+        search_by = _single(query, "by", "all")
+        if search_by not in ("all", "topic", "description", "status"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"unknown search field {search_by!r}")
+        results = todo_core.search_task_records(term, search_by, statuses=_statuses(query),
+                                                strategy=_strategy(query))
+        return HTTPStatus.OK, _records_json(results)
+
+    elif segments == ["completed"] and method == "GET":
+        days = _int_param(query, "days", 1, 1, 3660)
+        cutoff = todo_core.completed_range_start(days)
+        return HTTPStatus.OK, _records_json(todo_core.get_completed_task_records_since(cutoff))
+
+    elif segments == ["summary"] and method == "GET":
+        summary = todo_core.task_summary(statuses=_statuses(query), search_term=_single(query, "q"),
+                                        search_by=_single(query, "by", "all"))
+        return HTTPStatus.OK, summary
+
+    elif segments == ["batch"] and method == "POST":
+        return run_batch(body)
+
+    else:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"no such endpoint {path!r}")
+    raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported on {path!r}")
+
+def _materialized(status, payload):
+    # Batch results are embedded in one JSON document, so streams are joined and JSON text parsed
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    elif payload is not None and not isinstance(payload, (dict, list)):
+        payload = json.loads("".join(payload))
+    return {"status": int(status), "body": payload}
+
+def _run_operation(operation):
+    if not isinstance(operation, dict) or not isinstance(operation.get("path"), str):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "each operation needs a method and a path")
+    if operation.get("path", "").rstrip("/").endswith("batch"):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "batches cannot be nested")
+    url = urlsplit(operation["path"])
+    status, payload = handle(str(operation.get("method", "GET")).upper(), url.path,
+                             parse_qs(url.query), operation.get("body"))
+    return _materialized(status, payload)
+
+@todo_core.retry_on_locked
+def _run_atomic(operations):
+    results = []
+    try:
+        with todo_core.transaction():
+            for index, operation in enumerate(operations):
+                try:
+                    results.append(_run_operation(operation))
+                except ApiError as e:
+                    results.append({"status": int(e.status), "body": {"error": e.message}})
+                    raise _Rollback(index)
+    except _Rollback as rollback:
+        return HTTPStatus.CONFLICT, {"error": "batch rolled back", "failed_operation": rollback.args[0],
+                                     "results": results}
+    return HTTPStatus.OK, {"results": results}
+
+def run_batch(body):
+    """Run {"operations": [...], "atomic": bool} and return every operation's status and body.
+
+    Atomic batches (the default) run in one transaction: one commit for the whole batch, and
+    nothing is applied if any operation fails. Otherwise each operation stands alone and
+    failures are reported in its result.
+    """
+    if not isinstance(body, dict) or not isinstance(body.get("operations"), list):
+        raise ApiError(HTTPStatus.BAD_REQUEST, 'batch body must be {"operations": [...]}')
+    operations = body["operations"]
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"at most {MAX_BATCH_OPERATIONS} operations per batch")
+    if body.get("atomic", True):
+        return _run_atomic(operations)
+    results = []
+    for operation in operations:
+        try:
+            results.append(_run_operation(operation))
+        except ApiError as e:
+            results.append({"status": int(e.status), "body": {"error": e.message}})
+        except Exception:
+            # The operations before it are already committed, so the client still needs their results
+            results.append({"status": int(HTTPStatus.INTERNAL_SERVER_ERROR), "body": {"error": "internal error"}})
+    return HTTPStatus.OK, {"results": results}
+
+def current_etag():
+    """ETag of the database state: changes whenever a read could return something different."""
+    generation, data_version = todo_core.database_change_token()
+    return f'"{_BOOT_ID}-{generation}-{data_version}-{datetime.now(timezone.utc).date():%Y%m%d}"'
+
+class TaskAPIHandler(BaseHTTPRequestHandler):
+    """Translate HTTP requests into handle() calls; keeps connections alive between requests."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TodoAPI/1.0"
+    # Headers and body go out as separate writes; without TCP_NODELAY, Nagle's algorithm and
+    # the client's delayed ACK hold every keep-alive response back by tens of milliseconds
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return None
+        try:
+            return json.loads(self.rfile.read(length))
+        except json.JSONDecodeError as e:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"invalid JSON body: {e.msg}")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        try:
+            body = self._read_body()
+            # Taken before the read, so a concurrent write can only make the tag stale-looking
+            etag = current_etag() if method == "GET" else None
+            status, payload = handle(method, url.path, parse_qs(url.query), body)
+            # Compared only once the read succeeded, so a missing task or path still gets its 404
+            if (etag is not None and status == HTTPStatus.OK
+                    and etag in (tag.strip() for tag in self.headers.get("If-None-Match", "").split(","))):
+                if hasattr(payload, "close"):
+                    payload.close()  # an unsent streamed list
+                self._send(HTTPStatus.NOT_MODIFIED, None, etag)
+                return
+        except ApiError as e:
+            status, payload, etag = e.status, {"error": e.message}, None
+        except Exception as e:
+            self.log_error("Unhandled error for %s %s: %r", method, self.path, e)
+            status, payload, etag = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, None
+        self._send(status, payload, etag)
+
+    def _send(self, status, payload, etag):
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if payload is None:
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_header("Content-Type", "application/json")
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            data = payload.encode()
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        # Streamed list: chunked transfer encoding, one chunk per keyset page
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in payload:
+            data = chunk.encode()
+            if data:
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+class TaskAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, verbose=False):
+        super().__init__(address, TaskAPIHandler)
+        self.verbose = verbose
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, verbose=False):
+    """Create the API server (call serve_forever() on it); port 0 picks a free port."""
+    todo_core.init_database()
+    return TaskAPIServer((host, port), verbose)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the task store as an HTTP/JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", help="database file (default: the app's todo.db)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    if args.db:
+        todo_core.configure_database(args.db)
+    server = make_server(args.host, args.port, args.verbose)
+    print(f"Serving the task API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        todo_core.close_database()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
-from datetime import datetime, timedelta
-import os
+from datetime import date, datetime, timezone
+import csv
+import functools
+import io
 import streamlit as st
-import sqlite3
 import pandas as pd
 
+# The storage and scoring layer; its public names are re-exported for existing callers
+from todo_core import *  # noqa: F401,F403
+
 def get_status_color(status):
     """Get the color for a given status."""
     status_colors = {
@@ -15,181 +19,36 @@ def get_status_color(status):
     }
     return status_colors.get(status, 'blue')  # default to blue if status not found
 
-# Page configuration
-st.set_page_config(
-    page_title="Todo List Manager",
-    page_icon="✅",
-    layout="wide"
-)
-
-# Database setup
-def init_database():
-    """Initialize the SQLite database and create the tasks table if it doesn't exist."""
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            topic TEXT NOT NULL,
-            description TEXT,
-            due DATE,
-            status TEXT DEFAULT 'Pending',
-            impact INTEGER DEFAULT 1,
-            tractability INTEGER DEFAULT 1,
-            uncertainty INTEGER DEFAULT 1,
-            score REAL DEFAULT 0.0,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-def calculate_score(impact, tractability, uncertainty):
-    """Calculate the score based on impact, tractability, and uncertainty."""
-    if tractability == 0 or uncertainty == 0:
-        return 0.0
-    return (impact * tractability) / uncertainty
+@st.cache_resource
+def prepare_database(path):
+    """Create or migrate the schema of the database at path once per process."""
+    # The schema checks and migrations only need to run once, not on every rerun
+    init_database()
 
-def check_and_update_expired_tasks():
-    """Check for tasks older than 90 days and mark them as expired."""
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    # Calculate the date 90 days ago
-    from datetime import timedelta
-    cutoff_date = datetime.now() - timedelta(days=90)
-    
-    # Update tasks that are older than 90 days and not already expired or completed
-    cursor.execute('''
-        UPDATE tasks 
-        SET status = 'Expired', updated_at = CURRENT_TIMESTAMP
-        WHERE created_at < ? 
-        AND status NOT IN ('Expired', 'Completed')
-    ''', (cutoff_date.isoformat(),))
-    
-    updated_count = cursor.rowcount
-    conn.commit()
-    conn.close()
-    
-    return updated_count
+def session_tasks():
+    """Return this session's TaskCache, which the pages read from and write through."""
+    if 'task_cache' not in st.session_state:
+        st.session_state.task_cache = TaskCache()
+    return st.session_state.task_cache
 
-def get_all_tasks():
-    """Retrieve all tasks from the database."""
-    conn = sqlite3.connect('todo.db')
-    query = "SELECT * FROM tasks ORDER BY score DESC, due ASC"
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    return df
-
-def add_task(topic, description, due, status, impact, tractability, uncertainty):
-    """Add a new task to the database."""
-    score = calculate_score(impact, tractability, uncertainty)
-    
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO tasks (topic, description, due, status, impact, tractability, uncertainty, score)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (topic, description, due, status, impact, tractability, uncertainty, score))
-    
-    conn.commit()
-    conn.close()
-
-def update_task(task_id, topic, description, due, status, impact, tractability, uncertainty):
-    """Update an existing task in the database."""
-    score = calculate_score(impact, tractability, uncertainty)
-    
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        UPDATE tasks 
-        SET topic=?, description=?, due=?, status=?, impact=?, tractability=?, uncertainty=?, score=?, updated_at=CURRENT_TIMESTAMP
-        WHERE id=?
-    ''', (topic, description, due, status, impact, tractability, uncertainty, score, task_id))
-    
-    conn.commit()
-    conn.close()
-
-def delete_task(task_id):
-    """Delete a task from the database."""
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('DELETE FROM tasks WHERE id=?', (task_id,))
-    
-    conn.commit()
-    conn.close()
-
-def get_task_by_id(task_id):
-    """Get a specific task by ID."""
-    conn = sqlite3.connect('todo.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM tasks WHERE id=?', (task_id,))
-    task = cursor.fetchone()
-    
-    conn.close()
-    return task
-
-def search_tasks(search_term, search_by="all"):
-    """Search tasks by topic, description, or status."""
-    conn = sqlite3.connect('todo.db')
-    #the default behaviour
-    if search_by == "all":
-        query = """
-        SELECT * FROM tasks 
-        WHERE topic LIKE ? OR description LIKE ? OR status LIKE ?
-        ORDER BY score DESC, due ASC
-        """
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=[search_pattern, search_pattern, search_pattern])
-    # the user also has the option to search by topic, description or status
-    elif search_by == "topic":
-        query = "SELECT * FROM tasks WHERE topic LIKE ? ORDER BY score DESC, due ASC"
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=[search_pattern])
-    elif search_by == "description":
-        query = "SELECT * FROM tasks WHERE description LIKE ? ORDER BY score DESC, due ASC"
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=[search_pattern])
-    elif search_by == "status":
-        query = "SELECT * FROM tasks WHERE status LIKE ? ORDER BY score DESC, due ASC"
-        search_pattern = f"%{search_term}%"
-        df = pd.read_sql_query(query, conn, params=[search_pattern])
-    else:
-        df = pd.DataFrame()
-    
-    conn.close()
-    return df
-
-def get_completed_tasks_in_range(days_back):
-    """Get completed tasks within the last X days."""
-    conn = sqlite3.connect('todo.db')
-    
-    # Calculate the cutoff date
-    cutoff_date = datetime.now() - timedelta(days=days_back)
-    
-    query = """
-    SELECT * FROM tasks 
-    WHERE status = 'Completed' 
-    AND updated_at >= ?
-    ORDER BY updated_at DESC, score DESC
-    """
-    
-    df = pd.read_sql_query(query, conn, params=[cutoff_date.isoformat()])
-    conn.close()
-    return df
-
-# Initialize database
-init_database()
+def due_value(task):
+    """Return a task's due date as a date for st.date_input, or None if it has none."""
+    # Records hold the stored 'YYYY-MM-DD' text or None; it is only parsed when a form is built
+    try:
+        return date.fromisoformat(task.due) if task.due else None
+    except ValueError:
+        return None
 
 # Main app
 def main():
+    # Page configuration
+    st.set_page_config(
+        page_title="Todo List Manager",
+        page_icon="✅",
+        layout="wide"
+    )
+    # Initialize database
+    prepare_database(DB_PATH)
     # Search functionality with magnifying glass icon
     st.sidebar.markdown("### 🔍 Quick Search")
     # Use a form to enable Enter key functionality
@@ -211,8 +70,14 @@ def main():
     # Sidebar for navigation
     page = st.sidebar.selectbox(
         "Choose an action:",
-        ["View Tasks", "Done Today", "Add Task", "Edit Task", "Delete Task"]
+        ["View Tasks", "Done Today", "Add Task", "Edit Task", "Delete Task", "Import Tasks"]
     )
+    st.sidebar.checkbox("⚡ Build edit forms only when opened", value=True, key="lazy_edit_forms",
+                        help="Skip creating the edit widgets of every listed task until its Edit toggle is switched on")
+    st.sidebar.selectbox("📐 Priority model", list(SCORING_STRATEGIES), key="scoring_strategy",
+                         index=list(SCORING_STRATEGIES).index(DEFAULT_SCORING_STRATEGY),
+                         format_func=lambda name: SCORING_STRATEGIES[name]["label"],
+                         help="How View Tasks and Search order tasks; stored scores are not changed")
     # Check if search is active
     if hasattr(st.session_state, 'show_search') and st.session_state.show_search:
         search_tasks_page()
@@ -246,12 +111,172 @@ def main():
             edit_task_page()
         elif page == "Delete Task":
             delete_task_page()
+        elif page == "Import Tasks":
+            import_tasks_page()
+
+def status_filter_controls(key_prefix=""):
+    """Render the status filter checkboxes and return the selected statuses."""
+    st.markdown("### 🔍 Filter by Status")
+    defaults = {"Pending": True, "In Progress": True, "On Hold": True, "Completed": False, "Expired": False}
+    selected_statuses = []
+    for column, (status, default) in zip(st.columns(len(defaults)), defaults.items()):
+        with column:
+            key = f"{key_prefix}filter_{status.lower().replace(' ', '_')}"
+            if st.checkbox(status, value=default, key=key):
+                selected_statuses.append(status)
+    return selected_statuses
+
+def task_pager(statuses, total_tasks, strategy=None):
+    """Render the page size and previous/next controls and return the current page of Task records.
+    
+    The position is kept in session state as a keyset cursor: ("after", key) or ("before", key),
+    where key is the task_page_key() of the row bordering the requested page.
+    """
+    page_size = st.selectbox("Tasks per page", PAGE_SIZE_OPTIONS,
+                             index=PAGE_SIZE_OPTIONS.index(DEFAULT_PAGE_SIZE), key="page_size")
+    
+    # Start from the first page whenever the filter, page size or priority model changes
+    signature = (tuple(statuses or ()), page_size, strategy)
+    if st.session_state.get('page_signature') != signature:
+        st.session_state.page_signature = signature
+        st.session_state.page_cursor = None
+        st.session_state.page_number = 1
+    
+    if priority_sql(strategy) == "score":
+        # The stored-score order is served from the session's task cache
+        read_page = functools.partial(session_tasks().page, statuses, page_size)
+    else:
+        read_page = functools.partial(get_task_records_page, statuses, page_size, strategy=strategy)
+    
+    direction, key = st.session_state.page_cursor or (None, None)
+    if direction == "before":
+        page, has_previous = read_page(before=key)
+        has_next = True
+        if not has_previous:
+            st.session_state.page_cursor = None
+            st.session_state.page_number = 1
+    else:
+        page, has_next = read_page(after=key)
+        has_previous = key is not None
+    
+    if not page and key is not None:
+        # Every task from the cursor on has left the filter (an edit here or in another
+        # session): go back to the first page rather than strand the user without a pager
+        st.session_state.page_cursor = None
+        st.session_state.page_number = 1
+        page, has_next = read_page(after=None)
+        has_previous = False
+    
+    if not page:
+        return page
+    
+    def go_to(cursor, step):
+        st.session_state.page_cursor = cursor
+        st.session_state.page_number = max(1, st.session_state.page_number + step)
+    
+    page_count = -(-total_tasks // page_size)
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Previous", disabled=not has_previous, use_container_width=True, key="page_previous",
+                  on_click=go_to, args=(("before", task_page_key(page[0])), -1))
+    with col2:
+        first = (st.session_state.page_number - 1) * page_size + 1
+        st.caption(f"Page {st.session_state.page_number} of {page_count} · "
+                   f"tasks {first}–{first + len(page) - 1} of {total_tasks}")
+    with col3:
+        st.button("Next →", disabled=not has_next, use_container_width=True, key="page_next",
+                  on_click=go_to, args=(("after", task_page_key(page[-1])), 1))
+    return page
+
+def render_task_details(task):
+    """Render the read-only details of a Task record."""
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.write(f"**Description:** {task.description}")
+        if task.due:
+            st.write(f"**Due Date:** {task.due}")
+        st.write(f"**Impact:** {task.impact} | **Tractability:** {task.tractability} | **Uncertainty:** {task.uncertainty}")
+    
+    with col2:
+        st.write(f"**ID:** {task.id}")
+        st.write(f"**Created:** {task.created_at}")
+        if task.updated_at != task.created_at:
+            st.write(f"**Updated:** {task.updated_at}")
+
+def render_task_edit_form(task, key_prefix=""):
+    """Render the inline edit form for a Task record and save it on submit."""
+    with st.form(f"{key_prefix}edit_task_form_{task.id}"):
+        topic = st.text_input("Topic *", value=task.topic, key=f"{key_prefix}edit_topic_{task.id}")
+        description = st.text_area("Description", value=task.description or "", key=f"{key_prefix}edit_description_{task.id}")
+        
+        due = st.date_input("Due Date", value=due_value(task), key=f"{key_prefix}edit_due_{task.id}")
+        status = st.selectbox("Status", TASK_STATUSES, 
+                            index=TASK_STATUSES.index(str(task.status)), 
+                            key=f"{key_prefix}edit_status_{task.id}")
+        
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            impact = st.slider("Impact (1-10)", 1, 10, int(task.impact), key=f"{key_prefix}edit_impact_{task.id}")
+        
+        with col2:
+            tractability = st.slider("Tractability (1-10)", 1, 10, int(task.tractability), key=f"{key_prefix}edit_tractability_{task.id}")
+        
+        with col3:
+            uncertainty = st.slider("Uncertainty (1-10)", 1, 10, int(task.uncertainty), key=f"{key_prefix}edit_uncertainty_{task.id}")
+        
+        # Calculate and display score
+        score = calculate_score(impact, tractability, uncertainty)
+        st.info(f"**Calculated Score:** {score:.2f} (Impact × Tractability ÷ Uncertainty)")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            submitted = st.form_submit_button("Update Task", use_container_width=True)
+        
+        with col2:
+            if st.form_submit_button("Cancel", use_container_width=True):
+                st.rerun()
+        
+        if submitted:
+            if topic and topic.strip():
+                session_tasks().update_task(task.id, topic, description, due, status, impact, tractability, uncertainty)
+                st.success("Task updated successfully!")
+                st.rerun()
+            else:
+                st.error("Topic is required!")
+
+def render_task_expander(task, key_prefix=""):
+    """Render a task as an expander holding its details and an edit form.
+    
+    Streamlit runs the body of collapsed expanders too, so in lazy mode (the sidebar
+    "Build edit forms only when opened" option) the form's widgets are only created
+    once the task's Edit toggle is switched on.
+    """
+    status_color = get_status_color(task.status)
+    label = f"**{task.topic}** - :{status_color}[{task.status}] (Score: {task.score:.2f})"
+    if task.priority is not None and task.priority != task.score:
+        label += f" · Priority: {task.priority:.2f}"
+    with st.expander(label):
+        # Display task details in read-only format
+        render_task_details(task)
+        
+        st.markdown("---")
+        
+        # Edit form directly in the expander
+        if st.session_state.get('lazy_edit_forms', True):
+            if not st.toggle("✏️ Edit Task", key=f"{key_prefix}edit_open_{task.id}"):
+                return
+        else:
+            st.markdown("### ✏️ Edit Task")
+        render_task_edit_form(task, key_prefix)
 
 def view_tasks_page():
     st.header("📋 Current Tasks")
     
     # Check for expired tasks
-    expired_count = check_and_update_expired_tasks()
+    expired_count = check_and_update_expired_tasks(min_interval=EXPIRY_SWEEP_INTERVAL)
     if expired_count > 0:
         st.info(f"📅 {expired_count} task(s) have been automatically marked as expired (older than 90 days).")
     
@@ -269,144 +294,45 @@ def view_tasks_page():
     
     st.markdown("---")
     
-    # Get all tasks
-    df = get_all_tasks()
-    
-    if len(df) == 0:
+    if session_tasks().count() == 0:
         st.info("No tasks found. Add some tasks to get started!")
         return
     
     # Status filter controls
-    st.markdown("### 🔍 Filter by Status")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    
-    with col1:
-        show_pending = st.checkbox("Pending", value=True, key="filter_pending")
-    with col2:
-        show_in_progress = st.checkbox("In Progress", value=True, key="filter_in_progress")
-    with col3:
-        show_on_hold = st.checkbox("On Hold", value=True, key="filter_on_hold")
-    with col4:
-        show_completed = st.checkbox("Completed", value=False, key="filter_completed")
-    with col5:
-        show_expired = st.checkbox("Expired", value=False, key="filter_expired")
+    selected_statuses = status_filter_controls()
     
-    # Filter tasks based on selected statuses
-    selected_statuses = []
-    if show_pending:
-        selected_statuses.append("Pending")
-    if show_in_progress:
-        selected_statuses.append("In Progress")
-    if show_on_hold:
-        selected_statuses.append("On Hold")
-    if show_completed:
-        selected_statuses.append("Completed")
-    if show_expired:
-        selected_statuses.append("Expired")
-    
-    # Apply filter
-    if selected_statuses:
-        filtered_df = df[df['status'].isin(selected_statuses)]
-    else:
-        filtered_df = df  # Show all if no filters selected
+    # Only the selected statuses are read from the database (show all if none selected)
+    statuses = selected_statuses or None
+    total_tasks = session_tasks().count(statuses)
     
     st.markdown("---")
     
     # Display filtered tasks
-    if len(filtered_df) == 0:
+    if total_tasks == 0:
         st.info("No tasks found matching the selected filters.")
         return
     
-    for _, task in filtered_df.iterrows():
-        status_color = get_status_color(task['status'])
-        with st.expander(f"**{task['topic']}** - :{status_color}[{task['status']}] (Score: {task['score']:.2f})"):
-            # Display task details in read-only format
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.write(f"**Description:** {task['description']}")
-                due_date = task['due']
-                if due_date is not None and str(due_date) not in ['NaT', 'None', 'nan']:
-                    st.write(f"**Due Date:** {due_date}")
-                st.write(f"**Impact:** {task['impact']} | **Tractability:** {task['tractability']} | **Uncertainty:** {task['uncertainty']}")
-            
-            with col2:
-                st.write(f"**ID:** {task['id']}")
-                st.write(f"**Created:** {task['created_at']}")
-                if task['updated_at'] != task['created_at']:
-                    st.write(f"**Updated:** {task['updated_at']}")
-            
-            st.markdown("---")
-            
-            # Edit form directly in the expander
-            st.markdown("### ✏️ Edit Task")
-            with st.form(f"edit_task_form_{task['id']}"):
-                topic = st.text_input("Topic *", value=task['topic'], key=f"edit_topic_{task['id']}")
-                description = st.text_area("Description", value=task['description'] or "", key=f"edit_description_{task['id']}")
-                
-                # Handle due date
-                due_date = None
-                if task['due'] is not None and str(task['due']) not in ['NaT', 'None', 'nan']:
-                    try:
-                        due_date = datetime.strptime(str(task['due']), '%Y-%m-%d').date()
-                    except:
-                        due_date = None
-                
-                due = st.date_input("Due Date", value=due_date, key=f"edit_due_{task['id']}")
-                status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "On Hold", "Expired"], 
-                                    index=["Pending", "In Progress", "Completed", "On Hold", "Expired"].index(str(task['status'])), 
-                                    key=f"edit_status_{task['id']}")
-                
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    impact = st.slider("Impact (1-10)", 1, 10, int(task['impact']), key=f"edit_impact_{task['id']}")
-                
-                with col2:
-                    tractability = st.slider("Tractability (1-10)", 1, 10, int(task['tractability']), key=f"edit_tractability_{task['id']}")
-                
-                with col3:
-                    uncertainty = st.slider("Uncertainty (1-10)", 1, 10, int(task['uncertainty']), key=f"edit_uncertainty_{task['id']}")
-                
-                # Calculate and display score
-                score = calculate_score(impact, tractability, uncertainty)
-                st.info(f"**Calculated Score:** {score:.2f} (Impact × Tractability ÷ Uncertainty)")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    submitted = st.form_submit_button("Update Task", use_container_width=True)
-                
-                with col2:
-                    if st.form_submit_button("Cancel", use_container_width=True):
-                        st.rerun()
-                
-                if submitted:
-                    if topic and topic.strip():
-                        update_task(task['id'], topic, description, due, status, impact, tractability, uncertainty)
-                        st.success("Task updated successfully!")
-                        st.rerun()
-                    else:
-                        st.error("Topic is required!")
-    
-    # Show summary statistics for filtered results
+    page = task_pager(statuses, total_tasks, st.session_state.get('scoring_strategy'))
+    
+    for task in page:
+        render_task_expander(task)
+    
+    # Show summary statistics for all filtered tasks, from the task cache's running totals
+    summary = session_tasks().summary(statuses)
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Filtered Tasks", len(filtered_df))
+        st.metric("Filtered Tasks", summary['total'])
     
     with col2:
-        pending_count = len(filtered_df[filtered_df['status'] == 'Pending'])
-        st.metric("Pending", pending_count)
+        st.metric("Pending", summary['pending'])
     
     with col3:
-        completed_count = len(filtered_df[filtered_df['status'] == 'Completed'])
-        st.metric("Completed", completed_count)
+        st.metric("Completed", summary['completed'])
     
     with col4:
-        avg_score = filtered_df['score'].mean()
-        st.metric("Avg Score", f"{avg_score:.2f}")
+        st.metric("Avg Score", f"{summary['avg_score']:.2f}")
 
 def add_task_page():
     st.header("➕ Add New Task")
@@ -439,7 +365,7 @@ def add_task_page():
         
         if submitted:
             if topic.strip():
-                add_task(topic, description, due, status, impact, tractability, uncertainty)
+                session_tasks().add_task(topic, description, due, status, impact, tractability, uncertainty)
                 st.success("Task added successfully!")
                 # Clear quick add session state variables
                 if hasattr(st.session_state, 'quick_add_task_name'):
@@ -458,48 +384,40 @@ def edit_task_page():
         selected_task_id = st.session_state.edit_task_id
     else:
         # Get all tasks for selection
-        df = get_all_tasks()
+        tasks = session_tasks().tasks()
         
-        if len(df) == 0:
+        if not tasks:
             st.info("No tasks found to edit.")
             return
         
         # Task selection
-        task_options = {f"{row['topic']} (ID: {row['id']})": row['id'] for _, row in df.iterrows()}
+        task_options = {f"{task.topic} (ID: {task.id})": task.id for task in tasks}
         selected_task_label = st.selectbox("Select task to edit:", list(task_options.keys()))
         selected_task_id = task_options[selected_task_label]
     
     # Get task details
-    task = get_task_by_id(selected_task_id)
+    task = session_tasks().get(selected_task_id)
     
     if task:
         with st.form("edit_task_form"):
-            topic = st.text_input("Topic *", value=task[1], key="edit_topic")
-            description = st.text_area("Description", value=task[2] or "", key="edit_description")
+            topic = st.text_input("Topic *", value=task.topic, key="edit_topic")
+            description = st.text_area("Description", value=task.description or "", key="edit_description")
             
-            # Handle due date
-            due_date = None
-            if task[3]:
-                try:
-                    due_date = datetime.strptime(task[3], '%Y-%m-%d').date()
-                except:
-                    due_date = None
-            
-            due = st.date_input("Due Date", value=due_date, key="edit_due")
+            due = st.date_input("Due Date", value=due_value(task), key="edit_due")
             status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "On Hold", "Expired"], 
-                                index=["Pending", "In Progress", "Completed", "On Hold", "Expired"].index(task[4]), 
+                                index=["Pending", "In Progress", "Completed", "On Hold", "Expired"].index(task.status), 
                                 key="edit_status")
             
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                impact = st.slider("Impact (1-10)", 1, 10, task[5], key="edit_impact")
+                impact = st.slider("Impact (1-10)", 1, 10, task.impact, key="edit_impact")
             
             with col2:
-                tractability = st.slider("Tractability (1-10)", 1, 10, task[6], key="edit_tractability")
+                tractability = st.slider("Tractability (1-10)", 1, 10, task.tractability, key="edit_tractability")
             
             with col3:
-                uncertainty = st.slider("Uncertainty (1-10)", 1, 10, task[7], key="edit_uncertainty")
+                uncertainty = st.slider("Uncertainty (1-10)", 1, 10, task.uncertainty, key="edit_uncertainty")
             
             # Calculate and display score
             score = calculate_score(impact, tractability, uncertainty)
@@ -516,7 +434,7 @@ def edit_task_page():
             
             if submitted:
                 if topic and topic.strip():
-                    update_task(selected_task_id, topic, description, due, status, impact, tractability, uncertainty)
+                    session_tasks().update_task(selected_task_id, topic, description, due, status, impact, tractability, uncertainty)
                     st.success("Task updated successfully!")
                     # Clear edit task ID from session state
                     if hasattr(st.session_state, 'edit_task_id'):
@@ -529,33 +447,75 @@ def delete_task_page():
     st.header("🗑️ Delete Task")
     
     # Get all tasks for selection
-    df = get_all_tasks()
+    tasks = session_tasks().tasks()
     
-    if len(df) == 0:
+    if not tasks:
         st.info("No tasks found to delete.")
         return
     
     # Task selection
-    task_options = {f"{row['topic']} (ID: {row['id']})": row['id'] for _, row in df.iterrows()}
+    task_options = {f"{task.topic} (ID: {task.id})": task.id for task in tasks}
     selected_task_label = st.selectbox("Select task to delete:", list(task_options.keys()))
     selected_task_id = task_options[selected_task_label]
     
     # Get task details for confirmation
-    task = get_task_by_id(selected_task_id)
+    task = session_tasks().get(selected_task_id)
     
     if task:
         st.warning("⚠️ **Task to be deleted:**")
-        st.write(f"**Topic:** {task[1]}")
-        st.write(f"**Description:** {task[2]}")
-        status_color = get_status_color(task[4])
-        st.write(f"**Status:** :{status_color}[{task[4]}]")
-        st.write(f"**Score:** {task[8]}")
+        st.write(f"**Topic:** {task.topic}")
+        st.write(f"**Description:** {task.description}")
+        status_color = get_status_color(task.status)
+        st.write(f"**Status:** :{status_color}[{task.status}]")
+        st.write(f"**Score:** {task.score}")
         
         if st.button("🗑️ Delete Task", type="primary"):
-            delete_task(selected_task_id)
+            session_tasks().delete_task(selected_task_id)
             st.success("Task deleted successfully!")
             st.rerun()
 
+def import_tasks_page():
+    st.header("📥 Import Tasks")
+    st.write(
+        "Upload a **CSV** file with a header row or a **JSONL** file with one JSON object per line. "
+        "Fields: `topic` (required), `description`, `due` (YYYY-MM-DD), `status` "
+        f"({', '.join(TASK_STATUSES)}; default Pending) and `impact`, `tractability`, "
+        "`uncertainty` (1-10; default 5). Scores are calculated automatically."
+    )
+    
+    uploaded = st.file_uploader("Task file", type=["csv", "jsonl", "json"])
+    atomic = st.checkbox("All or nothing (import in a single transaction)", value=True)
+    
+    if uploaded is None or not st.button("📥 Import", type="primary"):
+        return
+    
+    file_format = "csv" if uploaded.name.lower().endswith(".csv") else "jsonl"
+    progress_bar = st.progress(0.0, text="Starting import...")
+    
+    def report_progress(rows_read, imported, rejected):
+        # The text wrapper reads ahead of the parser, so the byte position is approximate
+        fraction = min(uploaded.tell() / max(uploaded.size, 1), 1.0)
+        progress_bar.progress(fraction, text=f"Read {rows_read:,} rows: {imported:,} imported, {rejected:,} rejected")
+    
+    source = io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline="")
+    try:
+        result = import_tasks(source, file_format, atomic=atomic, progress=report_progress)
+    except (UnicodeDecodeError, csv.Error) as e:
+        st.error(f"Could not read the file: {e}")
+        return
+    progress_bar.progress(1.0, text="Import finished")
+    
+    if result["imported"]:
+        st.success(f"Imported {result['imported']:,} task(s).")
+    if result["rejected"]:
+        st.warning(f"Skipped {result['rejected']:,} invalid row(s).")
+        st.dataframe(
+            pd.DataFrame(result["errors"][:1000], columns=["Line", "Problem"]),
+            hide_index=True, use_container_width=True
+        )
+    elif not result["imported"]:
+        st.info("The file contained no tasks.")
+
 def search_tasks_page():
     st.header("🔍 Search Results")
     
@@ -566,153 +526,51 @@ def search_tasks_page():
     # Display search criteria
     st.info(f"Searching for: **{search_term}** in **{search_by}**")
     
-    # Perform search
-    results = search_tasks(search_term, search_by)
+    # Count all matches once, then read only the rows the status filter lets through
+    total_results = count_tasks(search_term=search_term, search_by=search_by)
     
-    if len(results) == 0:
+    if total_results == 0:
         st.info("No tasks found matching the search criteria.")
     else:
-        st.success(f"Found {len(results)} task(s) matching your search.")
+        st.success(f"Found {total_results} task(s) matching your search.")
         
-        # Status filter controls (copied from View Tasks page)
-        st.markdown("### 🔍 Filter by Status")
-        col1, col2, col3, col4, col5 = st.columns(5)
+        # Status filter controls (shared with the View Tasks page)
+        selected_statuses = status_filter_controls(key_prefix="search_")
         
-        with col1:
-            show_pending = st.checkbox("Pending", value=True, key="search_filter_pending")
-        with col2:
-            show_in_progress = st.checkbox("In Progress", value=True, key="search_filter_in_progress")
-        with col3:
-            show_on_hold = st.checkbox("On Hold", value=True, key="search_filter_on_hold")
-        with col4:
-            show_completed = st.checkbox("Completed", value=False, key="search_filter_completed")
-        with col5:
-            show_expired = st.checkbox("Expired", value=False, key="search_filter_expired")
-        
-        # Filter search results based on selected statuses
-        selected_statuses = []
-        if show_pending:
-            selected_statuses.append("Pending")
-        if show_in_progress:
-            selected_statuses.append("In Progress")
-        if show_on_hold:
-            selected_statuses.append("On Hold")
-        if show_completed:
-            selected_statuses.append("Completed")
-        if show_expired:
-            selected_statuses.append("Expired")
-        
-        # Apply filter to search results
-        if selected_statuses:
-            filtered_results = results[results['status'].isin(selected_statuses)]
-        else:
-            filtered_results = results  # Show all if no filters selected
+        # Show all if no filters selected
+        results = search_task_records(search_term, search_by, statuses=selected_statuses or None,
+                                      strategy=st.session_state.get('scoring_strategy'))
         
         st.markdown("---")
         
-        # Update results to use filtered results
-        if len(filtered_results) == 0:
+        if len(results) == 0:
             st.info("No tasks found matching the selected filters.")
             return
         
         # Update the success message to reflect filtering
-        if len(filtered_results) != len(results):
-            st.info(f"Showing {len(filtered_results)} of {len(results)} search results after filtering.")
-        
-        # Use filtered_results instead of results for display
-        results = filtered_results
+        if len(results) != total_results:
+            st.info(f"Showing {len(results)} of {total_results} search results after filtering.")
         
         # Display search results with edit functionality
-        for _, task in results.iterrows():
-            status_color = get_status_color(task['status'])
-            with st.expander(f"**{task['topic']}** - :{status_color}[{task['status']}] (Score: {task['score']:.2f})"):
-                # Display task details in read-only format
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    st.write(f"**Description:** {task['description']}")
-                    due_date = task['due']
-                    if due_date is not None and str(due_date) not in ['NaT', 'None', 'nan']:
-                        st.write(f"**Due Date:** {due_date}")
-                    st.write(f"**Impact:** {task['impact']} | **Tractability:** {task['tractability']} | **Uncertainty:** {task['uncertainty']}")
-                
-                with col2:
-                    st.write(f"**ID:** {task['id']}")
-                    st.write(f"**Created:** {task['created_at']}")
-                    if task['updated_at'] != task['created_at']:
-                        st.write(f"**Updated:** {task['updated_at']}")
-                
-                st.markdown("---")
-                
-                # Edit form directly in the expander
-                st.markdown("### ✏️ Edit Task")
-                with st.form(f"search_edit_task_form_{task['id']}"):
-                    topic = st.text_input("Topic *", value=task['topic'], key=f"search_edit_topic_{task['id']}")
-                    description = st.text_area("Description", value=task['description'] or "", key=f"search_edit_description_{task['id']}")
-                    
-                    # Handle due date
-                    due_date = None
-                    if task['due'] is not None and str(task['due']) not in ['NaT', 'None', 'nan']:
-                        try:
-                            due_date = datetime.strptime(str(task['due']), '%Y-%m-%d').date()
-                        except:
-                            due_date = None
-                    
-                    due = st.date_input("Due Date", value=due_date, key=f"search_edit_due_{task['id']}")
-                    status = st.selectbox("Status", ["Pending", "In Progress", "Completed", "On Hold", "Expired"], 
-                                        index=["Pending", "In Progress", "Completed", "On Hold", "Expired"].index(str(task['status'])), 
-                                        key=f"search_edit_status_{task['id']}")
-                    
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        impact = st.slider("Impact (1-10)", 1, 10, int(task['impact']), key=f"search_edit_impact_{task['id']}")
-                    
-                    with col2:
-                        tractability = st.slider("Tractability (1-10)", 1, 10, int(task['tractability']), key=f"search_edit_tractability_{task['id']}")
-                    
-                    with col3:
-                        uncertainty = st.slider("Uncertainty (1-10)", 1, 10, int(task['uncertainty']), key=f"search_edit_uncertainty_{task['id']}")
-                    
-                    # Calculate and display score
-                    score = calculate_score(impact, tractability, uncertainty)
-                    st.info(f"**Calculated Score:** {score:.2f} (Impact × Tractability ÷ Uncertainty)")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        submitted = st.form_submit_button("Update Task", use_container_width=True)
-                    
-                    with col2:
-                        if st.form_submit_button("Cancel", use_container_width=True):
-                            st.rerun()
-                    
-                    if submitted:
-                        if topic and topic.strip():
-                            update_task(task['id'], topic, description, due, status, impact, tractability, uncertainty)
-                            st.success("Task updated successfully!")
-                            st.rerun()
-                        else:
-                            st.error("Topic is required!")
-        
-        # Show search result statistics
+        for task in results:
+            render_task_expander(task, key_prefix="search_")
+        
+        # Show search result statistics, aggregated in SQLite
+        summary = task_summary(statuses=selected_statuses or None, search_term=search_term, search_by=search_by)
         st.markdown("---")
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Search Results", len(results))
+            st.metric("Search Results", summary['total'])
         
         with col2:
-            pending_count = len(results[results['status'] == 'Pending'])
-            st.metric("Pending", pending_count)
+            st.metric("Pending", summary['pending'])
         
         with col3:
-            completed_count = len(results[results['status'] == 'Completed'])
-            st.metric("Completed", completed_count)
+            st.metric("Completed", summary['completed'])
         
         with col4:
-            avg_score = results['score'].mean()
-            st.metric("Avg Score", f"{avg_score:.2f}")
+            st.metric("Avg Score", f"{summary['avg_score']:.2f}")
 
 def done_today_page():
     st.header("✅ Done Today")
@@ -727,12 +585,11 @@ def done_today_page():
     )
     
     # Get completed tasks in the specified range
-    completed_tasks = get_completed_tasks_in_range(days_back)
+    start_date = completed_range_start(days_back)
+    completed_tasks = get_completed_task_records_since(start_date)
     
     # Display the date range
-    from datetime import timedelta
-    end_date = datetime.now().date()
-    start_date = (datetime.now() - timedelta(days=days_back)).date()
+    end_date = datetime.now(timezone.utc).date()
     st.info(f"📅 Showing tasks completed between **{start_date}** and **{end_date}** ({days_back} day{'s' if days_back != 1 else ''})")
     
     if len(completed_tasks) == 0:
@@ -742,41 +599,39 @@ def done_today_page():
     st.success(f"🎉 Found {len(completed_tasks)} completed task{'s' if len(completed_tasks) != 1 else ''}!")
     
     # Display completed tasks
-    for _, task in completed_tasks.iterrows():
-        with st.expander(f"✅ **{task['topic']}** (Score: {task['score']:.2f})"):
+    for task in completed_tasks:
+        with st.expander(f"✅ **{task.topic}** (Score: {task.score:.2f})"):
             # Display task details
             col1, col2 = st.columns([2, 1])
             
             with col1:
-                st.write(f"**Description:** {task['description']}")
-                due_date = task['due']
-                if due_date is not None and str(due_date) not in ['NaT', 'None', 'nan']:
-                    st.write(f"**Due Date:** {due_date}")
-                st.write(f"**Impact:** {task['impact']} | **Tractability:** {task['tractability']} | **Uncertainty:** {task['uncertainty']}")
+                st.write(f"**Description:** {task.description}")
+                if task.due:
+                    st.write(f"**Due Date:** {task.due}")
+                st.write(f"**Impact:** {task.impact} | **Tractability:** {task.tractability} | **Uncertainty:** {task.uncertainty}")
             
             with col2:
-                st.write(f"**ID:** {task['id']}")
-                st.write(f"**Created:** {task['created_at']}")
-                st.write(f"**Completed:** {task['updated_at']}")
+                st.write(f"**ID:** {task.id}")
+                st.write(f"**Created:** {task.created_at}")
+                st.write(f"**Completed:** {task.completed_at}")
             
-            # Show completion time if different from creation time
-            if task['updated_at'] != task['created_at']:
-                st.info(f"⏱️ **Task completed on:** {task['updated_at']}")
+            # Show when the task was last edited if that happened after it was completed
+            if task.updated_at > task.completed_at:
+                st.info(f"✏️ **Last edited on:** {task.updated_at}")
     
-    # Show summary statistics
+    # Show summary statistics from the daily completion rollup
+    summary = completion_summary(days_back)
     st.markdown("---")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Completed Tasks", len(completed_tasks))
+        st.metric("Completed Tasks", summary['completed'])
     
     with col2:
-        total_impact = completed_tasks['impact'].sum()
-        st.metric("Total Impact", total_impact)
+        st.metric("Total Impact", summary['total_impact'])
     
     with col3:
-        avg_score = completed_tasks['score'].mean()
-        st.metric("Avg Score", f"{avg_score:.2f}")
+        st.metric("Avg Score", f"{summary['avg_score']:.2f}")
     
     with col4:
         # Calculate average completion time (if we had that data)
@@ -786,29 +641,30 @@ def done_today_page():
     st.markdown("---")
     st.markdown("### 📊 Completion Insights")
     
+    if days_back > 1:
+        st.bar_chart(get_daily_completions(days_back).set_index('day')['completed'])
+    
     col1, col2 = st.columns(2)
     
     with col1:
         # High impact tasks completed
-        high_impact_tasks = completed_tasks[completed_tasks['impact'] >= 7]
-        st.metric("High Impact Tasks (7+)", len(high_impact_tasks))
+        st.metric("High Impact Tasks (7+)", summary['high_impact'])
         
         # High score tasks completed
-        high_score_tasks = completed_tasks[completed_tasks['score'] >= 5.0]
-        st.metric("High Score Tasks (5+)", len(high_score_tasks))
+        st.metric("High Score Tasks (5+)", summary['high_score'])
     
     with col2:
         # Most recent completion
-        if len(completed_tasks) > 0:
-            most_recent = completed_tasks.iloc[0]  # Already sorted by updated_at DESC
-            st.write(f"**Most Recent:** {most_recent['topic']}")
-            st.write(f"**Completed:** {most_recent['updated_at']}")
+        if completed_tasks:
+            most_recent = completed_tasks[0]  # Already sorted by completed_at DESC
+            st.write(f"**Most Recent:** {most_recent.topic}")
+            st.write(f"**Completed:** {most_recent.completed_at}")
         
         # Oldest completion in range
-        if len(completed_tasks) > 0:
-            oldest = completed_tasks.iloc[-1]  # Last in the sorted list
-            st.write(f"**Oldest in Range:** {oldest['topic']}")
-            st.write(f"**Completed:** {oldest['updated_at']}")
+        if completed_tasks:
+            oldest = completed_tasks[-1]  # Last in the sorted list
+            st.write(f"**Oldest in Range:** {oldest.topic}")
+            st.write(f"**Completed:** {oldest.completed_at}")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,194 @@
+"""Asyncio facade over the task store, for services that must not block their event loop.
+
+Every call runs on a bounded pool of worker threads, and each worker has its own SQLite
+connection, so reads proceed in parallel under WAL while writers queue for the write
+lock. Usage:
+
+    async with AsyncTaskStore(workers=4) as store:
+        task_id = await store.add_task("Write report", "", None, "Pending", 8, 7, 3)
+        tasks = await store.get_all_tasks(statuses=["Pending"])
+        ids = await store.add_tasks([{"topic": "A", ...}, {"topic": "B", ...}])
+
+Cancelling a pending call drops it before it starts; cancelling a running one interrupts
+its SQL statement, and an interrupted write transaction is rolled back. Worker reads
+bypass todo_core's query cache, which is keyed to the shared connection.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import threading
+from collections.abc import Mapping
+
+import todo_core
+
+DEFAULT_WORKERS = 4
+
+class _Call:
+    """One submitted call, remembering which worker connection runs it so it can be interrupted."""
+
+    def __init__(self, func, local):
+        self._func = func
+        self._local = local
+        self._lock = threading.Lock()
+        self._manager = None
+        self._cancelled = False
+
+    def run(self):
+        with self._lock:
+            if self._cancelled:
+                raise concurrent.futures.CancelledError()
+            self._manager = self._local.manager
+        try:
+            return self._func()
+        finally:
+            with self._lock:
+                self._manager = None
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self._manager is not None:
+                self._manager.interrupt()
+
+def _apply(func, arguments):
+    # Batch items are either keyword mappings or positional sequences
+    if isinstance(arguments, Mapping):
+        return func(**arguments)
+    return func(*arguments)
+
+@todo_core.retry_on_locked
+def _add_tasks(tasks):
+    with todo_core.transaction():
+        return [_apply(todo_core.add_task, task) for task in tasks]
+
+@todo_core.retry_on_locked
+def _update_tasks(updates):
+    with todo_core.transaction():
+        return [_apply(todo_core.update_task, update) for update in updates]
+
+@todo_core.retry_on_locked
+def _delete_tasks(task_ids):
+    with todo_core.transaction():
+        return sum(todo_core.delete_task(task_id) for task_id in task_ids)
+
+def _get_tasks(task_ids):
+    return [todo_core.get_task_by_id(task_id) for task_id in task_ids]
+
+class AsyncTaskStore:
+    """Awaitable task operations run on a bounded thread pool with one connection per worker."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, path=None, pragmas=None):
+        # Defaults follow the shared connection, i.e. configure_database()
+        self.path = todo_core.database_config()["path"] if path is None else todo_core.resolve_database_path(path)
+        if todo_core.is_shared_cache_database(self.path):
+            # Shared-cache connections fail with SQLITE_LOCKED instead of waiting for each other
+            raise ValueError("AsyncTaskStore cannot use a shared-cache database; use ':memory:' or a file")
+        self.pragmas = dict(todo_core.database_config()["pragmas"] if pragmas is None else pragmas)
+        self.workers = workers
+        self._local = threading.local()
+        self._managers = []
+        self._managers_lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="todo-async", initializer=self._bind_worker)
+
+    def _bind_worker(self):
+        manager = todo_core.ConnectionManager(self.path, self.pragmas)
+        with self._managers_lock:
+            self._managers.append(manager)
+        self._local.manager = manager
+        todo_core.bind_thread_database(manager)
+
+    async def call(self, func, *args, **kwargs):
+        """Run any todo_core data function on a worker and await its result."""
+        call = _Call(functools.partial(func, *args, **kwargs), self._local)
+        future = self._executor.submit(call.run)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # wrap_future already cancelled the pool future if it had not started
+            call.cancel()
+            raise
+
+    async def open(self):
+        """Create or migrate the database schema; async with does this on entry."""
+        await self.call(todo_core.init_database)
+        return self
+
+    async def close(self):
+        """Wait for running calls, drop queued ones and close every worker connection."""
+        await asyncio.get_running_loop().run_in_executor(None, self._shutdown)
+
+    def _shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._managers_lock:
+            for manager in self._managers:
+                manager.discard()
+            self._managers.clear()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def stats(self):
+        """Return the lock-wait and write-retry counters summed over the worker connections."""
+        totals = {}
+        with self._managers_lock:
+            for manager in self._managers:
+                for name, value in manager.stats.items():
+                    if name.startswith('max_'):
+                        totals[name] = max(totals.get(name, 0), value)
+                    else:
+                        totals[name] = totals.get(name, 0) + value
+        return totals
+
+    # Single operations, with the arguments and results of the todo_core functions
+
+    async def get_task(self, task_id):
+        return await self.call(todo_core.get_task_by_id, task_id)
+
+    async def get_all_tasks(self, statuses=None, strategy=None):
+        return await self.call(todo_core.get_all_tasks, statuses, strategy)
+
+    async def get_tasks_page(self, statuses=None, page_size=todo_core.DEFAULT_PAGE_SIZE, after=None, before=None,
+                             strategy=None):
+        return await self.call(todo_core.get_tasks_page, statuses, page_size, after, before, strategy)
+
+    async def search_tasks(self, search_term, search_by="all", statuses=None, strategy=None):
+        return await self.call(todo_core.search_tasks, search_term, search_by, statuses, strategy)
+
+    async def get_completed_tasks_in_range(self, days_back):
+        return await self.call(todo_core.get_completed_tasks_in_range, days_back)
+
+    async def task_summary(self, statuses=None, search_term=None, search_by="all", completed_since=None):
+        return await self.call(todo_core.task_summary, statuses, search_term, search_by, completed_since)
+
+    async def add_task(self, topic, description, due, status, impact, tractability, uncertainty):
+        return await self.call(todo_core.add_task, topic, description, due, status, impact, tractability, uncertainty)
+
+    async def update_task(self, task_id, topic, description, due, status, impact, tractability, uncertainty):
+        return await self.call(todo_core.update_task, task_id, topic, description, due, status,
+                               impact, tractability, uncertainty)
+
+    async def delete_task(self, task_id):
+        return await self.call(todo_core.delete_task, task_id)
+
+    # Batches run on one worker, writes in one transaction that commits or rolls back as a whole
+
+    async def get_tasks(self, task_ids):
+        """Return the rows of task_ids in order, None for ids that do not exist."""
+        return await self.call(_get_tasks, list(task_ids))
+
+    async def add_tasks(self, tasks):
+        """Add tasks given as add_task argument mappings or sequences; returns their ids."""
+        return await self.call(_add_tasks, list(tasks))
+
+    async def update_tasks(self, updates):
+        """Apply update_task argument mappings or sequences; returns one bool per update."""
+        return await self.call(_update_tasks, list(updates))
+
+    async def delete_tasks(self, task_ids):
+        """Delete task_ids and return how many existed."""
+        return await self.call(_delete_tasks, list(task_ids))
@@ -0,0 +1,232 @@
+"""Command-line batch operations on tasks selected by a filter expression.
+
+Every command runs as one set-based SQL statement inside one transaction, and
+--dry-run only reports what would change. Usage:
+
+    python todo_cli.py list       "status=On Hold and created before 90d"
+    python todo_cli.py set-status Completed "topic matches quarterly report" --dry-run
+    python todo_cli.py delete     "status=Expired and updated before 2024-01-01"
+    python todo_cli.py rescore    all
+
+Filter expressions are clauses joined by "and":
+
+    FIELD = VALUE, FIELD != VALUE, FIELD < VALUE, <=, >, >=
+    FIELD matches TEXT      case-insensitive substring match (topic, description, status)
+    FIELD before DATE       earlier than DATE (created, updated, completed, due)
+    FIELD after DATE        at or later than DATE
+
+Fields are id, topic, description, status, due, impact, tractability, uncertainty,
+score, created, updated and completed. Values may be quoted ('On Hold'), and must be
+when they contain the word "and". A DATE is YYYY-MM-DD or a relative age such as
+90d (90 days ago). The expression "all" selects every task.
+"""
+
+import argparse
+import re
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+import todo_core
+
+# Filter field -> (column, kind)
+FILTER_FIELDS = {
+    "id": ("id", "number"),
+    "topic": ("topic", "text"),
+    "description": ("description", "text"),
+    "status": ("status", "status"),
+    "due": ("due", "date"),
+    "impact": ("impact", "number"),
+    "tractability": ("tractability", "number"),
+    "uncertainty": ("uncertainty", "number"),
+    "score": ("score", "number"),
+    "created": ("created_at", "timestamp"),
+    "updated": ("updated_at", "timestamp"),
+    "completed": ("completed_at", "timestamp"),
+}
+_CLAUSE = re.compile(r"^\s*(\w+)\s*(!=|<=|>=|=|<|>|\s(?:matches|before|after)\s)\s*(.*?)\s*$", re.IGNORECASE)
+_AND = re.compile(r"""\s+and\s+(?=(?:[^'"]|'[^']*'|"[^"]*")*$)""", re.IGNORECASE)
+_RELATIVE_AGE = re.compile(r"(\d+)d", re.IGNORECASE)
+SAMPLE_SIZE = 10
+
+class FilterError(ValueError):
+    """A filter expression that cannot be parsed."""
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+def _date_value(value, kind):
+    """Return the SQL comparison value of a DATE for a due date or timestamp column."""
+    age = _RELATIVE_AGE.fullmatch(value)
+    if age:
+        moment = datetime.now(timezone.utc) - timedelta(days=int(age.group(1)))
+        return moment.strftime("%Y-%m-%d %H:%M:%S") if kind == "timestamp" else moment.date().isoformat()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise FilterError(f"expected a YYYY-MM-DD date or an age like 30d, got {value!r}")
+
+def _clause(text):
+    match = _CLAUSE.match(text)
+    if not match:
+        raise FilterError(f"cannot parse {text.strip()!r}; expected FIELD OPERATOR VALUE")
+    field, operator, value = match.group(1).lower(), match.group(2).strip().lower(), _unquote(match.group(3))
+    if field not in FILTER_FIELDS:
+        raise FilterError(f"unknown field {field!r}; expected one of {', '.join(FILTER_FIELDS)}")
+    if value == "":
+        raise FilterError(f"missing value after {field} {operator}")
+    column, kind = FILTER_FIELDS[field]
+
+    if operator == "matches":
+        if kind not in ("text", "status"):
+            raise FilterError(f"{field} cannot be matched as text")
+        escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"{column} LIKE ? ESCAPE '\\'", [f"%{escaped}%"]
+    if operator in ("before", "after"):
+        if kind not in ("date", "timestamp"):
+            raise FilterError(f"{field} is not a date; use < or > instead of {operator}")
+        return f"{column} {'<' if operator == 'before' else '>='} ?", [_date_value(value, kind)]
+
+    if kind == "number":
+        try:
+            value = float(value) if "." in value else int(value)
+        except ValueError:
+            raise FilterError(f"{field} must be compared with a number, got {value!r}")
+    elif kind == "status":
+        statuses = {status.lower(): status for status in todo_core.TASK_STATUSES}
+        if value.lower() not in statuses:
+            raise FilterError(f"unknown status {value!r}; expected one of {', '.join(todo_core.TASK_STATUSES)}")
+        value = statuses[value.lower()]
+    elif kind in ("date", "timestamp"):
+        value = _date_value(value, kind)
+    return f"{column} {operator} ?", [value]
+
+def parse_filter(expression):
+    """Compile a filter expression to a (WHERE condition, params) pair for the tasks table."""
+    if not expression.strip():
+        raise FilterError("empty filter; use \"all\" to select every task")
+    if expression.strip().lower() == "all":
+        return "1", []
+    conditions, params = [], []
+    for text in _AND.split(expression):
+        condition, values = _clause(text)
+        conditions.append(f"({condition})")
+        params.extend(values)
+    return " AND ".join(conditions), params
+
+def _sample(conn, where, params):
+    return conn.execute(
+        f"SELECT id, topic, status FROM tasks WHERE {where} ORDER BY score DESC, due ASC LIMIT {SAMPLE_SIZE}",
+        params,
+    ).fetchall()
+
+def _statement(command, where, params, status=None):
+    """Return (statement, params, condition, condition params) for a batch command.
+
+    condition selects the matching rows the statement would actually change.
+    """
+    if command == "set-status":
+        # Rows already in the target status are left alone (and keep their updated_at)
+        condition, condition_params = f"({where}) AND status IS NOT ?", params + [status]
+        statement = f"UPDATE tasks SET status = ?, updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE {condition}"
+        return statement, [status] + condition_params, condition, condition_params
+    if command == "delete":
+        return f"DELETE FROM tasks WHERE {where}", params, where, params
+    if command == "rescore":
+        condition = f"({where}) AND score IS NOT {todo_core.SCORE_SQL}"
+        return f"UPDATE tasks SET score = {todo_core.SCORE_SQL} WHERE {condition}", params, condition, params
+    raise ValueError(f"unknown command {command!r}")
+
+@todo_core.retry_on_locked
+def run_command(command, expression, status=None, dry_run=False):
+    """Run a batch command on the tasks matching expression, in one transaction.
+
+    Returns {"matched": rows matching the filter, "changed": rows changed (or that would be
+    changed, in a dry run), "sample": up to SAMPLE_SIZE (id, topic, status) rows}.
+    """
+    where, params = parse_filter(expression)
+    statement, statement_params, condition, condition_params = _statement(command, where, params, status)
+    with todo_core.transaction() as conn:
+        matched = conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+        sample = _sample(conn, where, params)
+        if dry_run:
+            changed = conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {condition}", condition_params).fetchone()[0]
+        else:
+            changed = conn.execute(statement, statement_params).rowcount
+    return {"matched": matched, "changed": changed, "sample": sample}
+
+def list_tasks(expression, limit=50):
+    """Return (count, rows) of the tasks matching expression, rows as (id, topic, status, score, due)."""
+    where, params = parse_filter(expression)
+    # One snapshot for both queries, without the write lock
+    with todo_core.read_transaction() as conn:
+        count = conn.execute(f"SELECT COUNT(*) FROM tasks WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT id, topic, status, score, due FROM tasks WHERE {where} ORDER BY score DESC, due ASC LIMIT ?",
+            params + [limit],
+        ).fetchall()
+    return count, rows
+
+def _print_sample(sample, total):
+    for task_id, topic, status in sample:
+        print(f"  #{task_id:<6} {status:12} {topic}")
+    if total > len(sample):
+        print(f"  ... and {total - len(sample)} more")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Batch operations on tasks selected by a filter expression.",
+        epilog='Filter example: "status=On Hold and created before 90d". See the module docstring for the syntax.',
+    )
+    parser.add_argument("--db", help="database file (default: the app's todo.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="show matching tasks")
+    list_parser.add_argument("filter")
+    list_parser.add_argument("--limit", type=int, default=50)
+
+    status_parser = commands.add_parser("set-status", help="change the status of matching tasks")
+    status_parser.add_argument("status", choices=todo_core.TASK_STATUSES)
+    status_parser.add_argument("filter")
+
+    delete_parser = commands.add_parser("delete", help="delete matching tasks")
+    delete_parser.add_argument("filter")
+
+    rescore_parser = commands.add_parser("rescore", help="recompute the stored score of matching tasks")
+    rescore_parser.add_argument("filter", nargs="?", default="all")
+
+    for command_parser in (status_parser, delete_parser, rescore_parser):
+        command_parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+
+    args = parser.parse_args(argv)
+    if args.db:
+        todo_core.configure_database(args.db)
+    todo_core.init_database()
+
+    try:
+        if args.command == "list":
+            count, rows = list_tasks(args.filter, args.limit)
+            for task_id, topic, status, score, due in rows:
+                print(f"#{task_id:<6} {status:12} {score:8.2f}  {due or '':10}  {topic}")
+            print(f"{count} matching task{'s' if count != 1 else ''}")
+            return 0
+
+        result = run_command(args.command, args.filter, getattr(args, "status", None), args.dry_run)
+    except FilterError as e:
+        print(f"Invalid filter: {e}", file=sys.stderr)
+        return 2
+    finally:
+        todo_core.close_database()
+
+    action = f"set to {args.status}" if args.command == "set-status" else args.command + "d"
+    print(f"{result['matched']} matching task{'s' if result['matched'] != 1 else ''}")
+    _print_sample(result["sample"], result["matched"])
+    if args.dry_run:
+        print(f"Dry run: {result['changed']} task{'s' if result['changed'] != 1 else ''} would be {action}")
+    else:
+        print(f"{result['changed']} task{'s' if result['changed'] != 1 else ''} {action}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
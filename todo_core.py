@@ -0,0 +1,1572 @@
+"""Storage, scoring and query layer of the Todo List Manager.
+
+Importing this module has no side effects and pulls in neither Streamlit nor pandas:
+no database is opened until a data function first needs it, and pandas and NumPy are
+imported by the functions that return DataFrames or arrays. todo_app.py builds the
+Streamlit UI on top of it.
+"""
+
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta, timezone
+from collections import OrderedDict
+import atexit
+import bisect
+import csv
+import functools
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+import sqlite3
+
+# The public API, also what todo_app's star import re-exports
+__all__ = [
+    # Database location and connection
+    "DB_PATH", "DEFAULT_PRAGMAS", "BUSY_POLL_MIN_DELAY", "BUSY_POLL_MAX_DELAY",
+    "is_memory_database", "is_shared_cache_database", "resolve_database_path",
+    "ConnectionManager", "bind_thread_database", "configure_database", "database_config",
+    "transaction", "read_transaction", "close_database", "database_stats", "database_change_token", "init_database",
+    "WRITE_RETRY_ATTEMPTS", "WRITE_RETRY_BASE_DELAY", "retry_on_locked",
+    # Query cache
+    "QUERY_CACHE_SIZE", "QueryCache", "clear_query_cache", "cached_query",
+    # Scoring
+    "calculate_score", "calculate_scores", "SCORE_SQL", "rescore_tasks", "SCORING_STRATEGIES",
+    "register_scoring_strategy", "weighted_sum_sql", "due_urgency_sql",
+    "DEFAULT_SCORING_STRATEGY", "priority_sql",
+    # Tasks
+    "TASK_STATUSES", "TASK_COLUMNS", "TASK_FIELDS", "TASK_DATE_COLUMNS", "Task",
+    "EXPIRY_DAYS", "EXPIRY_SWEEP_INTERVAL", "check_and_update_expired_tasks",
+    "add_task", "update_task", "delete_task", "get_task_by_id",
+    "get_all_tasks", "get_task_records", "DEFAULT_PAGE_SIZE", "PAGE_SIZE_OPTIONS",
+    "task_page_key", "get_tasks_page", "get_task_records_page",
+    "search_tasks", "search_task_records", "count_tasks", "SUMMARY_FIELDS", "task_summary",
+    "TaskCache",
+    # Completions
+    "completed_range_start", "get_completed_tasks_in_range", "get_completed_tasks_since",
+    "get_completed_task_records_since", "get_daily_completions", "completion_summary",
+    # Import
+    "IMPORT_CHUNK_SIZE", "IMPORT_FORMATS", "RATING_FIELDS", "validate_task_record", "import_tasks",
+]
+
+TASK_STATUSES = ["Pending", "In Progress", "Completed", "On Hold", "Expired"]
+
+# Database setup: a file name, ':memory:' or a file: URI (e.g. 'file:/name?vfs=memdb'),
+# read from TODO_DB_PATH so each process can point at its own store
+DB_PATH = os.environ.get('TODO_DB_PATH', 'todo.db')
+
+_memory_database_ids = itertools.count(1)
+
+def is_memory_database(path):
+    """Return True if path names an in-memory database rather than a file."""
+    if path == ':memory:':
+        return True
+    return path.startswith('file:') and ('mode=memory' in path or 'vfs=memdb' in path
+                                         or path.startswith('file::memory:'))
+
+def is_shared_cache_database(path):
+    """Return True if path opens a shared-cache database, whose connections lock each other per table."""
+    return path.startswith('file:') and 'cache=shared' in path
+
+def resolve_database_path(path):
+    """Return path, with ':memory:' replaced by the URI of a new in-memory database.
+    
+    Plain ':memory:' gives every connection its own empty database; the memdb URI lets every
+    connection of this process (a reopened one, async workers) open the same one. Unlike a
+    shared-cache URI, memdb connections lock the database the way file connections do, so
+    contention is waited out via busy_timeout instead of failing with SQLITE_LOCKED.
+    """
+    if path == ':memory:':
+        return f"file:/todo-memory-{os.getpid()}-{next(_memory_database_ids)}?vfs=memdb"
+    return path
+
+# Pragmas applied to every new connection; override them with configure_database()
+DEFAULT_PRAGMAS = {
+    # Wait for other connections' locks, then let readers and one writer work concurrently
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'foreign_keys': 'ON',
+    'synchronous': 'NORMAL',
+    'temp_store': 'MEMORY',
+    'cache_size': -16000,  # negative values are KiB, so roughly 16 MB of page cache
+}
+
+# transaction() polls a busy write lock at these intervals (seconds), up to busy_timeout
+BUSY_POLL_MIN_DELAY = 0.001
+BUSY_POLL_MAX_DELAY = 0.02
+
+class ConnectionManager:
+    """Own one SQLite connection that every data function in the process shares.
+
+    Streamlit runs each script rerun on its own thread, so the connection is opened
+    with check_same_thread=False and every use is serialized through a re-entrant lock.
+    The connection runs in autocommit mode; writes go through transaction().
+    Time spent waiting for the lock, waiting out other connections' write locks and
+    write retries are counted in stats.
+    An in-memory database would vanish with its last connection, so the manager keeps
+    one more connection to it open until discard().
+    """
+
+    def __init__(self, path=DB_PATH, pragmas=None):
+        self.path = resolve_database_path(path)
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._conn = None
+        self._memory_anchor = None
+        self._lock = threading.RLock()
+        # Bumped by every committed write on this connection and on every reopen
+        self._generation = 0
+        self.stats = {'lock_acquisitions': 0, 'lock_wait_seconds': 0.0,
+                      'max_lock_wait_seconds': 0.0, 'busy_wait_seconds': 0.0,
+                      'write_retries': 0}
+
+    def _open(self):
+        uri = self.path.startswith('file:')
+        if is_memory_database(self.path) and self._memory_anchor is None:
+            self._memory_anchor = sqlite3.connect(self.path, check_same_thread=False, uri=uri)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, uri=uri)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Yield the shared connection, opening it on first use."""
+        started = time.perf_counter()
+        with self._lock:
+            waited = time.perf_counter() - started
+            self.stats['lock_acquisitions'] += 1
+            self.stats['lock_wait_seconds'] += waited
+            if waited > self.stats['max_lock_wait_seconds']:
+                self.stats['max_lock_wait_seconds'] = waited
+            if self._conn is None:
+                self._conn = self._open()
+                self._generation += 1
+            yield self._conn
+
+    @contextmanager
+    def transaction(self):
+        """Yield the shared connection inside BEGIN/COMMIT, rolling back on error.
+
+        Nested calls join the outer transaction instead of starting a new one. BEGIN
+        IMMEDIATE takes the write lock up front, so contention surfaces (after the busy
+        timeout) at the start of the transaction rather than as a failed lock upgrade.
+        While another connection holds the write lock, the wait happens with the manager
+        lock released, so this process's readers keep going in the meantime.
+        """
+        deadline = None
+        delay = BUSY_POLL_MIN_DELAY
+        while True:
+            with self.connection() as conn:
+                if conn.in_transaction:
+                    yield conn
+                    return
+                changes_before = conn.total_changes
+                if self._begin_immediate(conn):
+                    try:
+                        yield conn
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        if conn.in_transaction:
+                            conn.execute('ROLLBACK')
+                        raise
+                    if conn.total_changes != changes_before:
+                        self._generation += 1
+                    return
+            now = time.perf_counter()
+            if deadline is None:
+                deadline = now + self.pragmas.get('busy_timeout', 0) / 1000
+            if now >= deadline:
+                raise sqlite3.OperationalError("database is locked")
+            pause = min(delay, deadline - now)
+            time.sleep(pause)
+            self.stats['busy_wait_seconds'] += pause
+            delay = min(delay * 2, BUSY_POLL_MAX_DELAY)
+
+    @contextmanager
+    def read_transaction(self):
+        """Yield the shared connection inside a deferred BEGIN/COMMIT, for reads that need one snapshot.
+
+        A deferred transaction takes no write lock, so it neither waits for nor holds up
+        writers on other connections. Inside transaction() it joins the outer transaction.
+        """
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute('BEGIN')
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.execute('COMMIT')
+
+    def _begin_immediate(self, conn):
+        """Try BEGIN IMMEDIATE once without SQLite's busy wait; return False if the database is busy."""
+        conn.execute("PRAGMA busy_timeout = 0")
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+        except sqlite3.OperationalError as e:
+            message = str(e).lower()
+            if 'locked' not in message and 'busy' not in message:
+                raise
+            return False
+        finally:
+            conn.execute(f"PRAGMA busy_timeout = {self.pragmas.get('busy_timeout', 0)}")
+        return True
+
+    def in_transaction(self):
+        """Return True if the calling thread is inside transaction()."""
+        # Other threads' transactions hold the lock, so this waits them out
+        with self._lock:
+            return self._conn is not None and self._conn.in_transaction
+
+    def change_token(self):
+        """Return a value that changes whenever the database content may have changed.
+        
+        Combines the local write generation with PRAGMA data_version, which SQLite bumps
+        when another connection (another process, the sqlite3 shell, ...) commits.
+        """
+        with self.connection() as conn:
+            return self._generation, conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def interrupt(self):
+        """Abort the statement running on the connection; safe to call from any thread."""
+        conn = self._conn
+        if conn is not None:
+            conn.interrupt()
+
+    def close(self):
+        """Close the shared connection; the next use opens a fresh one."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def discard(self):
+        """Close the connection, and with it the database if it lives in memory."""
+        with self._lock:
+            self.close()
+            if self._memory_anchor is not None:
+                self._memory_anchor.close()
+                self._memory_anchor = None
+
+_db = ConnectionManager()
+
+# Threads bound with bind_thread_database() use their own ConnectionManager instead of _db
+_thread_db = threading.local()
+
+def _current_db():
+    """Return the ConnectionManager the calling thread's data functions use."""
+    return getattr(_thread_db, 'manager', None) or _db
+
+def bind_thread_database(manager):
+    """Route the calling thread's data functions through manager (None restores the shared one)."""
+    _thread_db.manager = manager
+
+def configure_database(path=None, pragmas=None):
+    """Point the shared connection at another database and/or pragma set.
+    
+    path takes the same forms as DB_PATH; ':memory:' starts a new, empty in-memory
+    database. Moving the shared connection away from an in-memory database discards it.
+    """
+    path = None if path is None else resolve_database_path(path)
+    if path is not None and path != _db.path:
+        _db.discard()
+        _db.path = path
+    else:
+        _db.close()
+    if pragmas is not None:
+        _db.pragmas = dict(pragmas)
+
+def transaction():
+    """Group several data-function calls into one explicit transaction."""
+    return _current_db().transaction()
+
+def read_transaction():
+    """Run several reads on one snapshot of the database, without taking the write lock."""
+    return _current_db().read_transaction()
+
+def database_config():
+    """Return the path and pragmas of the shared connection, as set with configure_database()."""
+    return {"path": _db.path, "pragmas": dict(_db.pragmas)}
+
+def close_database():
+    """Close the shared connection (also registered to run at interpreter exit)."""
+    _db.close()
+
+atexit.register(close_database)
+
+def database_stats():
+    """Return lock-wait, busy-wait and write-retry counters of the shared connection."""
+    return dict(_db.stats)
+
+def database_change_token():
+    """Return a value that changes whenever the database content may have changed."""
+    return _db.change_token()
+
+# Writes that still find the database locked after the busy timeout are retried
+WRITE_RETRY_ATTEMPTS = 5
+WRITE_RETRY_BASE_DELAY = 0.05  # seconds, doubled on every attempt
+
+def retry_on_locked(func):
+    """Retry a write with exponential backoff while another connection holds the write lock.
+    
+    Calls made inside an outer transaction() are not retried here; the outer caller
+    owns the whole transaction.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        db = _current_db()
+        if db.in_transaction():
+            return func(*args, **kwargs)
+        for attempt in range(WRITE_RETRY_ATTEMPTS):
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                message = str(e).lower()
+                if ('locked' not in message and 'busy' not in message) or attempt == WRITE_RETRY_ATTEMPTS - 1:
+                    raise
+                db.stats['write_retries'] += 1
+                # Full jitter keeps retrying sessions from colliding again in lockstep
+                time.sleep(WRITE_RETRY_BASE_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+    return wrapper
+
+# Read-through cache for the task readers, invalidated by ConnectionManager.change_token()
+QUERY_CACHE_SIZE = 32
+
+class QueryCache:
+    """Least-recently-used cache of reader results tagged with the change token they were read at."""
+
+    def __init__(self, maxsize=QUERY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        # Read the token before loading: a write racing with the load can only make the
+        # entry look older than it is, never newer, so it is at worst reloaded once more.
+        # The UTC date is part of it because date windows and urgency scoring move daily
+        if _current_db() is not _db:
+            # Change tokens of thread-bound connections are not comparable with the shared one's
+            return load()
+        token = (_db.change_token(), datetime.now(timezone.utc).date())
+        if _db.in_transaction():
+            # Uncommitted writes of an open transaction() are not reflected in the token yet
+            return load()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == token:
+                self._entries.move_to_end(key)
+                return entry[1]
+        value = load()
+        with self._lock:
+            self._entries[key] = (token, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+_query_cache = QueryCache()
+
+def clear_query_cache():
+    """Drop every cached reader result (benchmarks use this to time cold reads)."""
+    _query_cache.clear()
+
+def _freeze(value):
+    """Turn reader arguments into a hashable cache key (status collections ignore order)."""
+    if isinstance(value, dict):
+        return tuple(sorted((name, _freeze(item)) for name, item in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _copy_result(value):
+    # Callers get their own DataFrames, record lists and summary dicts so they cannot mutate
+    # a cached one. A DataFrame is recognised by its type alone: looking pandas up in
+    # sys.modules could find a module another thread is still importing
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, tuple):
+        return tuple(_copy_result(item) for item in value)
+    if isinstance(value, dict):
+        return dict(value)
+    if type(value).__module__.startswith('pandas'):
+        return value.copy()
+    return value
+
+def cached_query(func):
+    """Serve repeat calls of a reader from the query cache until the database changes."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__name__, _freeze(args), _freeze(kwargs))
+        return _copy_result(_query_cache.get(key, lambda: func(*args, **kwargs)))
+    return wrapper
+
+def init_database():
+    """Initialize the SQLite database and create the tasks table if it doesn't exist."""
+    with _current_db().transaction() as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                topic TEXT NOT NULL,
+                description TEXT,
+                due DATE,
+                status TEXT DEFAULT 'Pending',
+                impact INTEGER DEFAULT 1,
+                tractability INTEGER DEFAULT 1,
+                uncertainty INTEGER DEFAULT 1,
+                score REAL DEFAULT 0.0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                completed_at TIMESTAMP
+            )
+        ''')
+        # Small key/value store for app bookkeeping such as the expiry sweep watermark
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS app_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+        migrated = _add_completed_at(conn)
+        _create_score_triggers(conn)
+        _create_indexes(conn)
+        _create_search_index(conn)
+        _create_completion_rollup(conn, rebuild=migrated)
+
+def _get_meta(conn, key, default=None):
+    row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+    return default if row is None else row[0]
+
+def _set_meta(conn, key, value):
+    conn.execute('''
+        INSERT INTO app_meta (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+    ''', (key, value))
+
+def _replace_trigger(conn, name, sql):
+    """Create trigger name from its CREATE TRIGGER statement, replacing an outdated definition.
+    
+    An unchanged trigger is left alone: rewriting it would change the schema under every
+    other open connection, and SQLite 3.40 can then fail their next write with a spurious
+    "no such table" error.
+    """
+    sql = sql.strip()
+    existing = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (name,)).fetchone()
+    if existing is not None and existing[0] == sql:
+        return
+    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(sql)
+
+def _add_completed_at(conn):
+    """Add completed_at to databases that predate it and keep it in sync with status.
+    
+    completed_at is stamped when a task becomes Completed and cleared when it leaves
+    Completed; other edits leave it alone. Databases created before the column existed
+    are backfilled from updated_at, the best record of completion they have.
+    Returns True if the column was just added.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(tasks)")}
+    added = 'completed_at' not in columns
+    if added:
+        conn.execute("ALTER TABLE tasks ADD COLUMN completed_at TIMESTAMP")
+        conn.execute("UPDATE tasks SET completed_at = updated_at WHERE status = 'Completed'")
+    
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_completed_at_ai AFTER INSERT ON tasks
+        WHEN new.status = 'Completed' AND new.completed_at IS NULL BEGIN
+            UPDATE tasks SET completed_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = new.id;
+        END
+    ''')
+    # status is nullable, so the comparison is NULL-safe: a task with no status still
+    # counts as not completed. Replaced on open to fix databases with the older condition
+    _replace_trigger(conn, 'tasks_completed_at_au', '''
+        CREATE TRIGGER tasks_completed_at_au AFTER UPDATE OF status ON tasks
+        WHEN (new.status IS 'Completed') IS NOT (old.status IS 'Completed') BEGIN
+            UPDATE tasks SET completed_at = CASE WHEN new.status = 'Completed'
+                THEN strftime('%Y-%m-%d %H:%M:%f', 'now') END
+            WHERE id = new.id;
+        END
+    ''')
+    return added
+
+def _create_indexes(conn):
+    """Create the secondary indexes that match the app's hot query shapes."""
+    # get_all_tasks / search ordering: ORDER BY score DESC, due ASC without a sort step
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_score_due ON tasks (score DESC, due)")
+    # Status-filtered lists and counts: only the rows of the requested statuses, each in list order
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_score_due ON tasks (status, score DESC, due, id)")
+    # get_completed_tasks_in_range: only completed rows, already in display order
+    conn.execute("DROP INDEX IF EXISTS idx_tasks_completed_updated")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_completed_at
+        ON tasks (completed_at DESC, score DESC) WHERE completed_at IS NOT NULL
+    ''')
+    # check_and_update_expired_tasks: only rows that can still expire, by age
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tasks_expirable_created
+        ON tasks (created_at) WHERE status NOT IN ('Expired', 'Completed')
+    ''')
+
+# Full-text search over tasks. search_by value -> FTS5 column filter (None searches every column)
+_FTS_COLUMNS = {"all": None, "topic": "topic", "description": "description"}
+_fts_enabled = True
+
+def _create_search_index(conn):
+    """Create the FTS5 index and the triggers that keep it in sync with the tasks table.
+
+    Databases that predate the index are backfilled from tasks on first open. If this
+    SQLite build lacks FTS5, search_tasks falls back to LIKE scans.
+    """
+    global _fts_enabled
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'").fetchone()
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                topic, description, status,
+                content='tasks', content_rowid='id', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        _fts_enabled = False
+        return
+    _fts_enabled = True
+    
+    # Bulk imports pause the insert trigger (inside their own transaction) and index
+    # the new rows in one statement, which is several times faster than row by row
+    _replace_trigger(conn, 'tasks_fts_ai', '''
+        CREATE TRIGGER tasks_fts_ai AFTER INSERT ON tasks
+        WHEN NOT EXISTS (SELECT 1 FROM app_meta WHERE key = 'fts_sync_paused')
+        BEGIN
+            INSERT INTO tasks_fts(rowid, topic, description, status)
+            VALUES (new.id, new.topic, new.description, new.status);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, topic, description, status)
+            VALUES ('delete', old.id, old.topic, old.description, old.status);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF topic, description, status ON tasks BEGIN
+            INSERT INTO tasks_fts(tasks_fts, rowid, topic, description, status)
+            VALUES ('delete', old.id, old.topic, old.description, old.status);
+            INSERT INTO tasks_fts(rowid, topic, description, status)
+            VALUES (new.id, new.topic, new.description, new.status);
+        END
+    ''')
+    
+    if not existed:
+        conn.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+# Per-day totals of completed tasks (by the day of completed_at), maintained by triggers so
+# the Done Today metrics read at most one row per day instead of aggregating raw tasks.
+# Both directions are upserts of signed deltas, so the result does not depend on the
+# order in which SQLite fires the triggers of one statement.
+def _rollup_delta(row, sign):
+    return f'''
+    INSERT INTO daily_completions (day, completed, total_impact, total_score, high_impact, high_score)
+    VALUES (date({row}.completed_at), {sign}1, {sign}{row}.impact, {sign}{row}.score,
+            {sign}({row}.impact >= 7), {sign}({row}.score >= 5.0))
+    ON CONFLICT(day) DO UPDATE SET
+        completed = completed + excluded.completed,
+        total_impact = total_impact + excluded.total_impact,
+        total_score = total_score + excluded.total_score,
+        high_impact = high_impact + excluded.high_impact,
+        high_score = high_score + excluded.high_score;
+    '''
+
+_ROLLUP_TRIGGERS = {
+    'daily_completions_ai': ("AFTER INSERT", "new.completed_at IS NOT NULL", _rollup_delta('new', '+')),
+    'daily_completions_ad': ("AFTER DELETE", "old.completed_at IS NOT NULL", _rollup_delta('old', '-')),
+    # An update moves the row's contribution: out of its old day, into its new one
+    'daily_completions_au_old': ("AFTER UPDATE OF completed_at, impact, score",
+                                 "old.completed_at IS NOT NULL", _rollup_delta('old', '-')),
+    'daily_completions_au_new': ("AFTER UPDATE OF completed_at, impact, score",
+                                 "new.completed_at IS NOT NULL", _rollup_delta('new', '+')),
+}
+
+def _create_completion_rollup(conn, rebuild=False):
+    """Create the daily completion rollup and its triggers, backfilling it on first open.
+    
+    rebuild recomputes the rollup from the tasks table, e.g. after a migration.
+    """
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'daily_completions'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS daily_completions (
+            day TEXT PRIMARY KEY,
+            completed INTEGER NOT NULL,
+            total_impact INTEGER NOT NULL,
+            total_score REAL NOT NULL,
+            high_impact INTEGER NOT NULL,
+            high_score INTEGER NOT NULL
+        )
+    ''')
+    # Replaced on open whenever the trigger bodies here have changed
+    for name, (event, condition, body) in _ROLLUP_TRIGGERS.items():
+        _replace_trigger(conn, name, f"CREATE TRIGGER {name} {event} ON tasks WHEN {condition} BEGIN {body} END")
+    
+    if not existed or rebuild:
+        conn.execute("DELETE FROM daily_completions")
+        conn.execute('''
+            INSERT INTO daily_completions (day, completed, total_impact, total_score, high_impact, high_score)
+            SELECT date(completed_at), COUNT(*), SUM(impact), SUM(score), SUM(impact >= 7), SUM(score >= 5.0)
+            FROM tasks WHERE completed_at IS NOT NULL GROUP BY date(completed_at)
+        ''')
+
+def _fts_match_expression(search_term, column=None):
+    """Build an FTS5 query in which every word of search_term must match as a prefix.
+
+    Words are quoted so user input can never be parsed as FTS5 query syntax.
+    Returns None when the search term contains no searchable words.
+    """
+    words = re.findall(r'\w+', search_term)
+    if not words:
+        return None
+    expression = ' '.join(f'"{word}"*' for word in words)
+    if column:
+        expression = f'{column} : ({expression})'
+    return expression
+
+def calculate_score(impact, tractability, uncertainty):
+    """Calculate the score based on impact, tractability, and uncertainty."""
+    if tractability == 0 or uncertainty == 0:
+        return 0.0
+    return (impact * tractability) / uncertainty
+
+def calculate_scores(impact, tractability, uncertainty):
+    """Vectorized calculate_score over NumPy arrays or pandas Series of ratings.
+    
+    Returns a float64 array, or a Series on the index of the first Series argument.
+    Inputs are matched by position and broadcast; as in calculate_score, rows with zero
+    tractability or uncertainty score 0.0. Missing ratings give NaN scores.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    index = next((x.index for x in (impact, tractability, uncertainty) if isinstance(x, pd.Series)), None)
+    impact, tractability, uncertainty = np.broadcast_arrays(*(
+        x.to_numpy(dtype=np.float64, na_value=np.nan) if isinstance(x, (pd.Series, pd.Index))
+        else np.asarray(x, dtype=np.float64)
+        for x in (impact, tractability, uncertainty)
+    ))
+    scores = np.divide(impact * tractability, uncertainty, out=np.zeros(impact.shape),
+                       where=(tractability != 0) & (uncertainty != 0))
+    return scores if index is None else pd.Series(scores, index=index, name='score')
+
+def _score_sql(row=None):
+    """SQL equivalent of calculate_score over the columns of tasks (or of new./old. in a trigger)."""
+    p = f"{row}." if row else ""
+    return (f"COALESCE(CASE WHEN {p}tractability = 0 OR {p}uncertainty = 0 THEN 0.0 "
+            f"ELSE CAST({p}impact * {p}tractability AS REAL) / {p}uncertainty END, 0.0)")
+
+# The stored score is derived in SQL: triggers keep every row equal to SCORE_SQL, and
+# changing the formula here (and in calculate_score) rescores the table on the next open
+SCORE_SQL = _score_sql()
+
+def _create_score_triggers(conn):
+    """Keep tasks.score equal to SCORE_SQL, rescoring every row if the formula changed."""
+    _replace_trigger(conn, 'tasks_score_ai', f'''
+        CREATE TRIGGER tasks_score_ai AFTER INSERT ON tasks
+        WHEN new.score IS NOT {_score_sql('new')} BEGIN
+            UPDATE tasks SET score = {SCORE_SQL} WHERE id = new.id;
+        END
+    ''')
+    _replace_trigger(conn, 'tasks_score_au', f'''
+        CREATE TRIGGER tasks_score_au AFTER UPDATE OF impact, tractability, uncertainty, score ON tasks
+        WHEN new.score IS NOT {_score_sql('new')} BEGIN
+            UPDATE tasks SET score = {SCORE_SQL} WHERE id = new.id;
+        END
+    ''')
+    if _get_meta(conn, 'score_formula') != SCORE_SQL:
+        rescore_tasks(conn)
+        _set_meta(conn, 'score_formula', SCORE_SQL)
+
+def rescore_tasks(conn=None):
+    """Recompute every stored score with one UPDATE; returns the number of rows changed."""
+    with nullcontext(conn) if conn is not None else _current_db().transaction() as conn:
+        return conn.execute(f"UPDATE tasks SET score = {SCORE_SQL} WHERE score IS NOT {SCORE_SQL}").rowcount
+
+# Priority models for ordering tasks. Each strategy is a SQL expression over the tasks
+# columns, so SQLite evaluates it for the whole task set inside the listing query itself
+# and nothing stored changes when a view switches strategy
+SCORING_STRATEGIES = {}
+
+def register_scoring_strategy(name, label, sql):
+    """Add (or replace) a named priority model; sql is an expression over the tasks columns."""
+    SCORING_STRATEGIES[name] = {"label": label, "sql": sql}
+
+def weighted_sum_sql(impact=0.5, tractability=0.3, uncertainty=-0.2):
+    """Priority as a weighted sum of the ratings."""
+    return f"({float(impact)!r} * impact + {float(tractability)!r} * tractability + {float(uncertainty)!r} * uncertainty)"
+
+def due_urgency_sql(horizon_days=14, max_boost=1.0):
+    """The stored score boosted as the due date nears.
+    
+    The boost grows linearly from nothing horizon_days before the due date to
+    max_boost (1.0 doubles the score) on the due date, and stays there once overdue.
+    """
+    horizon, boost = float(horizon_days), float(max_boost)
+    days_left = "(julianday(due) - julianday(date('now')))"
+    return (f"(score * (1.0 + {boost!r} * CASE WHEN due IS NULL THEN 0.0 "
+            f"ELSE MIN(1.0, MAX(0.0, ({horizon!r} - {days_left}) / {horizon!r})) END))")
+
+register_scoring_strategy("impact_tractability", "Impact × Tractability ÷ Uncertainty", "score")
+register_scoring_strategy("weighted_sum", "Weighted sum of ratings", weighted_sum_sql())
+register_scoring_strategy("due_urgency", "Score boosted by due date", due_urgency_sql())
+
+# Deployments pick their default with the TODO_SCORING_STRATEGY environment variable
+DEFAULT_SCORING_STRATEGY = os.environ.get("TODO_SCORING_STRATEGY", "impact_tractability")
+
+def priority_sql(strategy=None):
+    """Return the SQL expression of a scoring strategy (the default one if strategy is None)."""
+    name = strategy or DEFAULT_SCORING_STRATEGY
+    if name not in SCORING_STRATEGIES:
+        raise ValueError(f"Unknown scoring strategy {name!r}; expected one of {', '.join(SCORING_STRATEGIES)}")
+    return SCORING_STRATEGIES[name]["sql"]
+
+# Tasks older than this are marked Expired; the sweep that does it runs at most once per interval
+EXPIRY_DAYS = 90
+EXPIRY_SWEEP_INTERVAL = timedelta(minutes=15)
+
+# created_at defaults to CURRENT_TIMESTAMP, i.e. UTC in this format
+_SQL_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+@retry_on_locked
+def check_and_update_expired_tasks(min_interval=None):
+    """Check for tasks older than 90 days and mark them as expired.
+    
+    The cutoff of every sweep is persisted in app_meta as a watermark, so a sweep only
+    touches tasks that crossed the threshold since the previous one (and a task manually
+    moved back out of Expired stays that way). With min_interval, the sweep is skipped
+    (returning 0) when the previous one ran less than min_interval ago; that check is a
+    plain read and takes no write lock. Returns the number of tasks marked expired.
+    """
+    # Calculate the date 90 days ago
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=EXPIRY_DAYS)
+    cutoff_sql = cutoff.strftime(_SQL_TIMESTAMP_FORMAT)
+    
+    def sweep_is_due(watermark):
+        return (watermark is None or min_interval is None
+                or cutoff - datetime.strptime(watermark, _SQL_TIMESTAMP_FORMAT) >= min_interval)
+    
+    with _current_db().connection() as conn:
+        if not sweep_is_due(_get_meta(conn, 'expiry_watermark')):
+            return 0
+    
+    with _current_db().transaction() as conn:
+        # Re-read inside the write transaction in case another process swept meanwhile
+        watermark = _get_meta(conn, 'expiry_watermark')
+        if not sweep_is_due(watermark) or (watermark is not None and watermark >= cutoff_sql):
+            return 0
+        
+        # Update tasks that crossed the threshold since the last sweep and are not already expired or completed
+        cursor = conn.execute('''
+            UPDATE tasks 
+            SET status = 'Expired', updated_at = CURRENT_TIMESTAMP
+            WHERE created_at < ? AND created_at >= ?
+            AND status NOT IN ('Expired', 'Completed')
+        ''', (cutoff_sql, watermark or ''))
+        updated_count = cursor.rowcount
+        _set_meta(conn, 'expiry_watermark', cutoff_sql)
+    
+    return updated_count
+
+def _read_frame(query, conn, **kwargs):
+    """pd.read_sql_query, importing pandas on first use so importing this module stays light."""
+    import pandas as pd
+    return pd.read_sql_query(query, conn, **kwargs)
+
+# Columns of task frames stored as ISO-8601 text and read as datetime64
+TASK_DATE_COLUMNS = ("due", "created_at", "updated_at", "completed_at")
+
+def _rating_column(values):
+    """Return numeric rating values as nullable Int8, or the narrowest nullable type that holds them.
+    
+    Rows written by other tools can hold ratings outside 1-10 or non-numeric text (already
+    coerced to NA here); those widen the column to Int64, or Float64 for fractions, instead
+    of failing the read.
+    """
+    present = values.dropna()
+    if not (present == present.round()).all():
+        return values.astype('Float64')
+    if present.empty or (present.min() >= -128 and present.max() <= 127):
+        return values.astype('Int8')
+    return values.astype('Int64')
+
+def _read_tasks_frame(query, conn, params):
+    """Read task rows into a typed DataFrame, converting each column once, vectorized.
+    
+    status is categorical, the 1-10 ratings are nullable Int8 (wider if other tools stored
+    out-of-range values) and the dates are datetime64 (NaT where unset), so callers never
+    re-parse strings row by row.
+    """
+    import pandas as pd
+    df = _read_frame(query, conn, params=params)
+    # Statuses written by other tools are kept as extra categories rather than lost
+    statuses = TASK_STATUSES + sorted(set(df['status'].dropna()) - set(TASK_STATUSES))
+    df['status'] = pd.Categorical(df['status'], categories=statuses)
+    for column in RATING_FIELDS:
+        df[column] = _rating_column(pd.to_numeric(df[column], errors='coerce'))
+    for column in TASK_DATE_COLUMNS:
+        # created_at has whole seconds, updated_at milliseconds; anything unparseable becomes NaT
+        df[column] = pd.to_datetime(df[column], format='ISO8601', errors='coerce')
+    return df
+
+def _where_clause(conditions):
+    """Join (sql, params) predicates with AND into a WHERE clause and its parameter list."""
+    conditions = [condition for condition in conditions if condition is not None]
+    if not conditions:
+        return "", []
+    sql = "WHERE " + " AND ".join(f"({predicate})" for predicate, _ in conditions)
+    params = [param for _, predicate_params in conditions for param in predicate_params]
+    return sql, params
+
+def _status_condition(statuses, column="status"):
+    """Return a predicate restricting column to the given statuses (None means any status)."""
+    if statuses is None:
+        return None
+    statuses = list(statuses)
+    if not statuses:
+        return "0", []
+    return f"{column} IN ({', '.join('?' * len(statuses))})", statuses
+
+def _fetch_tasks(query, params):
+    """Run a query selecting TASK_FIELDS (and optionally priority) and return its rows as Tasks."""
+    with _current_db().connection() as conn:
+        return [Task(*row) for row in conn.execute(query, params)]
+
+def _all_tasks_query(statuses=None, strategy=None):
+    where, params = _where_clause([_status_condition(statuses)])
+    return (f"SELECT {TASK_FIELDS}, {priority_sql(strategy)} AS priority FROM tasks {where} "
+            "ORDER BY priority DESC, due ASC"), params
+
+@cached_query
+def get_all_tasks(statuses=None, strategy=None):
+    """Retrieve tasks from the database, optionally only those with the given statuses.
+    
+    Rows are ordered by the priority column computed by the scoring strategy.
+    """
+    query, params = _all_tasks_query(statuses, strategy)
+    with _current_db().connection() as conn:
+        return _read_tasks_frame(query, conn, params)
+
+@cached_query
+def get_task_records(statuses=None, strategy=None):
+    """get_all_tasks() as a list of Task records, read without pandas."""
+    return _fetch_tasks(*_all_tasks_query(statuses, strategy))
+
+# Page sizes offered by the View Tasks pager
+DEFAULT_PAGE_SIZE = 25
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
+def _due_text(due):
+    """Return a due date as stored: 'YYYY-MM-DD' text, or None for no date (NaT and NaN included)."""
+    if due is None or due != due:
+        # NaT and NaN are the only values unequal to themselves
+        return None
+    if hasattr(due, 'strftime'):
+        # date, datetime and the Timestamps of typed task frames
+        return due.strftime('%Y-%m-%d')
+    return due
+
+def task_page_key(task):
+    """Return the (priority, due, id) keyset position of a Task record or task frame row."""
+    return float(task['priority']), _due_text(task['due']), int(task['id'])
+
+def _keyset_condition(key, forward, priority="score"):
+    """Predicate selecting rows after (forward) or before a key in priority DESC, due ASC, id ASC order.
+    
+    SQLite sorts NULL due dates first, so a NULL due is treated as the smallest value.
+    With the stored score as priority, the leading bound lets the planner seek straight
+    into idx_tasks_score_due.
+    """
+    value, due, task_id = key
+    if forward:
+        if due is None:
+            tie = "due IS NOT NULL OR id > ?", [task_id]
+        else:
+            tie = "due > ? OR (due = ? AND id > ?)", [due, due, task_id]
+        return (f"{priority} <= ? AND ({priority} < ? OR ({priority} = ? AND ({tie[0]})))",
+                [value, value, value] + tie[1])
+    if due is None:
+        tie = "due IS NULL AND id < ?", [task_id]
+    else:
+        tie = "due IS NULL OR due < ? OR (due = ? AND id < ?)", [due, due, task_id]
+    return (f"{priority} >= ? AND ({priority} > ? OR ({priority} = ? AND ({tie[0]})))",
+            [value, value, value] + tie[1])
+
+def _tasks_page_query(statuses, page_size, after, before, strategy):
+    """Return the query and params of a keyset page, reading one extra row to tell if more follow."""
+    priority = priority_sql(strategy)
+    conditions = [_status_condition(statuses)]
+    order = "priority DESC, due ASC, id ASC"
+    if after is not None:
+        conditions.append(_keyset_condition(after, forward=True, priority=priority))
+    elif before is not None:
+        conditions.append(_keyset_condition(before, forward=False, priority=priority))
+        order = "priority ASC, due DESC, id DESC"
+    where, params = _where_clause(conditions)
+    return (f"SELECT {TASK_FIELDS}, {priority} AS priority FROM tasks {where} ORDER BY {order} LIMIT ?",
+            params + [page_size + 1])
+
+@cached_query
+def get_tasks_page(statuses=None, page_size=DEFAULT_PAGE_SIZE, after=None, before=None, strategy=None):
+    """Return one page of tasks in list order and whether more rows lie in that direction.
+    
+    Uses keyset pagination: pass the task_page_key() of the last row shown as after= to get
+    the next page, or of the first row shown as before= to get the previous one. Every page
+    is an index seek plus page_size rows, however deep into the list it is (for strategies
+    other than the stored score, SQLite computes and sorts the priorities instead).
+    """
+    query, params = _tasks_page_query(statuses, page_size, after, before, strategy)
+    with _current_db().connection() as conn:
+        df = _read_tasks_frame(query, conn, params)
+    has_more = len(df) > page_size
+    df = df.iloc[:page_size]
+    if before is not None:
+        df = df.iloc[::-1]
+    return df.reset_index(drop=True), has_more
+
+@cached_query
+def get_task_records_page(statuses=None, page_size=DEFAULT_PAGE_SIZE, after=None, before=None, strategy=None):
+    """get_tasks_page() with the page as a list of Task records, read without pandas."""
+    tasks = _fetch_tasks(*_tasks_page_query(statuses, page_size, after, before, strategy))
+    has_more = len(tasks) > page_size
+    tasks = tasks[:page_size]
+    if before is not None:
+        tasks.reverse()
+    return tasks, has_more
+
+@retry_on_locked
+def add_task(topic, description, due, status, impact, tractability, uncertainty):
+    """Add a new task to the database and return its id."""
+    # The score is filled in by the tasks_score_ai trigger
+    with _current_db().transaction() as conn:
+        cursor = conn.execute('''
+            INSERT INTO tasks (topic, description, due, status, impact, tractability, uncertainty)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (topic, description, _due_text(due), status, impact, tractability, uncertainty))
+        return cursor.lastrowid
+
+@retry_on_locked
+def update_task(task_id, topic, description, due, status, impact, tractability, uncertainty):
+    """Update an existing task in the database; returns False if there is no such task."""
+    # Millisecond precision so an edit made in the same second as creation still shows up;
+    # int() because ids read back through pandas are numpy integers, which sqlite3 binds as BLOBs;
+    # due may likewise come from a typed frame as a Timestamp or NaT.
+    # The tasks_score_au trigger rescores the row if its ratings changed
+    with _current_db().transaction() as conn:
+        return conn.execute('''
+            UPDATE tasks 
+            SET topic=?, description=?, due=?, status=?, impact=?, tractability=?, uncertainty=?,
+                updated_at=strftime('%Y-%m-%d %H:%M:%f', 'now')
+            WHERE id=?
+        ''', (topic, description, _due_text(due), status, impact, tractability, uncertainty,
+              int(task_id))).rowcount > 0
+
+@retry_on_locked
+def delete_task(task_id):
+    """Delete a task from the database; returns False if there is no such task."""
+    with _current_db().transaction() as conn:
+        return conn.execute('DELETE FROM tasks WHERE id=?', (int(task_id),)).rowcount > 0
+
+# Column order of the tasks table, i.e. of Task records and their positional indexes
+TASK_COLUMNS = ("id", "topic", "description", "due", "status", "impact", "tractability", "uncertainty",
+                "score", "created_at", "updated_at", "completed_at")
+# Qualified so the same select list works in joins
+TASK_FIELDS = ", ".join(f"tasks.{column}" for column in TASK_COLUMNS)
+
+class Task:
+    """One task row, as returned by get_task_by_id() and the *_records readers.
+    
+    Fields are attributes (task.topic); task['topic'] works too, as does task[1] for
+    code written against the old row tuples. priority is set by readers that order by a
+    scoring strategy and is None otherwise. Records may be shared through the query
+    cache, so treat them as read-only.
+    """
+    __slots__ = TASK_COLUMNS + ("priority",)
+
+    def __init__(self, id, topic, description, due, status, impact, tractability, uncertainty,
+                 score, created_at, updated_at, completed_at, priority=None):
+        self.id = id
+        self.topic = topic
+        self.description = description
+        self.due = due
+        self.status = status
+        self.impact = impact
+        self.tractability = tractability
+        self.uncertainty = uncertainty
+        self.score = score
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.completed_at = completed_at
+        self.priority = priority
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self.__slots__:
+                raise KeyError(key)
+            return getattr(self, key)
+        if isinstance(key, slice):
+            return tuple(self)[key]
+        return getattr(self, TASK_COLUMNS[key])
+
+    def get(self, key, default=None):
+        """Return the field named key, or default if it is unset (None) or unknown."""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __iter__(self):
+        # Like the old row tuples: the table columns, without priority
+        return (getattr(self, column) for column in TASK_COLUMNS)
+
+    def __len__(self):
+        return len(TASK_COLUMNS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Task):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Task(id={self.id!r}, topic={self.topic!r}, status={self.status!r}, score={self.score!r})"
+
+    def as_dict(self):
+        """Return the fields as a dict, with priority only if it was set."""
+        fields = {column: getattr(self, column) for column in TASK_COLUMNS}
+        if self.priority is not None:
+            fields["priority"] = self.priority
+        return fields
+
+def get_task_by_id(task_id):
+    """Get a specific task by ID as a Task record, or None if there is no such task."""
+    tasks = _fetch_tasks(f"SELECT {TASK_FIELDS} FROM tasks WHERE id=?", (int(task_id),))
+    return tasks[0] if tasks else None
+
+def _search_query(search_term, search_by="all"):
+    """Return (from clause, conditions, order by) for a search, or None for an unknown mode.
+    
+    "all", "topic" and "description" searches go through the FTS5 index: every word must
+    match the start of a word in the task, and results are ranked by bm25 relevance, then
+    by priority.
+    """
+    if search_by in _FTS_COLUMNS and _fts_enabled:
+        match = _fts_match_expression(search_term, _FTS_COLUMNS[search_by])
+        if match is None:
+            return "tasks", [("0", [])], "priority DESC, due ASC"
+        # bm25 weights per column (topic, description, status); lower scores rank higher
+        return (
+            "tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid",
+            [("tasks_fts MATCH ?", [match])],
+            "bm25(tasks_fts, 10.0, 5.0, 1.0), priority DESC, tasks.due ASC",
+        )
+    
+    search_pattern = f"%{search_term}%"
+    #the default behaviour
+    if search_by == "all":
+        condition = ("topic LIKE ? OR description LIKE ? OR status LIKE ?", [search_pattern] * 3)
+    # the user also has the option to search by topic, description or status
+    elif search_by in ("topic", "description", "status"):
+        condition = (f"{search_by} LIKE ?", [search_pattern])
+    else:
+        return None
+    return "tasks", [condition], "priority DESC, due ASC"
+
+def _search_tasks_query(search_term, search_by="all", statuses=None, strategy=None):
+    """Return the query and params of a search, or None for an unknown search mode."""
+    search = _search_query(search_term, search_by)
+    if search is None:
+        return None
+    from_clause, conditions, order_by = search
+    where, params = _where_clause(conditions + [_status_condition(statuses, "tasks.status")])
+    return (f"SELECT {TASK_FIELDS}, {priority_sql(strategy)} AS priority FROM {from_clause} {where} "
+            f"ORDER BY {order_by}"), params
+
+@cached_query
+def search_tasks(search_term, search_by="all", statuses=None, strategy=None):
+    """Search tasks by topic, description, or status, optionally only with the given statuses."""
+    search = _search_tasks_query(search_term, search_by, statuses, strategy)
+    if search is None:
+        import pandas as pd
+        return pd.DataFrame()
+    query, params = search
+    with _current_db().connection() as conn:
+        return _read_tasks_frame(query, conn, params)
+
+@cached_query
+def search_task_records(search_term, search_by="all", statuses=None, strategy=None):
+    """search_tasks() as a list of Task records, read without pandas."""
+    search = _search_tasks_query(search_term, search_by, statuses, strategy)
+    return [] if search is None else _fetch_tasks(*search)
+
+def _filtered_tasks(statuses=None, search_term=None, search_by="all", completed_since=None):
+    """Return (from clause, where clause, params) selecting the tasks a page lists, or None.
+    
+    None means the search mode is unknown, so nothing matches.
+    """
+    from_clause, conditions = "tasks", []
+    if search_term is not None:
+        search = _search_query(search_term, search_by)
+        if search is None:
+            return None
+        from_clause, conditions, _ = search
+    if completed_since is not None:
+        conditions = conditions + [("tasks.completed_at >= ?", [completed_since])]
+    where, params = _where_clause(conditions + [_status_condition(statuses, "tasks.status")])
+    return from_clause, where, params
+
+@cached_query
+def count_tasks(statuses=None, search_term=None, search_by="all"):
+    """Count tasks matching the status filter and, if given, the search term."""
+    filtered = _filtered_tasks(statuses, search_term, search_by)
+    if filtered is None:
+        return 0
+    from_clause, where, params = filtered
+    with _current_db().connection() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {from_clause} {where}", params).fetchone()[0]
+
+SUMMARY_FIELDS = ("total", "pending", "completed", "avg_score", "total_impact", "high_impact", "high_score")
+
+@cached_query
+def task_summary(statuses=None, search_term=None, search_by="all", completed_since=None):
+    """Aggregate the footer metrics of a page in one query over the same filters as its listing.
+    
+    Returns a dict with the keys in SUMMARY_FIELDS; avg_score is None when nothing matches.
+    """
+    filtered = _filtered_tasks(statuses, search_term, search_by, completed_since)
+    if filtered is None:
+        return dict.fromkeys(SUMMARY_FIELDS, 0) | {"avg_score": None}
+    from_clause, where, params = filtered
+    query = f"""
+    SELECT COUNT(*),
+           COALESCE(SUM(tasks.status = 'Pending'), 0),
+           COALESCE(SUM(tasks.status = 'Completed'), 0),
+           AVG(tasks.score),
+           COALESCE(SUM(tasks.impact), 0),
+           COALESCE(SUM(tasks.impact >= 7), 0),
+           COALESCE(SUM(tasks.score >= 5.0), 0)
+    FROM {from_clause} {where}
+    """
+    with _current_db().connection() as conn:
+        return dict(zip(SUMMARY_FIELDS, conn.execute(query, params).fetchone()))
+
+# The tasks matching {where} in the stored-score list order
+_TASK_LIST_QUERY = f"SELECT {TASK_FIELDS}, score AS priority FROM tasks {{where}} ORDER BY score DESC, due ASC, id ASC"
+
+def _list_key(task):
+    """Sort key of a task in list order: score DESC, then due ASC with no date first, then id."""
+    return -task.score, task.due is not None, task.due or '', task.id
+
+def _cursor_list_key(key):
+    """_list_key() of the row at a task_page_key() position."""
+    priority, due, task_id = key
+    return -priority, due is not None, due or '', task_id
+
+class TaskCache:
+    """One session's copy of the task list, kept in list order and patched by its own writes.
+    
+    Tasks are held per status in lists sorted like the stored-score list (score DESC,
+    due ASC, id ASC), with running totals for the footer metrics. A status is loaded the
+    first time a read asks for it, so statuses the session never shows (Completed and
+    Expired history, by default) are not read. add_task, update_task and delete_task
+    called on the cache re-read only the written row and move it into place with a
+    bisect, so editing one task never reloads the others. Any other change to the
+    database (another session or process, the expiry sweep, an import) moves the change
+    token, and the next read reloads the statuses it needs. Meant for one session at a
+    time; other scoring strategies still go through the readers.
+    """
+
+    def __init__(self):
+        self._token = None
+        self._keys = {}    # status -> sorted _list_key()s
+        self._tasks = {}   # status -> Task records in the same order
+        self._totals = {}  # status -> [score sum, impact sum, impact >= 7 count, score >= 5 count]
+        self._by_id = {}
+        self._complete = False  # True once every status is loaded
+        self.stats = {'reloads': 0, 'patches': 0}
+
+    def _current(self, statuses=None):
+        """Drop the lists if the database changed, then load the statuses (None means all) not held yet."""
+        db = _current_db()
+        with db.connection():
+            # Holding the lock keeps the token and the rows from the same moment
+            token = db.change_token()
+            if token != self._token:
+                self._keys, self._tasks, self._totals, self._by_id = {}, {}, {}, {}
+                self._complete = False
+                self._token = token
+            if statuses is None:
+                if not self._complete:
+                    self._load(None)
+            else:
+                missing = [status for status in dict.fromkeys(statuses) if status not in self._keys]
+                if missing:
+                    self._load(missing)
+
+    def _load(self, statuses):
+        # Only statuses not held yet are read, so the new rows never go into an existing list
+        if statuses is None:
+            held = list(self._keys)
+            where = f"WHERE status IS NULL OR status NOT IN ({', '.join('?' * len(held))})" if held else ""
+            tasks = _fetch_tasks(_TASK_LIST_QUERY.format(where=where), held)
+            self._complete = True
+        else:
+            where = f"WHERE status IN ({', '.join('?' * len(statuses))})"
+            tasks = _fetch_tasks(_TASK_LIST_QUERY.format(where=where), statuses)
+            for status in statuses:
+                self._keys[status], self._tasks[status] = [], []
+                self._totals[status] = [0.0, 0, 0, 0]
+        # The rows arrive in list order, so each status list is built by appending
+        for task in tasks:
+            self._keys.setdefault(task.status, []).append(_list_key(task))
+            self._tasks.setdefault(task.status, []).append(task)
+            self._by_id[task.id] = task
+            self._add_totals(task, 1)
+        self.stats['reloads'] += 1
+
+    def _insert(self, task):
+        key = _list_key(task)
+        keys = self._keys.setdefault(task.status, [])
+        position = bisect.bisect_left(keys, key)
+        keys.insert(position, key)
+        self._tasks.setdefault(task.status, []).insert(position, task)
+        self._by_id[task.id] = task
+        self._add_totals(task, 1)
+
+    def _remove(self, task):
+        keys = self._keys[task.status]
+        position = bisect.bisect_left(keys, _list_key(task))
+        del keys[position]
+        del self._tasks[task.status][position]
+        del self._by_id[task.id]
+        self._add_totals(task, -1)
+
+    def _add_totals(self, task, sign):
+        totals = self._totals.setdefault(task.status, [0.0, 0, 0, 0])
+        impact = task.impact or 0
+        totals[0] += sign * task.score
+        totals[1] += sign * impact
+        totals[2] += sign * (impact >= 7)
+        totals[3] += sign * (task.score >= 5.0)
+
+    def _statuses(self, statuses):
+        if statuses is None:
+            return list(self._keys)
+        return list(dict.fromkeys(statuses))
+
+    def _run(self, status, start, step):
+        # (key, task) pairs from start onwards (step 1) or backwards (step -1), without copying
+        keys, tasks = self._keys[status], self._tasks[status]
+        stop = len(keys) if step > 0 else -1
+        return ((keys[i], tasks[i]) for i in range(start, stop, step))
+
+    def tasks(self, statuses=None):
+        """Return the tasks with the given statuses (None means any) in list order."""
+        self._current(statuses)
+        runs = [self._run(status, 0, 1) for status in self._statuses(statuses)]
+        return [task for _, task in heapq.merge(*runs)]
+
+    def get(self, task_id):
+        """Return the Task with task_id, or None."""
+        self._current(())
+        task = self._by_id.get(int(task_id))
+        if task is None and not self._complete:
+            # It may have a status no read has loaded; look the one row up instead
+            rows = _fetch_tasks(f"SELECT {TASK_FIELDS}, score AS priority FROM tasks WHERE id = ?", [int(task_id)])
+            task = rows[0] if rows else None
+        return task
+
+    def page(self, statuses=None, page_size=DEFAULT_PAGE_SIZE, after=None, before=None):
+        """get_task_records_page() in the stored-score order, served from the cache.
+        
+        Each status list is entered with a bisect and the lists are merged lazily, so a
+        page costs O(log n + page_size) wherever it lies.
+        """
+        self._current(statuses)
+        statuses = self._statuses(statuses)
+        if before is not None:
+            bound = _cursor_list_key(before)
+            runs = [self._run(status, bisect.bisect_left(self._keys[status], bound) - 1, -1) for status in statuses]
+            merged = heapq.merge(*runs, reverse=True)
+        else:
+            bound = None if after is None else _cursor_list_key(after)
+            runs = [self._run(status, 0 if bound is None else bisect.bisect_right(self._keys[status], bound), 1)
+                    for status in statuses]
+            merged = heapq.merge(*runs)
+        tasks = [task for _, task in itertools.islice(merged, page_size + 1)]
+        has_more = len(tasks) > page_size
+        tasks = tasks[:page_size]
+        if before is not None:
+            tasks.reverse()
+        return tasks, has_more
+
+    def count(self, statuses=None):
+        """count_tasks(statuses), from the list lengths."""
+        self._current(statuses)
+        return sum(len(self._keys[status]) for status in self._statuses(statuses))
+
+    def summary(self, statuses=None):
+        """task_summary(statuses), from the running totals."""
+        self._current(statuses)
+        statuses = self._statuses(statuses)
+        total = sum(len(self._keys[status]) for status in statuses)
+        sums = [sum(self._totals[status][i] for status in statuses) for i in range(4)]
+        return {
+            "total": total,
+            "pending": len(self._keys["Pending"]) if "Pending" in statuses else 0,
+            "completed": len(self._keys["Completed"]) if "Completed" in statuses else 0,
+            "avg_score": sums[0] / total if total else None,
+            "total_impact": sums[1],
+            "high_impact": sums[2],
+            "high_score": sums[3],
+        }
+
+    @retry_on_locked
+    def _write(self, write, task_id=None):
+        """Run write() and patch the written task in, or let the next read reload if anything else changed.
+        
+        write() runs inside one transaction, so the data function does not retry on its
+        own; a locked database is retried here, after the transaction and its lock are gone.
+        """
+        db = _current_db()
+        if db.in_transaction():
+            # Inside a caller's transaction the commit comes later, with its other writes
+            self._token = None
+            return write()
+        with db.transaction() as conn:
+            # BEGIN IMMEDIATE keeps other connections from committing until this one does
+            changes_before = conn.total_changes
+            token = db.change_token()
+            fresh = self._token is not None and token == self._token
+            result = write()
+            task_id = result if task_id is None else task_id
+            rows = _fetch_tasks(f"SELECT {TASK_FIELDS}, score AS priority FROM tasks WHERE id = ?", [task_id])
+            # The commit bumps the generation once if anything changed; our own commit
+            # does not move data_version
+            if conn.total_changes != changes_before:
+                token = (token[0] + 1, token[1])
+        if not fresh:
+            self._token = None
+            return result
+        old = self._by_id.get(task_id)
+        if old is not None:
+            self._remove(old)
+        if rows and (self._complete or rows[0].status in self._keys):
+            # A status not loaded yet will read the row along with the others
+            self._insert(rows[0])
+        self._token = token
+        self.stats['patches'] += 1
+        return result
+
+    def add_task(self, topic, description, due, status, impact, tractability, uncertainty):
+        """add_task(), then insert the new task into the cache; returns its id."""
+        return self._write(lambda: add_task(topic, description, due, status, impact, tractability, uncertainty))
+
+    def update_task(self, task_id, topic, description, due, status, impact, tractability, uncertainty):
+        """update_task(), then move the task to its new place in the cache."""
+        return self._write(lambda: update_task(task_id, topic, description, due, status,
+                                               impact, tractability, uncertainty), int(task_id))
+
+    def delete_task(self, task_id):
+        """delete_task(), then drop the task from the cache."""
+        return self._write(lambda: delete_task(task_id), int(task_id))
+
+def completed_range_start(days_back):
+    """Return the first day (YYYY-MM-DD) of a window of the last X days, today included.
+    
+    Days are UTC calendar days, like the timestamps SQLite writes into completed_at.
+    """
+    return (datetime.now(timezone.utc).date() - timedelta(days=days_back - 1)).isoformat()
+
+def get_completed_tasks_in_range(days_back):
+    """Get completed tasks within the last X days."""
+    return get_completed_tasks_since(completed_range_start(days_back))
+
+_COMPLETED_SINCE_QUERY = f"""
+    SELECT {TASK_FIELDS} FROM tasks 
+    WHERE completed_at >= ?
+    ORDER BY completed_at DESC, score DESC
+"""
+
+@cached_query
+def get_completed_tasks_since(cutoff):
+    """Get tasks completed at or after cutoff (a YYYY-MM-DD day or timestamp), newest first."""
+    with _current_db().connection() as conn:
+        return _read_tasks_frame(_COMPLETED_SINCE_QUERY, conn, [cutoff])
+
+@cached_query
+def get_completed_task_records_since(cutoff):
+    """get_completed_tasks_since() as a list of Task records, read without pandas."""
+    return _fetch_tasks(_COMPLETED_SINCE_QUERY, [cutoff])
+
+@cached_query
+def get_daily_completions(days_back):
+    """Per-day completion totals for the last X days from the rollup, one row per day (zeros included)."""
+    start = completed_range_start(days_back)
+    with _current_db().connection() as conn:
+        rollup = _read_frame('''
+            SELECT day, completed, total_impact, total_score, high_impact, high_score
+            FROM daily_completions WHERE day >= ? ORDER BY day
+        ''', conn, params=[start], index_col='day')
+    days = [(date.fromisoformat(start) + timedelta(days=i)).isoformat() for i in range(days_back)]
+    daily = rollup.reindex(days, fill_value=0)
+    daily.index.name = 'day'
+    return daily.reset_index()
+
+@cached_query
+def completion_summary(days_back):
+    """Done Today metrics for the last X days, summed from at most X rollup rows.
+    
+    Returns a dict with completed, total_impact, avg_score (None when nothing was
+    completed), high_impact and high_score.
+    """
+    with _current_db().connection() as conn:
+        completed, total_impact, total_score, high_impact, high_score = conn.execute('''
+            SELECT COALESCE(SUM(completed), 0), COALESCE(SUM(total_impact), 0), SUM(total_score),
+                   COALESCE(SUM(high_impact), 0), COALESCE(SUM(high_score), 0)
+            FROM daily_completions WHERE day >= ?
+        ''', (completed_range_start(days_back),)).fetchone()
+    return {
+        "completed": completed,
+        "total_impact": total_impact,
+        "avg_score": total_score / completed if completed else None,
+        "high_impact": high_impact,
+        "high_score": high_score,
+    }
+
+# Bulk import: rows are validated while streaming and inserted executemany() chunk by chunk
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_FORMATS = ("csv", "jsonl")
+RATING_FIELDS = ("impact", "tractability", "uncertainty")
+_ISO_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def _iter_import_records(source, file_format):
+    """Yield (line number, record dict) pairs from a CSV or JSONL text stream."""
+    if file_format == "csv":
+        reader = csv.DictReader(source)
+        for record in reader:
+            yield reader.line_num, record
+    elif file_format == "jsonl":
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, ValueError(f"invalid JSON: {e.msg}")
+                continue
+            if not isinstance(record, dict):
+                record = ValueError("each line must be a JSON object")
+            yield line_number, record
+    else:
+        raise ValueError(f"Unsupported import format {file_format!r}; expected one of {IMPORT_FORMATS}")
+
+def validate_task_record(record):
+    """Return the (topic, description, due, status, impact, tractability, uncertainty) of a record.
+    
+    record is a dict of task fields as read from an import file or a JSON request. Raises
+    ValueError describing the first invalid field. Missing ratings default to 5 and a
+    missing status to Pending, as on the Add Task page.
+    """
+    topic = record.get('topic')
+    if not isinstance(topic, str) or not topic.strip():
+        raise ValueError("topic is required")
+    
+    description = record.get('description') or ""
+    if not isinstance(description, str):
+        raise ValueError("description must be text")
+    
+    due = record.get('due') or None
+    if due is not None:
+        try:
+            if not _ISO_DATE.fullmatch(str(due).strip()):
+                raise ValueError
+            due = date.fromisoformat(str(due).strip()).isoformat()
+        except ValueError:
+            raise ValueError(f"due must be a YYYY-MM-DD date, got {due!r}")
+    
+    status = record.get('status') or "Pending"
+    if status not in TASK_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(TASK_STATUSES)}, got {status!r}")
+    
+    ratings = []
+    for field in RATING_FIELDS:
+        value = record.get(field)
+        if value is None or value == "":
+            value = 5
+        elif isinstance(value, str) and value.strip().isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= 10:
+            raise ValueError(f"{field} must be a whole number from 1 to 10, got {value!r}")
+        ratings.append(value)
+    
+    return (topic.strip(), description, due, status, *ratings)
+
+def _insert_import_chunk(conn, rows):
+    if _fts_enabled:
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+        _set_meta(conn, 'fts_sync_paused', '1')
+    conn.executemany('''
+        INSERT INTO tasks (topic, description, due, status, impact, tractability, uncertainty, score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [row + (calculate_score(*row[4:]),) for row in rows])
+    if _fts_enabled:
+        conn.execute('''
+            INSERT INTO tasks_fts(rowid, topic, description, status)
+            SELECT id, topic, description, status FROM tasks WHERE id > ?
+        ''', (last_id,))
+        conn.execute("DELETE FROM app_meta WHERE key = 'fts_sync_paused'")
+
+def import_tasks(source, file_format="csv", chunk_size=IMPORT_CHUNK_SIZE, atomic=True, progress=None):
+    """Stream tasks from a CSV or JSONL text source into the database.
+    
+    source is any iterable of text lines (an open file, io.StringIO, ...). CSV input needs a
+    header row naming the task fields; JSONL input has one JSON object per line. Invalid
+    rows are skipped and reported rather than aborting the import. Valid rows are inserted
+    with executemany() every chunk_size rows, all in one transaction when atomic (the
+    default) or committing each chunk otherwise. progress, if given, is called after every
+    chunk with (rows read, rows imported, rows rejected).
+    
+    Returns {"imported": int, "rejected": int, "errors": [(line number, message), ...]}.
+    """
+    result = {"imported": 0, "rejected": 0, "errors": []}
+    rows_read = 0
+    chunk = []
+    
+    def flush():
+        if chunk:
+            with _current_db().transaction() as conn:
+                _insert_import_chunk(conn, chunk)
+            result["imported"] += len(chunk)
+            chunk.clear()
+        if progress is not None:
+            progress(rows_read, result["imported"], result["rejected"])
+    
+    with (_current_db().transaction() if atomic else nullcontext()):
+        for line_number, record in _iter_import_records(source, file_format):
+            rows_read += 1
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                chunk.append(validate_task_record(record))
+            except ValueError as e:
+                result["rejected"] += 1
+                result["errors"].append((line_number, str(e)))
+            if len(chunk) >= chunk_size:
+                flush()
+        flush()
+    
+    return result